@@ -0,0 +1,37 @@
+"""Add credit_score_snapshots table for batch rescoring
+
+Revision ID: 002_score_snapshots
+Revises: 001_initial
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002_score_snapshots'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'credit_score_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.String(length=36), nullable=False),
+        sa.Column('consumer_id', sa.Integer(), nullable=False),
+        sa.Column('credit_score', sa.Integer(), nullable=False),
+        sa.Column('score_factors', sa.JSON(), nullable=True),
+        sa.Column('as_of_date', sa.Date(), nullable=False),
+        sa.Column('scored_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['consumer_id'], ['consumers.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_credit_score_snapshots_id'), 'credit_score_snapshots', ['id'], unique=False)
+    op.create_index(op.f('ix_credit_score_snapshots_run_id'), 'credit_score_snapshots', ['run_id'], unique=False)
+    op.create_index(op.f('ix_credit_score_snapshots_consumer_id'), 'credit_score_snapshots', ['consumer_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('credit_score_snapshots')
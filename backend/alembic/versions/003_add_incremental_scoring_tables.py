@@ -0,0 +1,42 @@
+"""Add consumer_scores and scoring_dirty_consumers for incremental rescoring
+
+Revision ID: 003_incremental_scoring
+Revises: 002_score_snapshots
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_incremental_scoring'
+down_revision = '002_score_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'consumer_scores',
+        sa.Column('consumer_id', sa.Integer(), nullable=False),
+        sa.Column('credit_score', sa.Integer(), nullable=False),
+        sa.Column('score_factors', sa.JSON(), nullable=True),
+        sa.Column('as_of_date', sa.Date(), nullable=False),
+        sa.Column('scored_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['consumer_id'], ['consumers.id'], ),
+        sa.PrimaryKeyConstraint('consumer_id')
+    )
+
+    op.create_table(
+        'scoring_dirty_consumers',
+        sa.Column('consumer_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+        sa.Column('marked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['consumer_id'], ['consumers.id'], ),
+        sa.PrimaryKeyConstraint('consumer_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scoring_dirty_consumers')
+    op.drop_table('consumer_scores')
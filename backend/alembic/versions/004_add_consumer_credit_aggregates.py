@@ -0,0 +1,42 @@
+"""Add consumer_credit_aggregates table
+
+Revision ID: 004_credit_aggregates
+Revises: 003_incremental_scoring
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_credit_aggregates'
+down_revision = '003_incremental_scoring'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'consumer_credit_aggregates',
+        sa.Column('consumer_id', sa.Integer(), nullable=False),
+        sa.Column('total_accounts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('payment_current', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('payment_late_30', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('payment_late_60', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('payment_late_90', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('payment_late_120_plus', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('payment_no_payment', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total_balance', sa.Numeric(precision=18, scale=2), server_default='0', nullable=False),
+        sa.Column('total_limit', sa.Numeric(precision=18, scale=2), server_default='0', nullable=False),
+        sa.Column('oldest_open_date', sa.Date(), nullable=True),
+        sa.Column('account_type_counts', sa.JSON(), nullable=False),
+        sa.Column('recent_open_dates', sa.JSON(), nullable=False),
+        sa.Column('valid_until', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['consumer_id'], ['consumers.id'], ),
+        sa.PrimaryKeyConstraint('consumer_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('consumer_credit_aggregates')
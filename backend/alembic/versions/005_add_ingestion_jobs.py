@@ -0,0 +1,53 @@
+"""Add ingestion_jobs table
+
+Revision ID: 005_ingestion_jobs
+Revises: 004_credit_aggregates
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_ingestion_jobs'
+down_revision = '004_credit_aggregates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bank_id', sa.Integer(), nullable=False),
+        sa.Column('submitted_by', sa.Integer(), nullable=True),
+        sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', name='ingestionjobstatus'), server_default='QUEUED', nullable=False),
+        sa.Column('file_format', sa.String(length=10), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('file_size', sa.BigInteger(), nullable=False),
+        sa.Column('bytes_processed', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('last_row', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rows_processed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rows_inserted', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rows_rejected', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('errors', sa.JSON(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['bank_id'], ['banks.id'], ),
+        sa.ForeignKeyConstraint(['submitted_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestion_jobs_id'), 'ingestion_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_ingestion_jobs_bank_id'), 'ingestion_jobs', ['bank_id'], unique=False)
+    op.create_index(op.f('ix_ingestion_jobs_status'), 'ingestion_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ingestion_jobs_status'), table_name='ingestion_jobs')
+    op.drop_index(op.f('ix_ingestion_jobs_bank_id'), table_name='ingestion_jobs')
+    op.drop_index(op.f('ix_ingestion_jobs_id'), table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
+    sa.Enum(name='ingestionjobstatus').drop(op.get_bind(), checkfirst=True)
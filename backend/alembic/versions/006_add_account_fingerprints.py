@@ -0,0 +1,35 @@
+"""Add account fingerprints for delta feeds
+
+Revision ID: 006_account_fingerprints
+Revises: 005_ingestion_jobs
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_account_fingerprints'
+down_revision = '005_ingestion_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('credit_accounts', sa.Column('account_fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('credit_accounts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    # Existing rows stay NULL until python -m app.services.backfill --account-fingerprints
+    op.create_unique_constraint('uq_credit_accounts_bank_fingerprint', 'credit_accounts', ['bank_id', 'account_fingerprint'])
+
+    op.add_column('ingestion_jobs', sa.Column('mode', sa.String(length=10), server_default='insert', nullable=False))
+    op.add_column('ingestion_jobs', sa.Column('rows_updated', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ingestion_jobs', sa.Column('rows_unchanged', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('ingestion_jobs', 'rows_unchanged')
+    op.drop_column('ingestion_jobs', 'rows_updated')
+    op.drop_column('ingestion_jobs', 'mode')
+    op.drop_constraint('uq_credit_accounts_bank_fingerprint', 'credit_accounts', type_='unique')
+    op.drop_column('credit_accounts', 'content_hash')
+    op.drop_column('credit_accounts', 'account_fingerprint')
@@ -0,0 +1,30 @@
+"""Add SSN and account number blind indexes
+
+Revision ID: 007_blind_indexes
+Revises: 006_account_fingerprints
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_blind_indexes'
+down_revision = '006_account_fingerprints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL until python -m app.services.backfill --blind-indexes
+    op.add_column('consumers', sa.Column('ssn_index', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_consumers_ssn_index'), 'consumers', ['ssn_index'], unique=True)
+    op.add_column('credit_accounts', sa.Column('account_number_index', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_credit_accounts_account_number_index'), 'credit_accounts', ['account_number_index'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_credit_accounts_account_number_index'), table_name='credit_accounts')
+    op.drop_column('credit_accounts', 'account_number_index')
+    op.drop_index(op.f('ix_consumers_ssn_index'), table_name='consumers')
+    op.drop_column('consumers', 'ssn_index')
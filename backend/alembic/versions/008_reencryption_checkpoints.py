@@ -0,0 +1,39 @@
+"""Add reencryption_checkpoints table
+
+Revision ID: 008_reencryption_checkpoints
+Revises: 007_blind_indexes
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_reencryption_checkpoints'
+down_revision = '007_blind_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reencryption_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('target', sa.String(length=100), nullable=False),
+        sa.Column('key_version', sa.Integer(), nullable=False),
+        sa.Column('last_id', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rows_scanned', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rows_reencrypted', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rows_failed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('target', 'key_version', name='uq_reencryption_checkpoints_target_version')
+    )
+    op.create_index(op.f('ix_reencryption_checkpoints_id'), 'reencryption_checkpoints', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reencryption_checkpoints_id'), table_name='reencryption_checkpoints')
+    op.drop_table('reencryption_checkpoints')
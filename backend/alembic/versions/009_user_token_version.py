@@ -0,0 +1,23 @@
+"""Add users.token_version
+
+Revision ID: 009_user_token_version
+Revises: 008_reencryption_checkpoints
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_user_token_version'
+down_revision = '008_reencryption_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,34 @@
+"""Add audit_spool_checkpoints table
+
+Revision ID: 010_audit_spool_checkpoints
+Revises: 009_user_token_version
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_audit_spool_checkpoints'
+down_revision = '009_user_token_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_spool_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('series', sa.String(length=32), nullable=False),
+        sa.Column('segment', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('segment_offset', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('series')
+    )
+    op.create_index(op.f('ix_audit_spool_checkpoints_id'), 'audit_spool_checkpoints', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_audit_spool_checkpoints_id'), table_name='audit_spool_checkpoints')
+    op.drop_table('audit_spool_checkpoints')
@@ -0,0 +1,105 @@
+"""Partition audit_logs by month of created_at
+
+Revision ID: 011_partition_audit_logs
+Revises: 010_audit_spool_checkpoints
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011_partition_audit_logs'
+down_revision = '010_audit_spool_checkpoints'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, user_id, action, resource_type, resource_id, ip_address, user_agent, request_method, "
+    "request_path, request_body, response_status, error_message, additional_metadata, created_at"
+)
+INDEXED = ['user_id', 'action', 'resource_type', 'resource_id', 'created_at']
+
+CREATE_TABLE = """
+    CREATE TABLE audit_logs (
+        id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+        user_id INTEGER REFERENCES users (id),
+        action auditaction NOT NULL,
+        resource_type VARCHAR(100) NOT NULL,
+        resource_id INTEGER,
+        ip_address VARCHAR(45),
+        user_agent TEXT,
+        request_method VARCHAR(10),
+        request_path VARCHAR(512),
+        request_body JSON,
+        response_status INTEGER,
+        error_message TEXT,
+        additional_metadata JSON,
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        {primary_key}
+    ){partition_by}
+"""
+
+# One partition per UTC month, from the oldest existing row to three months ahead;
+# app.services.audit_partitions keeps creating them after that
+CREATE_PARTITIONS = """
+    DO $$
+    DECLARE
+        month date;
+    BEGIN
+        FOR month IN
+            SELECT generate_series(
+                date_trunc('month', COALESCE((SELECT min(created_at) FROM audit_logs_previous), now()) AT TIME ZONE 'UTC'),
+                date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months',
+                interval '1 month'
+            )::date
+        LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                'audit_logs_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                to_char(month, 'YYYY-MM-DD') || ' 00:00:00+00',
+                to_char((month + interval '1 month')::date, 'YYYY-MM-DD') || ' 00:00:00+00'
+            );
+        END LOOP;
+    END $$;
+"""
+
+
+def _move_aside(indexes) -> None:
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_previous")
+    op.execute("ALTER TABLE audit_logs_previous RENAME CONSTRAINT audit_logs_pkey TO audit_logs_previous_pkey")
+    op.execute(
+        "ALTER TABLE audit_logs_previous "
+        "RENAME CONSTRAINT audit_logs_user_id_fkey TO audit_logs_previous_user_id_fkey"
+    )
+    for column in indexes:
+        op.execute(f"ALTER INDEX ix_audit_logs_{column} RENAME TO ix_audit_logs_previous_{column}")
+
+
+def _copy_back() -> None:
+    # Hand the id sequence to the new table so dropping the old one keeps it
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_previous")
+    op.execute("DROP TABLE audit_logs_previous")
+
+
+def upgrade() -> None:
+    # A partitioned table's primary key must include the partition key; ids stay
+    # unique through the sequence. The id index is dropped: the key covers it.
+    _move_aside(['id'] + INDEXED)
+    op.execute(CREATE_TABLE.format(
+        primary_key="CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)",
+        partition_by=" PARTITION BY RANGE (created_at)",
+    ))
+    op.execute(CREATE_PARTITIONS)
+    for column in INDEXED:
+        op.create_index(op.f(f'ix_audit_logs_{column}'), 'audit_logs', [column], unique=False)
+    _copy_back()
+
+
+def downgrade() -> None:
+    # Detached partitions that were archived are not restored
+    _move_aside(INDEXED)
+    op.execute(CREATE_TABLE.format(primary_key="CONSTRAINT audit_logs_pkey PRIMARY KEY (id)", partition_by=""))
+    for column in ['id'] + INDEXED:
+        op.create_index(op.f(f'ix_audit_logs_{column}'), 'audit_logs', [column], unique=False)
+    _copy_back()
@@ -0,0 +1,25 @@
+"""Index audit_logs on (created_at, id) for cursor pagination
+
+Revision ID: 012_audit_logs_keyset_index
+Revises: 011_partition_audit_logs
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '012_audit_logs_keyset_index'
+down_revision = '011_partition_audit_logs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves ORDER BY created_at DESC, id DESC and created_at range filters, so it replaces the single-column index
+    op.create_index('ix_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_audit_logs_created_at'), table_name='audit_logs')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_audit_logs_created_at'), 'audit_logs', ['created_at'], unique=False)
+    op.drop_index('ix_audit_logs_created_at_id', table_name='audit_logs')
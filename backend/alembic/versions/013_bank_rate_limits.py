@@ -0,0 +1,26 @@
+"""Add per-bank rate limit quotas
+
+Revision ID: 013_bank_rate_limits
+Revises: 012_audit_logs_keyset_index
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_bank_rate_limits'
+down_revision = '012_audit_logs_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL means the BANK_RATE_LIMIT_PER_MINUTE / PER_HOUR defaults
+    op.add_column('banks', sa.Column('rate_limit_per_minute', sa.Integer(), nullable=True))
+    op.add_column('banks', sa.Column('rate_limit_per_hour', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('banks', 'rate_limit_per_hour')
+    op.drop_column('banks', 'rate_limit_per_minute')
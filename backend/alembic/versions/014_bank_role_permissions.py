@@ -0,0 +1,39 @@
+"""Add bank_role_permissions for per-bank role permission overrides
+
+Revision ID: 014_bank_role_permissions
+Revises: 013_bank_rate_limits
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '014_bank_role_permissions'
+down_revision = '013_bank_rate_limits'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bank_role_permissions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bank_id', sa.Integer(), nullable=False),
+        sa.Column('role', postgresql.ENUM('ADMIN', 'BANK_MANAGER', 'BANK_USER', 'DATA_PROVIDER', 'AUDITOR', 'CONSUMER', name='userrole', create_type=False), nullable=False),
+        sa.Column('permission', sa.String(length=100), nullable=False),
+        sa.Column('granted', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['bank_id'], ['banks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('bank_id', 'role', 'permission', name='uq_bank_role_permissions'),
+    )
+    op.create_index(op.f('ix_bank_role_permissions_id'), 'bank_role_permissions', ['id'], unique=False)
+    op.create_index(op.f('ix_bank_role_permissions_bank_id'), 'bank_role_permissions', ['bank_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bank_role_permissions_bank_id'), table_name='bank_role_permissions')
+    op.drop_index(op.f('ix_bank_role_permissions_id'), table_name='bank_role_permissions')
+    op.drop_table('bank_role_permissions')
@@ -0,0 +1,33 @@
+"""Add partial indexes on granted consents
+
+Revision ID: 015_consents_active_index
+Revises: 014_bank_role_permissions
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015_consents_active_index'
+down_revision = '014_bank_role_permissions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Consent checks look up grants by consumer, bank and type, and read expires_at from the index
+    op.create_index(
+        'ix_consents_active', 'consents', ['consumer_id', 'bank_id', 'consent_type', 'expires_at'],
+        unique=False, postgresql_where=sa.text("status = 'GRANTED'"),
+    )
+    # The expiry sweeper scans grants in expires_at order
+    op.create_index(
+        'ix_consents_granted_expires_at', 'consents', ['expires_at'],
+        unique=False, postgresql_where=sa.text("status = 'GRANTED' AND expires_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_consents_granted_expires_at', table_name='consents')
+    op.drop_index('ix_consents_active', table_name='consents')
@@ -0,0 +1,24 @@
+"""Add a claim token to ingestion jobs
+
+Revision ID: 016_ingestion_job_claim_token
+Revises: 015_consents_active_index
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016_ingestion_job_claim_token'
+down_revision = '015_consents_active_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Replaced on every claim; progress writes only succeed for the current holder
+    op.add_column('ingestion_jobs', sa.Column('claim_token', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('ingestion_jobs', 'claim_token')
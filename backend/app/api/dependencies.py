@@ -1,37 +1,58 @@
 """
 FastAPI dependencies for authentication and authorization
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.models.user import User
-from app.utils.security import verify_token
-from app.utils.permissions import has_permission, can_access_bank_data, can_access_consumer_data
+from app.config import settings
+from app.utils.auth_cache import get_request_token_payload, get_token_principal, get_user_principal
+from app.utils.permissions import (
+    PERMISSION_BITS,
+    bank_role_permissions,
+    can_access_bank_data,
+    can_access_consumer_data,
+    get_permission_mask,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get current authenticated user from JWT token"""
+    """
+    Get current authenticated user from JWT token.
+    The token is decoded once per request and the user comes from the principal
+    cache, so the returned User is detached; query it before modifying it.
+    With AUTH_LIGHTWEIGHT_PRINCIPAL a Principal built from the token claims is
+    returned instead, carrying only id, email, role and bank_id.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = verify_token(token, "access")
+    payload = get_request_token_payload(request)
     if payload is None:
         raise credentials_exception
     
-    user_id: int = payload.get("sub")
-    if user_id is None:
+    if settings.AUTH_LIGHTWEIGHT_PRINCIPAL:
+        principal = await get_token_principal(payload)
+        if principal is not None:
+            return principal
+    
+    try:
+        user_id = int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await get_user_principal(db, user_id)
     if user is None:
         raise credentials_exception
     
@@ -56,12 +77,38 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_user_record(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """Current user with every column loaded, for endpoints that return the user itself"""
+    if isinstance(current_user, User):
+        return current_user
+    user = await get_user_principal(db, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+    return user
+
+
 def require_permission_dependency(permission: str):
     """Dependency factory for requiring specific permission"""
+    bit = PERMISSION_BITS[permission]
+    
     async def permission_checker(
         current_user: User = Depends(get_current_active_user)
     ) -> User:
-        if not has_permission(current_user, permission):
+        if bank_role_permissions.stale():
+            await run_in_threadpool(bank_role_permissions.refresh)
+        if not get_permission_mask(current_user) & bit:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission denied: {permission}"
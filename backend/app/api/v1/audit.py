@@ -1,29 +1,75 @@
 """
 Audit Logs API routes
 """
+from typing import Optional
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
 from app.models.audit_log import AuditLog
 from app.models.user import User
-from app.schemas.common import PaginatedResponse
+from app.schemas.common import APIResponse, PaginatedResponse
 from app.api.dependencies import require_permission_dependency
+from app.services.audit_writer import audit_writer
+from app.utils.pagination import Keyset, count_rows, page_meta, paginate
 from app.utils.permissions import Permission
 
 router = APIRouter()
 
+# created_at leads so cursor pages stay within the partitions they need
+AUDIT_KEYSET = Keyset(AuditLog.created_at, AuditLog.id, descending=True)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Dates given without an offset are taken as UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+@router.get("/writer/stats", response_model=APIResponse[dict])
+async def get_audit_writer_stats(
+    current_user: User = Depends(require_permission_dependency(Permission.VIEW_AUDIT_LOGS))
+):
+    """Get audit spool and load counters for this worker"""
+    return APIResponse(success=True, data=audit_writer.stats())
+
 
 @router.get("/", response_model=PaginatedResponse[dict])
 async def get_audit_logs(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     user_id: int = None,
     resource_type: str = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
     current_user: User = Depends(require_permission_dependency(Permission.VIEW_AUDIT_LOGS)),
     db: Session = Depends(get_db)
 ):
-    """Get audit logs (admin/auditor only)"""
+    """
+    Get audit logs (admin/auditor only).
+    Without start_date only the last AUDIT_QUERY_DEFAULT_DAYS are searched;
+    meta.start_date/end_date report the window applied.
+    """
+    # Bounded by created_at, so PostgreSQL only scans the monthly partitions in range
+    if start_date is None and settings.AUDIT_QUERY_DEFAULT_DAYS > 0:
+        # Whole minutes, so repeated requests share a cached total
+        start_date = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(
+            days=settings.AUDIT_QUERY_DEFAULT_DAYS
+        )
+    start_date, end_date = _as_utc(start_date), _as_utc(end_date)
+    if start_date is not None and end_date is not None and end_date <= start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must be after start_date"
+        )
     query = db.query(AuditLog)
+    if start_date is not None:
+        query = query.filter(AuditLog.created_at >= start_date)
+    if end_date is not None:
+        query = query.filter(AuditLog.created_at < end_date)
     
     # Filter by user if provided
     if user_id:
@@ -33,8 +79,10 @@ async def get_audit_logs(
     if resource_type:
         query = query.filter(AuditLog.resource_type == resource_type)
     
-    logs = query.order_by(AuditLog.created_at.desc()).offset(skip).limit(limit).all()
-    total = query.count()
+    logs = paginate(query, AUDIT_KEYSET, limit, skip, cursor).all()
+    count = None if cursor else count_rows(db, query)
+    logs, meta = page_meta(logs, AUDIT_KEYSET, limit, skip, cursor, count)
+    meta.update(start_date=start_date, end_date=end_date)
     
     log_data = [
         {
@@ -52,11 +100,6 @@ async def get_audit_logs(
     return PaginatedResponse(
         success=True,
         data=log_data,
-        meta={
-            "page": skip // limit + 1,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }
+        meta=meta
     )
 
@@ -11,15 +11,16 @@ from app.schemas.user import UserCreate, UserResponse, Token, UserLogin
 from app.schemas.auth import RefreshTokenRequest
 from app.schemas.common import APIResponse
 from app.utils.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     create_refresh_token,
     verify_token
 )
+from app.utils.auth_cache import access_token_claims, invalidate_user
+from app.utils.password_hashing import hash_password_async, verify_password_async, password_pool
 from app.utils.email import send_verification_email
 from app.config import settings
-from app.api.dependencies import get_current_active_user
+from app.api.dependencies import get_current_user_record, require_permission_dependency
+from app.utils.permissions import Permission
 
 router = APIRouter()
 
@@ -39,7 +40,7 @@ async def register(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     db_user = User(
         email=user_data.email,
         password_hash=hashed_password,
@@ -81,7 +82,7 @@ async def login(
     """Login and get access token"""
     user = db.query(User).filter(User.email == form_data.username).first()
     
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -97,7 +98,7 @@ async def login(
     # Create tokens
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id, "email": user.email, "role": user.role.value},
+        data=access_token_claims(user),
         expires_delta=access_token_expires
     )
     refresh_token = create_refresh_token(
@@ -108,6 +109,7 @@ async def login(
     from datetime import datetime
     user.last_login = datetime.utcnow()
     db.commit()
+    invalidate_user(user.id)
     
     return APIResponse(
         success=True,
@@ -133,7 +135,7 @@ async def refresh_token(
         )
     
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id == int(user_id)).first() if str(user_id).isdigit() else None
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -144,7 +146,7 @@ async def refresh_token(
     # Create new tokens
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id, "email": user.email, "role": user.role.value},
+        data=access_token_claims(user),
         expires_delta=access_token_expires
     )
     new_refresh_token = create_refresh_token(
@@ -163,7 +165,7 @@ async def refresh_token(
 
 @router.get("/me", response_model=APIResponse[UserResponse])
 async def get_current_user_info(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """Get current user information"""
     return APIResponse(
@@ -171,3 +173,10 @@ async def get_current_user_info(
         data=UserResponse.model_validate(current_user)
     )
 
+
+@router.get("/hashing/stats", response_model=APIResponse[dict])
+async def get_password_hashing_stats(
+    current_user: User = Depends(require_permission_dependency(Permission.VIEW_AUDIT_LOGS))
+):
+    """Get password hashing pool queue depth and timings for this worker"""
+    return APIResponse(success=True, data=password_pool.stats())
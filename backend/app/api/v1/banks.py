@@ -3,40 +3,49 @@ Banks API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.models.bank import Bank
 from app.models.user import User, UserRole
-from app.schemas.bank import BankCreate, BankUpdate, BankResponse, BankApproval
+from app.models.bank_role_permission import BankRolePermission
+from app.schemas.bank import (
+    BankCreate, BankUpdate, BankResponse, BankApproval, BankRolePermissions, BankRolePermissionsResponse
+)
 from app.schemas.common import APIResponse, PaginatedResponse
+from app.utils.pagination import Keyset, count_rows, page_meta, paginate
 from app.api.dependencies import get_current_active_user, require_permission_dependency
-from app.utils.permissions import Permission
-from app.utils.security import generate_api_key, get_password_hash
+from app.utils.permissions import (
+    BANK_ROLES, GLOBAL_PERMISSIONS, PERMISSION_BITS, ROLE_MASKS, Permission, bank_role_permissions,
+    mask_permissions, permission_mask
+)
+from app.utils.rate_limit_policies import bank_quotas
+from app.utils.password_hashing import hash_password_async
+from app.utils.security import generate_api_key
 from datetime import datetime
 
 router = APIRouter()
 
+BANK_KEYSET = Keyset(Bank.id)
+
 
 @router.get("/", response_model=PaginatedResponse[BankResponse])
 async def get_banks(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(require_permission_dependency(Permission.VIEW_BANK)),
     db: Session = Depends(get_db)
 ):
     """Get list of banks"""
-    banks = db.query(Bank).offset(skip).limit(limit).all()
-    total = db.query(Bank).count()
+    query = db.query(Bank)
+    banks = paginate(query, BANK_KEYSET, limit, skip, cursor).all()
+    count = None if cursor else count_rows(db, query)
+    banks, meta = page_meta(banks, BANK_KEYSET, limit, skip, cursor, count)
     
     return PaginatedResponse(
         success=True,
         data=[BankResponse.model_validate(bank) for bank in banks],
-        meta={
-            "page": skip // limit + 1,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }
+        meta=meta
     )
 
 
@@ -72,7 +81,7 @@ async def create_bank(
     
     # Generate API key
     api_key = generate_api_key()
-    api_key_hash = get_password_hash(api_key)
+    api_key_hash = await hash_password_async(api_key)
     
     db_bank = Bank(
         name=bank_data.name,
@@ -122,6 +131,7 @@ async def update_bank(
     
     db.commit()
     db.refresh(bank)
+    bank_quotas.invalidate(bank.id)
     
     return APIResponse(
         success=True,
@@ -159,3 +169,82 @@ async def approve_bank(
         meta={"message": f"Bank {'approved' if approval.is_approved else 'rejected'} successfully"}
     )
 
+
+def _role_permissions_response(role: UserRole, grant: List[str], revoke: List[str]) -> BankRolePermissionsResponse:
+    mask = (ROLE_MASKS.get(role, 0) | permission_mask(grant)) & ~permission_mask(revoke)
+    return BankRolePermissionsResponse(role=role, grant=grant, revoke=revoke, permissions=mask_permissions(mask))
+
+
+@router.get("/{bank_id}/role-permissions", response_model=APIResponse[List[BankRolePermissionsResponse]])
+async def get_bank_role_permissions(
+    bank_id: int,
+    current_user: User = Depends(require_permission_dependency(Permission.VIEW_BANK)),
+    db: Session = Depends(get_db)
+):
+    """Get the bank's role permission overrides"""
+    overrides = {}
+    rows = db.query(BankRolePermission).filter(BankRolePermission.bank_id == bank_id).order_by(BankRolePermission.id)
+    for row in rows:
+        grant, revoke = overrides.setdefault(row.role, ([], []))
+        (grant if row.granted else revoke).append(row.permission)
+    return APIResponse(
+        success=True,
+        data=[_role_permissions_response(role, grant, revoke) for role, (grant, revoke) in overrides.items()]
+    )
+
+
+@router.put("/{bank_id}/role-permissions", response_model=APIResponse[BankRolePermissionsResponse])
+async def update_bank_role_permissions(
+    bank_id: int,
+    overrides: BankRolePermissions,
+    current_user: User = Depends(require_permission_dependency(Permission.UPDATE_BANK)),
+    db: Session = Depends(get_db)
+):
+    """Replace one role's permission overrides for the bank"""
+    if not db.query(Bank.id).filter(Bank.id == bank_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bank not found"
+        )
+    unknown = [permission for permission in overrides.grant + overrides.revoke if permission not in PERMISSION_BITS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown permissions: {', '.join(unknown)}"
+        )
+    if overrides.role not in BANK_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only {', '.join(role.value for role in BANK_ROLES)} can be adjusted per bank"
+        )
+    global_permissions = [
+        permission for permission in overrides.grant + overrides.revoke if permission in GLOBAL_PERMISSIONS
+    ]
+    if global_permissions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Permissions that apply to every bank cannot be overridden: {', '.join(global_permissions)}"
+        )
+    if set(overrides.grant) & set(overrides.revoke):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A permission cannot be both granted and revoked"
+        )
+    
+    db.query(BankRolePermission).filter(
+        BankRolePermission.bank_id == bank_id, BankRolePermission.role == overrides.role
+    ).delete(synchronize_session=False)
+    for permissions, granted in [(overrides.grant, True), (overrides.revoke, False)]:
+        for permission in dict.fromkeys(permissions):
+            db.add(BankRolePermission(bank_id=bank_id, role=overrides.role, permission=permission, granted=granted))
+    db.commit()
+    # Other workers pick the change up within PERMISSION_CACHE_TTL_SECONDS
+    bank_role_permissions.invalidate()
+    
+    return APIResponse(
+        success=True,
+        data=_role_permissions_response(
+            overrides.role, list(dict.fromkeys(overrides.grant)), list(dict.fromkeys(overrides.revoke))
+        ),
+        meta={"message": "Role permissions updated successfully"}
+    )
@@ -2,14 +2,16 @@
 Consumers API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.consumer import Consumer
 from app.models.user import User
-from app.schemas.consumer import ConsumerCreate, ConsumerUpdate, ConsumerResponse
+from app.schemas.consumer import ConsumerCreate, ConsumerUpdate, ConsumerResponse, ConsumerLookup
 from app.schemas.common import APIResponse, PaginatedResponse
 from app.api.dependencies import get_current_active_user
-from app.utils.security import encrypt_sensitive_data
+from app.utils.security import encrypt_sensitive_data, ssn_blind_index
+from app.services.report_cache import invalidate_consumer_reports
 
 router = APIRouter()
 
@@ -18,22 +20,24 @@ router = APIRouter()
 async def create_consumer(
     consumer_data: ConsumerCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a consumer profile"""
-    # Encrypt SSN
-    encrypted_ssn = encrypt_sensitive_data(consumer_data.ssn)
-    
-    # Check if consumer already exists (by SSN)
-    existing = db.query(Consumer).filter(Consumer.ssn_encrypted == encrypted_ssn).first()
+    # Check if consumer already exists (by SSN blind index; ciphertexts never compare equal)
+    ssn_index = ssn_blind_index(consumer_data.ssn)
+    existing = (await db.execute(select(Consumer.id).where(Consumer.ssn_index == ssn_index))).first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Consumer with this SSN already exists"
         )
     
+    # Encrypt SSN
+    encrypted_ssn = encrypt_sensitive_data(consumer_data.ssn)
+    
     db_consumer = Consumer(
         ssn_encrypted=encrypted_ssn,
+        ssn_index=ssn_index,
         first_name=consumer_data.first_name,
         last_name=consumer_data.last_name,
         middle_name=consumer_data.middle_name,
@@ -48,8 +52,8 @@ async def create_consumer(
     )
     
     db.add(db_consumer)
-    db.commit()
-    db.refresh(db_consumer)
+    await db.commit()
+    await db.refresh(db_consumer)
     
     return APIResponse(
         success=True,
@@ -58,14 +62,40 @@ async def create_consumer(
     )
 
 
+@router.post("/lookup", response_model=APIResponse[ConsumerResponse])
+async def lookup_consumer(
+    lookup: ConsumerLookup,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Find a consumer by SSN (sent in the body to keep it out of URLs and logs)"""
+    consumer = (await db.execute(
+        select(Consumer).where(Consumer.ssn_index == ssn_blind_index(lookup.ssn))
+    )).scalars().first()
+    if not consumer:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Consumer not found"
+        )
+    
+    # Consumers can only view their own data
+    if current_user.role.value == "CONSUMER" and consumer.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return APIResponse(success=True, data=ConsumerResponse.model_validate(consumer))
+
+
 @router.get("/{consumer_id}", response_model=APIResponse[ConsumerResponse])
 async def get_consumer(
     consumer_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get consumer by ID"""
-    consumer = db.query(Consumer).filter(Consumer.id == consumer_id).first()
+    consumer = await db.get(Consumer, consumer_id)
     if not consumer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -87,10 +117,10 @@ async def freeze_credit(
     consumer_id: int,
     is_frozen: bool,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Freeze or unfreeze consumer credit"""
-    consumer = db.query(Consumer).filter(Consumer.id == consumer_id).first()
+    consumer = await db.get(Consumer, consumer_id)
     if not consumer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -105,8 +135,9 @@ async def freeze_credit(
         )
     
     consumer.is_frozen = is_frozen
-    db.commit()
-    db.refresh(consumer)
+    await db.commit()
+    invalidate_consumer_reports(consumer.id)
+    await db.refresh(consumer)
     
     return APIResponse(
         success=True,
@@ -1,25 +1,69 @@
 """
 Credit Data API routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.credit_account import CreditAccount
 from app.models.user import User
-from app.schemas.credit_account import CreditAccountCreate, CreditAccountUpdate, CreditAccountResponse
+from app.schemas.credit_account import (
+    CreditAccountCreate, CreditAccountUpdate, CreditAccountResponse, CreditAccountLookup, BulkIngestionResult
+)
 from app.schemas.common import APIResponse, PaginatedResponse
+from app.utils.pagination import Keyset, count_rows, page_meta, paginate
 from app.api.dependencies import get_current_active_user, require_permission_dependency
 from app.utils.permissions import Permission, can_access_bank_data
-from app.utils.security import encrypt_sensitive_data
+from app.utils.security import encrypt_sensitive_data, account_fingerprint, account_number_blind_index
+from app.services.scoring_queue import mark_consumers_dirty
+from app.services.credit_aggregates import account_scoring_state, apply_new_account, apply_account_update
+from app.services.report_cache import invalidate_consumer_reports
+from app.schemas.ingestion_job import IngestionJobResponse
+from app.models.ingestion_job import IngestionJob
+from app.services.ingestion import (
+    SUPPORTED_MODES, INSERT_MODE, UploadTooLarge, detect_format, ingest_file, spool_upload, tradeline_content_hash
+)
+from app.services.ingestion_jobs import create_job, job_status
+import os
 
 router = APIRouter()
 
+ACCOUNT_KEYSET = Keyset(CreditAccount.id)
+
+
+def _record_new_account(db: Session, account: CreditAccount) -> None:
+    apply_new_account(db, account)
+    mark_consumers_dirty(db, [account.consumer_id])
+
+
+async def _existing_account_id(db: AsyncSession, bank_id: int, fingerprint: str) -> Optional[int]:
+    return (await db.execute(select(CreditAccount.id).where(
+        CreditAccount.bank_id == bank_id,
+        CreditAccount.account_fingerprint == fingerprint
+    ))).scalar()
+
+
+def _account_exists(account_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Credit account already exists (id {account_id}); update it instead"
+    )
+
+
+def _record_account_update(db: Session, account: CreditAccount, before) -> None:
+    apply_account_update(db, account, before)
+    mark_consumers_dirty(db, [account.consumer_id])
+
 
 @router.post("/", response_model=APIResponse[CreditAccountResponse], status_code=status.HTTP_201_CREATED)
 async def submit_credit_data(
     credit_data: CreditAccountCreate,
     current_user: User = Depends(require_permission_dependency(Permission.SUBMIT_CREDIT_DATA)),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit credit account data"""
     # Verify user can submit data for their bank
@@ -29,13 +73,21 @@ async def submit_credit_data(
             detail="Cannot submit data for this bank"
         )
     
+    bank_id = current_user.bank_id or 1  # Use user's bank or default
+    fingerprint = account_fingerprint(bank_id, credit_data.account_number)
+    existing_id = await _existing_account_id(db, bank_id, fingerprint)
+    if existing_id is not None:
+        raise _account_exists(existing_id)
+    
     # Encrypt account number
     encrypted_account_number = encrypt_sensitive_data(credit_data.account_number)
     
     db_account = CreditAccount(
         consumer_id=credit_data.consumer_id,
-        bank_id=current_user.bank_id or 1,  # Use user's bank or default
+        bank_id=bank_id,
         account_number_encrypted=encrypted_account_number,
+        account_fingerprint=fingerprint,
+        account_number_index=account_number_blind_index(credit_data.account_number),
         account_type=credit_data.account_type,
         account_status=credit_data.account_status,
         payment_status=credit_data.payment_status,
@@ -49,10 +101,21 @@ async def submit_credit_data(
         last_payment_amount=credit_data.last_payment_amount,
         notes=credit_data.notes
     )
+    db_account.content_hash = tradeline_content_hash(db_account)
     
     db.add(db_account)
-    db.commit()
-    db.refresh(db_account)
+    try:
+        await db.run_sync(_record_new_account, db_account)
+        await db.commit()
+    except IntegrityError:
+        # A concurrent submit of the same account got past the check above first
+        await db.rollback()
+        existing_id = await _existing_account_id(db, bank_id, fingerprint)
+        if existing_id is None:
+            raise
+        raise _account_exists(existing_id)
+    invalidate_consumer_reports(db_account.consumer_id)
+    await db.refresh(db_account)
     
     return APIResponse(
         success=True,
@@ -61,49 +124,181 @@ async def submit_credit_data(
     )
 
 
+@router.post("/bulk", response_model=APIResponse[BulkIngestionResult])
+async def bulk_submit_credit_data(
+    request: Request,
+    format: str = None,
+    mode: str = INSERT_MODE,
+    current_user: User = Depends(require_permission_dependency(Permission.SUBMIT_CREDIT_DATA)),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk submit credit account data as a streamed NDJSON or CSV body.
+    Format comes from the format query parameter or the Content-Type header.
+    mode=delta upserts accounts by (bank, account number) and skips unchanged rows.
+    Invalid rows are rejected individually and reported by row number.
+    """
+    if current_user.bank_id and not can_access_bank_data(current_user, current_user.bank_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot submit data for this bank"
+        )
+    
+    fmt = detect_format(request.headers.get("content-type"), format)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload must be NDJSON (application/x-ndjson) or CSV (text/csv)"
+        )
+    if mode not in SUPPORTED_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"mode must be one of: {', '.join(SUPPORTED_MODES)}"
+        )
+    
+    try:
+        path, _ = await spool_upload(request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    
+    try:
+        result = await run_in_threadpool(ingest_file, db, path, fmt, current_user.bank_id or 1, mode=mode)
+    finally:
+        os.remove(path)
+    
+    return APIResponse(
+        success=True,
+        data=BulkIngestionResult(**result.to_dict()),
+        meta={"message": f"Inserted {result.inserted}, updated {result.updated} of {result.rows} rows"}
+    )
+
+
+@router.post("/jobs", response_model=APIResponse[IngestionJobResponse], status_code=status.HTTP_202_ACCEPTED)
+async def create_ingestion_job(
+    request: Request,
+    format: str = None,
+    mode: str = INSERT_MODE,
+    current_user: User = Depends(require_permission_dependency(Permission.SUBMIT_CREDIT_DATA)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Queue a streamed NDJSON or CSV upload for background ingestion.
+    Accepts the same body as /bulk; poll GET /jobs/{job_id} for progress.
+    """
+    if current_user.bank_id and not can_access_bank_data(current_user, current_user.bank_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot submit data for this bank"
+        )
+    
+    fmt = detect_format(request.headers.get("content-type"), format)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload must be NDJSON (application/x-ndjson) or CSV (text/csv)"
+        )
+    if mode not in SUPPORTED_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"mode must be one of: {', '.join(SUPPORTED_MODES)}"
+        )
+    
+    try:
+        path, size = await spool_upload(request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    
+    job = await db.run_sync(create_job, current_user.bank_id or 1, current_user.id, path, fmt, size, mode)
+    
+    return APIResponse(
+        success=True,
+        data=IngestionJobResponse(**job_status(job)),
+        meta={"message": "Ingestion job queued"}
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=APIResponse[IngestionJobResponse])
+async def get_ingestion_job(
+    job_id: int,
+    current_user: User = Depends(require_permission_dependency(Permission.SUBMIT_CREDIT_DATA)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get ingestion job progress, throughput and ETA"""
+    job = await db.get(IngestionJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ingestion job not found"
+        )
+    
+    if not can_access_bank_data(current_user, job.bank_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this ingestion job"
+        )
+    
+    return APIResponse(success=True, data=IngestionJobResponse(**job_status(job)))
+
+
 @router.get("/", response_model=PaginatedResponse[CreditAccountResponse])
 async def get_credit_data(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     consumer_id: int = None,
     current_user: User = Depends(require_permission_dependency(Permission.VIEW_CREDIT_REPORT)),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get credit account data"""
-    query = db.query(CreditAccount)
+    query = select(CreditAccount)
     
     # Filter by consumer if provided
     if consumer_id:
-        query = query.filter(CreditAccount.consumer_id == consumer_id)
+        query = query.where(CreditAccount.consumer_id == consumer_id)
     
     # Filter by bank if user is not admin
     if current_user.role.value != "ADMIN" and current_user.bank_id:
-        query = query.filter(CreditAccount.bank_id == current_user.bank_id)
+        query = query.where(CreditAccount.bank_id == current_user.bank_id)
     
-    accounts = query.offset(skip).limit(limit).all()
-    total = query.count()
+    accounts = (await db.execute(paginate(query, ACCOUNT_KEYSET, limit, skip, cursor))).scalars().all()
+    count = None if cursor else await db.run_sync(count_rows, query)
+    accounts, meta = page_meta(accounts, ACCOUNT_KEYSET, limit, skip, cursor, count)
     
     return PaginatedResponse(
         success=True,
         data=[CreditAccountResponse.model_validate(account) for account in accounts],
-        meta={
-            "page": skip // limit + 1,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }
+        meta=meta
     )
 
 
+@router.post("/lookup", response_model=APIResponse[List[CreditAccountResponse]])
+async def lookup_credit_data(
+    lookup: CreditAccountLookup,
+    current_user: User = Depends(require_permission_dependency(Permission.VIEW_CREDIT_REPORT)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Find credit accounts by account number (sent in the body to keep it out of URLs and logs)"""
+    query = select(CreditAccount).where(
+        CreditAccount.account_number_index == account_number_blind_index(lookup.account_number)
+    )
+    
+    # Filter by bank if user is not admin
+    if current_user.role.value != "ADMIN" and current_user.bank_id:
+        query = query.where(CreditAccount.bank_id == current_user.bank_id)
+    
+    accounts = (await db.execute(query.order_by(CreditAccount.id))).scalars().all()
+    return APIResponse(success=True, data=[CreditAccountResponse.model_validate(account) for account in accounts])
+
+
 @router.put("/{account_id}", response_model=APIResponse[CreditAccountResponse])
 async def update_credit_data(
     account_id: int,
     credit_data: CreditAccountUpdate,
     current_user: User = Depends(require_permission_dependency(Permission.UPDATE_CREDIT_DATA)),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update credit account data"""
-    account = db.query(CreditAccount).filter(CreditAccount.id == account_id).first()
+    account = await db.get(CreditAccount, account_id)
     if not account:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -117,12 +312,16 @@ async def update_credit_data(
             detail="Cannot update data for this bank"
         )
     
+    before = account_scoring_state(account)
     update_data = credit_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(account, field, value)
+    account.content_hash = tradeline_content_hash(account)
     
-    db.commit()
-    db.refresh(account)
+    await db.run_sync(_record_account_update, account, before)
+    await db.commit()
+    invalidate_consumer_reports(account.consumer_id)
+    await db.refresh(account)
     
     return APIResponse(
         success=True,
@@ -2,18 +2,21 @@
 Credit Reports API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.credit_report import CreditReport
 from app.models.consumer import Consumer
 from app.models.credit_account import CreditAccount
-from app.models.consent import Consent, ConsentType, ConsentStatus
+from app.models.consent import ConsentType
 from app.models.user import User
 from app.schemas.credit_report import CreditReportCreate, CreditReportResponse
 from app.schemas.common import APIResponse
 from app.api.dependencies import get_current_active_user, require_permission_dependency
 from app.utils.permissions import Permission, can_access_consumer_data
-from app.utils.credit_scoring import calculate_credit_score
+from app.services.credit_aggregates import get_scoring_aggregate, score_aggregate
+from app.services.report_cache import report_cache
+from app.services.consents import check_consent
 from datetime import datetime, timedelta
 
 router = APIRouter()
@@ -23,11 +26,11 @@ router = APIRouter()
 async def generate_credit_report(
     report_data: CreditReportCreate,
     current_user: User = Depends(require_permission_dependency(Permission.GENERATE_CREDIT_REPORT)),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate a credit report for a consumer"""
     # Check if consumer exists
-    consumer = db.query(Consumer).filter(Consumer.id == report_data.consumer_id).first()
+    consumer = await db.get(Consumer, report_data.consumer_id)
     if not consumer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -43,80 +46,96 @@ async def generate_credit_report(
     
     # Verify consent (unless user is admin or consumer viewing own report)
     if current_user.role.value != "ADMIN" and current_user.role.value != "CONSUMER":
-        consent = db.query(Consent).filter(
-            Consent.consumer_id == report_data.consumer_id,
-            Consent.consent_type == ConsentType.CREDIT_REPORT,
-            Consent.status == ConsentStatus.GRANTED,
-            Consent.bank_id == current_user.bank_id
-        ).first()
-        
-        if not consent:
+        if not await check_consent(db, report_data.consumer_id, current_user.bank_id, ConsentType.CREDIT_REPORT):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Consumer consent required to generate credit report"
             )
     
-    # Get all credit accounts for consumer
-    credit_accounts = db.query(CreditAccount).filter(
-        CreditAccount.consumer_id == report_data.consumer_id
-    ).all()
-    
-    # Calculate credit score
-    score_result = calculate_credit_score(consumer, credit_accounts)
-    
-    # Prepare report data
-    report_json = {
-        "consumer": {
-            "id": consumer.id,
-            "name": f"{consumer.first_name} {consumer.last_name}",
-            "date_of_birth": consumer.date_of_birth.isoformat()
-        },
-        "credit_score": score_result["score"],
-        "score_factors": score_result.get("factors", {}),
-        "accounts": [
-            {
-                "id": acc.id,
-                "type": acc.account_type.value,
-                "status": acc.account_status.value,
-                "payment_status": acc.payment_status.value,
-                "balance": float(acc.current_balance),
-                "credit_limit": float(acc.credit_limit) if acc.credit_limit else None,
-                "open_date": acc.open_date.isoformat()
-            }
-            for acc in credit_accounts
-        ],
-        "generated_at": datetime.utcnow().isoformat()
-    }
+    # Reuse the last computed report contents while the consumer's data version is unchanged;
+    # every request still gets its own CreditReport row, attributed to its caller
+    data_version = report_cache.current_version(consumer.id)
+    contents = report_cache.get(consumer.id, data_version)
+    cache_status = "hit"
+    if contents is None:
+        cache_status = "miss"
+        
+        # Get all credit accounts for consumer
+        credit_accounts = (await db.execute(select(CreditAccount).where(
+            CreditAccount.consumer_id == report_data.consumer_id
+        ))).scalars().all()
+        
+        # Calculate credit score from the maintained aggregate row rather than every account
+        score_result = score_aggregate(await db.run_sync(get_scoring_aggregate, consumer.id))
+        
+        # Prepare report data
+        report_json = {
+            "consumer": {
+                "id": consumer.id,
+                "name": f"{consumer.first_name} {consumer.last_name}",
+                "date_of_birth": consumer.date_of_birth.isoformat()
+            },
+            "credit_score": score_result["score"],
+            "score_factors": score_result.get("factors", {}),
+            "accounts": [
+                {
+                    "id": acc.id,
+                    "type": acc.account_type.value,
+                    "status": acc.account_status.value,
+                    "payment_status": acc.payment_status.value,
+                    "balance": float(acc.current_balance),
+                    "credit_limit": float(acc.credit_limit) if acc.credit_limit else None,
+                    "open_date": acc.open_date.isoformat()
+                }
+                for acc in credit_accounts
+            ],
+        }
+        contents = {
+            "credit_score": score_result["score"],
+            "score_factors": score_result.get("factors", {}),
+            "report_data": report_json,
+        }
     
     # Create credit report
     db_report = CreditReport(
         consumer_id=report_data.consumer_id,
-        credit_score=score_result["score"],
-        score_factors=score_result.get("factors", {}),
-        report_data=report_json,
+        credit_score=contents["credit_score"],
+        score_factors=contents["score_factors"],
+        report_data={**contents["report_data"], "generated_at": datetime.utcnow().isoformat()},
         generated_by=current_user.id,
         expires_at=datetime.utcnow() + timedelta(days=30)  # Reports expire in 30 days
     )
     
     db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
+    await db.commit()
+    await db.refresh(db_report)
+    
+    if cache_status == "miss":
+        report_cache.set(consumer.id, data_version, contents, db_report.expires_at)
     
     return APIResponse(
         success=True,
         data=CreditReportResponse.model_validate(db_report),
-        meta={"message": "Credit report generated successfully"}
+        meta={"message": "Credit report generated successfully", "cache": cache_status}
     )
 
 
+@router.get("/cache/stats", response_model=APIResponse[dict])
+async def get_report_cache_stats(
+    current_user: User = Depends(require_permission_dependency(Permission.VIEW_AUDIT_LOGS))
+):
+    """Get credit report cache hit/miss counters for this worker"""
+    return APIResponse(success=True, data=report_cache.stats())
+
+
 @router.get("/{report_id}", response_model=APIResponse[CreditReportResponse])
 async def get_credit_report(
     report_id: int,
     current_user: User = Depends(require_permission_dependency(Permission.VIEW_CREDIT_REPORT)),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get credit report by ID"""
-    report = db.query(CreditReport).filter(CreditReport.id == report_id).first()
+    report = await db.get(CreditReport, report_id)
     if not report:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -2,17 +2,22 @@
 Disputes API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.dispute import Dispute, DisputeStatus, DisputeReason
 from app.models.user import User
 from app.schemas.common import APIResponse, PaginatedResponse
+from app.utils.pagination import Keyset, count_rows, page_meta, paginate
 from app.api.dependencies import get_current_active_user, require_permission_dependency
 from app.utils.permissions import Permission
 from datetime import datetime
 
 router = APIRouter()
 
+# Newest first; ids follow insertion order like created_at, and are unique
+DISPUTE_KEYSET = Keyset(Dispute.id, descending=True)
+
 
 @router.post("/", response_model=APIResponse[dict], status_code=status.HTTP_201_CREATED)
 async def create_dispute(
@@ -48,6 +53,7 @@ async def create_dispute(
 async def get_disputes(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status_filter: DisputeStatus = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -63,8 +69,9 @@ async def get_disputes(
     if current_user.role.value == "CONSUMER":
         query = query.filter(Dispute.consumer_id == current_user.id)
     
-    disputes = query.order_by(Dispute.created_at.desc()).offset(skip).limit(limit).all()
-    total = query.count()
+    disputes = paginate(query, DISPUTE_KEYSET, limit, skip, cursor).all()
+    count = None if cursor else count_rows(db, query)
+    disputes, meta = page_meta(disputes, DISPUTE_KEYSET, limit, skip, cursor, count)
     
     dispute_data = [
         {
@@ -80,12 +87,7 @@ async def get_disputes(
     return PaginatedResponse(
         success=True,
         data=dispute_data,
-        meta={
-            "page": skip // limit + 1,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }
+        meta=meta
     )
 
 
@@ -3,17 +3,24 @@ Credit Inquiries API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi import Request
-from sqlalchemy.orm import Session
-from app.database import get_db
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.credit_inquiry import CreditInquiry, InquiryPurpose, InquiryStatus
-from app.models.consent import Consent, ConsentType, ConsentStatus
+from app.models.consent import ConsentType
 from app.models.user import User
 from app.schemas.common import APIResponse, PaginatedResponse
+from app.utils.pagination import Keyset, count_rows, page_meta, paginate
 from app.api.dependencies import get_current_active_user
+from app.services.consents import check_consent
 from datetime import datetime
 
 router = APIRouter()
 
+# Newest first; ids follow insertion order like created_at, and are unique
+INQUIRY_KEYSET = Keyset(CreditInquiry.id, descending=True)
+
 
 @router.post("/", response_model=APIResponse[dict], status_code=status.HTTP_201_CREATED)
 async def create_inquiry(
@@ -22,18 +29,11 @@ async def create_inquiry(
     purpose_description: str = None,
     request: Request = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a credit inquiry"""
     # Verify consent
-    consent = db.query(Consent).filter(
-        Consent.consumer_id == consumer_id,
-        Consent.consent_type == ConsentType.CREDIT_REPORT,
-        Consent.status == ConsentStatus.GRANTED,
-        Consent.bank_id == current_user.bank_id
-    ).first()
-    
-    if not consent:
+    if not await check_consent(db, consumer_id, current_user.bank_id, ConsentType.CREDIT_REPORT):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Consumer consent required for credit inquiry"
@@ -58,8 +58,8 @@ async def create_inquiry(
     )
     
     db.add(db_inquiry)
-    db.commit()
-    db.refresh(db_inquiry)
+    await db.commit()
+    await db.refresh(db_inquiry)
     
     return APIResponse(
         success=True,
@@ -72,23 +72,25 @@ async def create_inquiry(
 async def get_inquiries(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     consumer_id: int = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get credit inquiries"""
-    query = db.query(CreditInquiry)
+    query = select(CreditInquiry)
     
     # Filter by consumer if provided
     if consumer_id:
-        query = query.filter(CreditInquiry.consumer_id == consumer_id)
+        query = query.where(CreditInquiry.consumer_id == consumer_id)
     
     # Filter by bank if user is not admin
     if current_user.role.value != "ADMIN" and current_user.bank_id:
-        query = query.filter(CreditInquiry.bank_id == current_user.bank_id)
+        query = query.where(CreditInquiry.bank_id == current_user.bank_id)
     
-    inquiries = query.order_by(CreditInquiry.created_at.desc()).offset(skip).limit(limit).all()
-    total = query.count()
+    inquiries = (await db.execute(paginate(query, INQUIRY_KEYSET, limit, skip, cursor))).scalars().all()
+    count = None if cursor else await db.run_sync(count_rows, query)
+    inquiries, meta = page_meta(inquiries, INQUIRY_KEYSET, limit, skip, cursor, count)
     
     inquiry_data = [
         {
@@ -105,11 +107,6 @@ async def get_inquiries(
     return PaginatedResponse(
         success=True,
         data=inquiry_data,
-        meta={
-            "page": skip // limit + 1,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }
+        meta=meta
     )
 
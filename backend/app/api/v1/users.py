@@ -3,38 +3,40 @@ Users API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
 from app.schemas.common import APIResponse, PaginatedResponse
+from app.utils.pagination import Keyset, count_rows, page_meta, paginate
 from app.api.dependencies import get_current_active_user, require_permission_dependency
 from app.utils.permissions import Permission
-from app.utils.security import get_password_hash
+from app.utils.auth_cache import invalidate_user, revoke_user_tokens
+from app.utils.password_hashing import hash_password_async
 
 router = APIRouter()
 
+USER_KEYSET = Keyset(User.id)
+
 
 @router.get("/", response_model=PaginatedResponse[UserResponse])
 async def get_users(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(require_permission_dependency(Permission.VIEW_USER)),
     db: Session = Depends(get_db)
 ):
     """Get list of users (admin only)"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    total = db.query(User).count()
+    query = db.query(User)
+    users = paginate(query, USER_KEYSET, limit, skip, cursor).all()
+    count = None if cursor else count_rows(db, query)
+    users, meta = page_meta(users, USER_KEYSET, limit, skip, cursor, count)
     
     return PaginatedResponse(
         success=True,
         data=[UserResponse.model_validate(user) for user in users],
-        meta={
-            "page": skip // limit + 1,
-            "limit": limit,
-            "total": total,
-            "pages": (total + limit - 1) // limit
-        }
+        meta=meta
     )
 
 
@@ -68,7 +70,7 @@ async def create_user(
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     db_user = User(
         email=user_data.email,
         password_hash=hashed_password,
@@ -106,11 +108,18 @@ async def update_user(
         )
     
     update_data = user_data.dict(exclude_unset=True)
+    claims_changed = any(
+        field in update_data and update_data[field] != getattr(user, field)
+        for field in ("email", "role", "bank_id", "is_active")
+    )
     for field, value in update_data.items():
         setattr(user, field, value)
+    if claims_changed:
+        revoke_user_tokens(user)
     
     db.commit()
     db.refresh(user)
+    invalidate_user(user.id)
     
     return APIResponse(
         success=True,
@@ -133,8 +142,10 @@ async def delete_user(
             detail="User not found"
         )
     
+    revoke_user_tokens(user)
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     
     return APIResponse(
         success=True,
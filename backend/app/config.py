@@ -1,6 +1,7 @@
 """
 Application configuration management
 """
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from typing import List
 import os
@@ -21,16 +22,37 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = "creditcheck"
     POSTGRES_PASSWORD: str = "changeme"
     POSTGRES_DB: str = "creditcheck"
+    DATABASE_PGBOUNCER: bool = False  # DATABASE_URL goes through PgBouncer in transaction mode (Supabase pooler, port 6543)
     
     # Redis (Optional - for caching and rate limiting)
     REDIS_URL: str = ""  # Leave empty to disable Redis
     USE_REDIS: bool = False  # Set to True to enable Redis
     
+    # Credit report cache
+    REPORT_CACHE_SIZE: int = 10000  # Reports kept in each worker's in-process cache
+    REPORT_CACHE_TTL_SECONDS: int = 3600
+    REPORT_CACHE_SINGLE_PROCESS: bool = False  # Cache without Redis; only safe when one process serves and ingests
+    CONSENT_CACHE_SIZE: int = 10000  # Consent checks kept in each worker's in-process cache
+    CONSENT_CACHE_TTL_SECONDS: int = 60  # 0 disables the cache
+    CONSENT_CACHE_SINGLE_PROCESS: bool = False  # Cache without Redis; only safe when one process serves and sweeps
+    CONSENT_SWEEP_BATCH_SIZE: int = 1000
+    
+    # List totals
+    COUNT_EXACT_THRESHOLD: int = 100000  # Planner estimates at or above this are reported instead of COUNT(*)
+    COUNT_CACHE_SIZE: int = 1000  # Exact totals cached per worker, keyed by filter
+    COUNT_CACHE_TTL_SECONDS: int = 30  # 0 disables the cache
+    
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    AUTH_CACHE_SIZE: int = 10000  # Verified tokens and user principals kept per worker
+    AUTH_CACHE_TTL_SECONDS: int = 60  # Longest a worker serves a cached principal; 0 disables the cache
+    PASSWORD_HASH_WORKERS: int = 2  # Concurrent bcrypt calls per worker process
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Waiting bcrypt calls before requests get 503
+    AUTH_LIGHTWEIGHT_PRINCIPAL: bool = False  # Authorize from token claims without loading the user
+    PERMISSION_CACHE_TTL_SECONDS: int = 60  # How soon other workers see a bank's role permission changes
     
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -48,23 +70,53 @@ class Settings(BaseSettings):
     
     # Encryption
     ENCRYPTION_KEY: str
+    ENCRYPTION_KEY_VERSION: int = 1  # Version tag written into new ciphertext ("v1$...")
+    ENCRYPTION_KEY_PREVIOUS: str = ""  # Comma-separated "version:key" retired keys, still accepted for decryption
+    ENCRYPTION_WORKERS: int = 4  # Threads used by encrypt_many/decrypt_many for large batches
+    BLIND_INDEX_KEY: str  # HMAC key for SSN/account number lookups; kept apart so ENCRYPTION_KEY can rotate
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_PER_HOUR: int = 1000
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Bound on per-process limiter state when Redis is not used
+    BANK_RATE_LIMIT_PER_MINUTE: int = 600  # Shared by a bank's users unless the bank row overrides it
+    BANK_RATE_LIMIT_PER_HOUR: int = 20000
+    RATE_LIMIT_ROUTE_COSTS: str = (  # Comma-separated "METHOD /path=cost"; other routes cost 1
+        "POST /api/v1/credit-reports=10,POST /api/v1/credit-data/bulk=20,POST /api/v1/credit-data/jobs=20"
+    )
+    RATE_LIMIT_POLICY_CACHE_TTL_SECONDS: int = 60
     
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
     
+    # Audit log writer
+    AUDIT_SPOOL_DIR: str = "audit_spool"  # Local write-ahead log of audit events
+    AUDIT_SEGMENT_BYTES: int = 16777216  # Spool segments roll over at 16MB
+    AUDIT_BATCH_SIZE: int = 500  # Rows per bulk load into audit_logs
+    AUDIT_FLUSH_INTERVAL_MS: int = 200  # How often the spool is fsynced and loaded
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 3  # Monthly audit_logs partitions created in advance
+    AUDIT_RETENTION_MONTHS: int = 84  # Older partitions are archived and dropped
+    AUDIT_ARCHIVE_DIR: str = "audit_archive"  # Gzipped CSV per archived partition
+    AUDIT_QUERY_DEFAULT_DAYS: int = 30  # GET /audit window when no start_date is given; 0 searches everything
+    
     # File Storage
     UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
+    INGESTION_JOB_STALE_SECONDS: int = 600  # Requeue running ingestion jobs with no heartbeat for this long
+    INGESTION_JOB_HEARTBEAT_SECONDS: int = 60  # How often a worker refreshes its job's heartbeat; keep well under STALE
     
     # Sentry (Error Tracking - Optional)
     SENTRY_DSN: str = ""  # Get from https://sentry.io
     ENABLE_SENTRY: bool = False  # Set to True to enable Sentry
     
+    @field_validator("BLIND_INDEX_KEY")
+    @classmethod
+    def _require_blind_index_key(cls, value: str) -> str:
+        if not value:
+            raise ValueError("BLIND_INDEX_KEY must be set; stored SSN and account number indexes depend on it")
+        return value
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,7 +1,11 @@
 """
 Database connection and session management
 """
+from typing import AsyncIterator, Optional
+from uuid import uuid4
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -33,3 +37,69 @@ def get_db():
     finally:
         db.close()
 
+
+# Async engine for the request path; created on first use so CLI jobs and
+# workers that only use SessionLocal never need the async driver
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(database_url: str) -> URL:
+    """DATABASE_URL rewritten for its async driver (asyncpg or aiosqlite)"""
+    url = make_url(database_url)
+    url = url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+    # asyncpg takes ssl=, not libpq's sslmode=
+    if url.drivername == "postgresql+asyncpg" and "sslmode" in url.query:
+        sslmode = url.query["sslmode"]
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return url
+
+
+def get_async_engine() -> AsyncEngine:
+    """Shared async engine, sized like the sync engine"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        url = async_database_url(settings.DATABASE_URL)
+        pool_args = {} if url.get_backend_name() == "sqlite" else {"pool_size": 10, "max_overflow": 20}
+        if settings.DATABASE_PGBOUNCER and url.drivername == "postgresql+asyncpg":
+            # Transaction-mode PgBouncer cannot keep prepared statements between transactions
+            pool_args["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        _async_engine = create_async_engine(url, pool_pre_ping=True, echo=settings.DEBUG, **pool_args)
+        _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency for getting an async database session.
+    Queries are awaited, so a worker keeps serving other requests while they run.
+    Sync service functions run inside it with `await db.run_sync(func, *args)`.
+    Attributes are not expired on commit; lazy loads would need I/O outside an await.
+    """
+    get_async_engine()
+    async with _async_session_factory() as db:
+        yield db
+
+
+def dialect_insert(db, table):
+    """
+    Build an INSERT for the session's dialect so ON CONFLICT clauses
+    (on_conflict_do_update / on_conflict_do_nothing) are available
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
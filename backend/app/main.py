@@ -9,6 +9,7 @@ from app.middleware.audit_middleware import AuditMiddleware
 from app.middleware.rate_limit import RateLimitMiddleware
 from app.api.v1 import auth, users, banks, credit_reports, credit_data, inquiries, disputes, consumers, audit
 from app.database import engine, Base
+from app.services.audit_writer import audit_writer
 
 # Initialize Sentry if enabled
 if settings.ENABLE_SENTRY and settings.SENTRY_DSN:
@@ -72,6 +73,12 @@ app.include_router(consumers.router, prefix=f"{settings.API_V1_PREFIX}/consumers
 app.include_router(audit.router, prefix=f"{settings.API_V1_PREFIX}/audit", tags=["Audit"])
 
 
+@app.on_event("shutdown")
+def flush_audit_log():
+    """Write queued audit events before the worker exits"""
+    audit_writer.stop()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -1,103 +1,118 @@
 """
 Audit logging middleware
 """
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models.audit_log import AuditLog, AuditAction
-from app.utils.security import verify_token
+from datetime import datetime, timezone
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.models.audit_log import AuditAction
+from app.services.audit_writer import audit_writer
+from app.utils.auth_cache import get_request_token_payload
 from app.utils.security import mask_sensitive_data
 import json
 import time
 
+SKIP_PATHS = {"/health", "/docs", "/redoc", "/openapi.json"}
+BODY_METHODS = {"POST", "PUT", "PATCH"}
+SENSITIVE_FIELDS = {"password", "ssn", "account_number", "api_key", "secret"}
+# Only this much of a request body is kept for the log; uploads stream through untouched
+MAX_BODY_BYTES = 8192
 
-class AuditMiddleware(BaseHTTPMiddleware):
-    """Middleware to automatically log API requests to audit log"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Skip audit logging for health checks and docs
-        if request.url.path in ["/health", "/docs", "/redoc", "/openapi.json"]:
-            return await call_next(request)
-        
-        # Get user from token if available
+ACTION_MAP = {
+    "GET": AuditAction.READ,
+    "POST": AuditAction.CREATE,
+    "PUT": AuditAction.UPDATE,
+    "PATCH": AuditAction.UPDATE,
+    "DELETE": AuditAction.DELETE,
+}
+
+
+class AuditMiddleware:
+    """
+    ASGI middleware that records every API request in the audit log.
+    Events are handed to the batched audit writer, so the request path only
+    pays for a queue append.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        body = bytearray()
+        truncated = False
+        status_code = 500
+
+        async def receive_wrapper() -> Message:
+            nonlocal truncated
+            message = await receive()
+            if message["type"] == "http.request" and method in BODY_METHODS and not truncated:
+                chunk = message.get("body", b"")
+                room = MAX_BODY_BYTES - len(body)
+                body.extend(chunk[:room])
+                truncated = len(chunk) > room
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            self._record(scope, bytes(body), truncated, status_code, time.perf_counter() - start_time)
+
+    def _record(self, scope: Scope, body: bytes, truncated: bool, status_code: int, process_time: float) -> None:
+        request = Request(scope)
+        # Shares the claims the auth dependency already decoded for this request
+        payload = get_request_token_payload(request)
         user_id = None
-        token = request.headers.get("authorization", "").replace("Bearer ", "")
-        if token:
-            payload = verify_token(token, "access")
-            if payload:
-                user_id = payload.get("sub")
-        
-        # Read request body if available
-        request_body = None
-        if request.method in ["POST", "PUT", "PATCH"]:
+        if payload and str(payload.get("sub", "")).isdigit():
+            user_id = int(payload["sub"])
+
+        # Clipped to the column sizes so one odd request cannot fail a whole batch
+        path = scope["path"]
+        audit_writer.enqueue({
+            "user_id": user_id,
+            "action": ACTION_MAP.get(scope["method"], AuditAction.READ),
+            "resource_type": (path.split("/")[-1] if path else "unknown")[:100],
+            "ip_address": request.client.host[:45] if request.client else None,
+            "user_agent": request.headers.get("user-agent"),
+            "request_method": scope["method"][:10],
+            "request_path": path[:512],
+            "request_body": self._parse_body(body, truncated),
+            "response_status": status_code,
+            "additional_metadata": {
+                "process_time": process_time,
+                "query_params": dict(request.query_params) if request.query_params else None,
+            },
+            "created_at": datetime.now(timezone.utc),
+        })
+
+    def _parse_body(self, body: bytes, truncated: bool):
+        if not body:
+            return None
+        text = body.decode(errors="replace")
+        if not truncated:
             try:
-                body = await request.body()
-                if body:
-                    # Try to parse as JSON
-                    try:
-                        request_body = json.loads(body.decode())
-                        # Mask sensitive fields
-                        request_body = self._mask_sensitive_data(request_body)
-                    except:
-                        request_body = {"raw": mask_sensitive_data(body.decode()[:500])}
-            except:
+                return self._mask_sensitive_data(json.loads(text))
+            except ValueError:
                 pass
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate response time
-        process_time = time.time() - start_time
-        
-        # Determine audit action based on HTTP method
-        action_map = {
-            "GET": AuditAction.READ,
-            "POST": AuditAction.CREATE,
-            "PUT": AuditAction.UPDATE,
-            "PATCH": AuditAction.UPDATE,
-            "DELETE": AuditAction.DELETE,
-        }
-        action = action_map.get(request.method, AuditAction.READ)
-        
-        # Log to database (async in background would be better, but this works)
-        try:
-            db: Session = SessionLocal()
-            audit_log = AuditLog(
-                user_id=user_id,
-                action=action,
-                resource_type=request.url.path.split("/")[-1] if request.url.path else "unknown",
-                ip_address=request.client.host if request.client else None,
-                user_agent=request.headers.get("user-agent"),
-                request_method=request.method,
-                request_path=str(request.url.path),
-                request_body=request_body,
-                response_status=response.status_code,
-                metadata={
-                    "process_time": process_time,
-                    "query_params": dict(request.query_params) if request.query_params else None
-                }
-            )
-            db.add(audit_log)
-            db.commit()
-            db.close()
-        except Exception as e:
-            # Don't fail the request if audit logging fails
-            print(f"Audit logging error: {e}")
-        
-        return response
-    
-    def _mask_sensitive_data(self, data: dict) -> dict:
+        return {"raw": mask_sensitive_data(text[:500])}
+
+    def _mask_sensitive_data(self, data):
         """Recursively mask sensitive data in request body"""
-        sensitive_fields = ["password", "ssn", "account_number", "api_key", "secret"]
         if isinstance(data, dict):
             return {
-                k: mask_sensitive_data(str(v)) if k.lower() in sensitive_fields else self._mask_sensitive_data(v)
+                k: mask_sensitive_data(str(v)) if k.lower() in SENSITIVE_FIELDS else self._mask_sensitive_data(v)
                 for k, v in data.items()
             }
         elif isinstance(data, list):
             return [self._mask_sensitive_data(item) for item in data]
         return data
-
@@ -10,6 +10,13 @@ from app.models.credit_inquiry import CreditInquiry
 from app.models.dispute import Dispute
 from app.models.audit_log import AuditLog
 from app.models.consent import Consent
+from app.models.credit_score_snapshot import CreditScoreSnapshot
+from app.models.consumer_score import ConsumerScore, DirtyConsumer
+from app.models.consumer_credit_aggregate import ConsumerCreditAggregate
+from app.models.ingestion_job import IngestionJob
+from app.models.reencryption_checkpoint import ReencryptionCheckpoint
+from app.models.audit_spool_checkpoint import AuditSpoolCheckpoint
+from app.models.bank_role_permission import BankRolePermission
 
 __all__ = [
     "User",
@@ -21,5 +28,13 @@ __all__ = [
     "Dispute",
     "AuditLog",
     "Consent",
+    "CreditScoreSnapshot",
+    "ConsumerScore",
+    "DirtyConsumer",
+    "ConsumerCreditAggregate",
+    "IngestionJob",
+    "ReencryptionCheckpoint",
+    "AuditSpoolCheckpoint",
+    "BankRolePermission",
 ]
 
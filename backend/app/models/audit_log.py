@@ -1,7 +1,7 @@
 """
 Audit Log model
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -26,8 +26,13 @@ class AuditAction(str, enum.Enum):
 class AuditLog(Base):
     """Audit log model for tracking all system actions"""
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),  # Keyset pagination order
+    )
+    # On PostgreSQL the table is range-partitioned by month of created_at (see
+    # app.services.audit_partitions), with primary key (id, created_at)
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     action = Column(Enum(AuditAction), nullable=False, index=True)
     resource_type = Column(String(100), nullable=False, index=True)  # e.g., "credit_report", "user"
@@ -40,7 +45,7 @@ class AuditLog(Base):
     response_status = Column(Integer, nullable=True)
     error_message = Column(Text, nullable=True)
     additional_metadata = Column(JSON, nullable=True)  # Additional context
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relationships
     user = relationship("User", back_populates="audit_logs")
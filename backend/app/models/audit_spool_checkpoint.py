@@ -0,0 +1,21 @@
+"""
+Audit Spool Checkpoint model
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class AuditSpoolCheckpoint(Base):
+    """How far one audit spool series has been loaded into audit_logs"""
+    __tablename__ = "audit_spool_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    series = Column(String(32), unique=True, nullable=False)  # Spool series written by one worker process
+    segment = Column(Integer, default=0, nullable=False)  # Segments before this one are fully loaded
+    segment_offset = Column(BigInteger, default=0, nullable=False)  # Bytes of that segment already loaded
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<AuditSpoolCheckpoint(series={self.series}, segment={self.segment}, offset={self.segment_offset})>"
@@ -24,6 +24,8 @@ class Bank(Base):
     is_approved = Column(Boolean, default=False, nullable=False)
     approved_at = Column(DateTime(timezone=True), nullable=True)
     approved_by = Column(Integer, nullable=True)  # User ID who approved
+    rate_limit_per_minute = Column(Integer, nullable=True)  # NULL uses BANK_RATE_LIMIT_PER_MINUTE
+    rate_limit_per_hour = Column(Integer, nullable=True)  # NULL uses BANK_RATE_LIMIT_PER_HOUR
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
@@ -0,0 +1,24 @@
+"""
+Bank Role Permission model
+"""
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.user import UserRole
+
+
+class BankRolePermission(Base):
+    """A bank's override of one permission for one role: granted on top of the role's defaults, or revoked"""
+    __tablename__ = "bank_role_permissions"
+    __table_args__ = (UniqueConstraint("bank_id", "role", "permission", name="uq_bank_role_permissions"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bank_id = Column(Integer, ForeignKey("banks.id", ondelete="CASCADE"), nullable=False, index=True)
+    role = Column(Enum(UserRole), nullable=False)
+    permission = Column(String(100), nullable=False)  # A Permission constant, e.g. "generate:credit_report"
+    granted = Column(Boolean, nullable=False)  # False revokes a permission the role has by default
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<BankRolePermission(bank_id={self.bank_id}, role={self.role}, permission={self.permission}, granted={self.granted})>"
@@ -1,7 +1,7 @@
 """
 Consent model
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -25,6 +25,18 @@ class ConsentStatus(str, enum.Enum):
 class Consent(Base):
     """Consent model for tracking consumer consent"""
     __tablename__ = "consents"
+    __table_args__ = (
+        # Serve check_consent and the expiry sweeper from grants alone (migration 015)
+        Index(
+            "ix_consents_active", "consumer_id", "bank_id", "consent_type", "expires_at",
+            postgresql_where=text("status = 'GRANTED'"), sqlite_where=text("status = 'GRANTED'"),
+        ),
+        Index(
+            "ix_consents_granted_expires_at", "expires_at",
+            postgresql_where=text("status = 'GRANTED' AND expires_at IS NOT NULL"),
+            sqlite_where=text("status = 'GRANTED' AND expires_at IS NOT NULL"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     consumer_id = Column(Integer, ForeignKey("consumers.id"), nullable=False, index=True)
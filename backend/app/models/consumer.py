@@ -13,6 +13,7 @@ class Consumer(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     ssn_encrypted = Column(String(512), unique=True, nullable=False, index=True)  # Encrypted SSN
+    ssn_index = Column(String(64), unique=True, nullable=True, index=True)  # Blind index for SSN lookups
     first_name = Column(String(100), nullable=False, index=True)
     last_name = Column(String(100), nullable=False, index=True)
     middle_name = Column(String(100), nullable=True)
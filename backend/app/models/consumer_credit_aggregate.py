@@ -0,0 +1,34 @@
+"""
+Consumer Credit Aggregate model
+"""
+from sqlalchemy import Column, Integer, DateTime, Date, Numeric, ForeignKey, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ConsumerCreditAggregate(Base):
+    """
+    Per-consumer scoring inputs maintained by the credit-data write paths.
+    Counters cover accounts that count towards the score (closed accounts
+    drop out 7 years after closing, see valid_until).
+    """
+    __tablename__ = "consumer_credit_aggregates"
+    
+    consumer_id = Column(Integer, ForeignKey("consumers.id"), primary_key=True)
+    total_accounts = Column(Integer, default=0, nullable=False)  # All accounts, scored or not
+    payment_current = Column(Integer, default=0, nullable=False)
+    payment_late_30 = Column(Integer, default=0, nullable=False)
+    payment_late_60 = Column(Integer, default=0, nullable=False)
+    payment_late_90 = Column(Integer, default=0, nullable=False)
+    payment_late_120_plus = Column(Integer, default=0, nullable=False)
+    payment_no_payment = Column(Integer, default=0, nullable=False)
+    total_balance = Column(Numeric(18, 2), default=0, nullable=False)
+    total_limit = Column(Numeric(18, 2), default=0, nullable=False)
+    oldest_open_date = Column(Date, nullable=True)
+    account_type_counts = Column(JSON, nullable=False, default=dict)  # {"CREDIT_CARD": 2, ...}
+    recent_open_dates = Column(JSON, nullable=False, default=list)  # Up to 4 latest open dates (ISO)
+    valid_until = Column(Date, nullable=True)  # First day a closed account ages out; rebuild from then on
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ConsumerCreditAggregate(consumer_id={self.consumer_id}, total_accounts={self.total_accounts})>"
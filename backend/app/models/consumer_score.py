@@ -0,0 +1,32 @@
+"""
+Consumer Score models
+"""
+from sqlalchemy import Column, Integer, DateTime, Date, ForeignKey, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ConsumerScore(Base):
+    """Materialized current credit score, one row per consumer"""
+    __tablename__ = "consumer_scores"
+    
+    consumer_id = Column(Integer, ForeignKey("consumers.id"), primary_key=True)
+    credit_score = Column(Integer, nullable=False)  # 300-850 range, 0 if no history
+    score_factors = Column(JSON, nullable=True)
+    as_of_date = Column(Date, nullable=False)
+    scored_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ConsumerScore(consumer_id={self.consumer_id}, score={self.credit_score})>"
+
+
+class DirtyConsumer(Base):
+    """Consumer whose credit accounts changed since their score was last computed"""
+    __tablename__ = "scoring_dirty_consumers"
+    
+    consumer_id = Column(Integer, ForeignKey("consumers.id"), primary_key=True)
+    version = Column(Integer, default=1, nullable=False)  # Bumped on every change
+    marked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<DirtyConsumer(consumer_id={self.consumer_id}, version={self.version})>"
@@ -1,7 +1,7 @@
 """
 Credit Account model
 """
-from sqlalchemy import Column, Integer, String, DateTime, Date, Numeric, ForeignKey, Enum, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Date, Numeric, ForeignKey, Enum, Text, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -42,11 +42,17 @@ class PaymentStatus(str, enum.Enum):
 class CreditAccount(Base):
     """Credit account model for tracking individual credit accounts"""
     __tablename__ = "credit_accounts"
+    __table_args__ = (
+        UniqueConstraint("bank_id", "account_fingerprint", name="uq_credit_accounts_bank_fingerprint"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     consumer_id = Column(Integer, ForeignKey("consumers.id"), nullable=False, index=True)
     bank_id = Column(Integer, ForeignKey("banks.id"), nullable=False, index=True)
     account_number_encrypted = Column(String(512), nullable=False)  # Encrypted account number
+    account_number_index = Column(String(64), nullable=True, index=True)  # Blind index for account number lookups
+    account_fingerprint = Column(String(64), nullable=True)  # HMAC of bank_id + account number
+    content_hash = Column(String(64), nullable=True)  # Hash of reported fields, to skip unchanged feed rows
     account_type = Column(Enum(AccountType), nullable=False, index=True)
     account_status = Column(Enum(AccountStatus), nullable=False, index=True)
     payment_status = Column(Enum(PaymentStatus), nullable=False, index=True)
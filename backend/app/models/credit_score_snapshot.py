@@ -0,0 +1,22 @@
+"""
+Credit Score Snapshot model
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class CreditScoreSnapshot(Base):
+    """Credit score computed for a consumer by a batch rescoring run"""
+    __tablename__ = "credit_score_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String(36), nullable=False, index=True)  # Rescoring run identifier
+    consumer_id = Column(Integer, ForeignKey("consumers.id"), nullable=False, index=True)
+    credit_score = Column(Integer, nullable=False)  # 300-850 range, 0 if no history
+    score_factors = Column(JSON, nullable=True)
+    as_of_date = Column(Date, nullable=False)  # Day the score was computed for
+    scored_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<CreditScoreSnapshot(id={self.id}, consumer_id={self.consumer_id}, score={self.credit_score})>"
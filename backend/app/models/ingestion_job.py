@@ -0,0 +1,49 @@
+"""
+Ingestion Job model
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, Enum, JSON
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class IngestionJobStatus(str, enum.Enum):
+    """Ingestion job status enumeration"""
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class IngestionJob(Base):
+    """Bulk credit data upload queued for a background ingestion worker"""
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bank_id = Column(Integer, ForeignKey("banks.id"), nullable=False, index=True)
+    submitted_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    status = Column(Enum(IngestionJobStatus), default=IngestionJobStatus.QUEUED, nullable=False, index=True)
+    file_format = Column(String(10), nullable=False)  # ndjson or csv
+    mode = Column(String(10), default="insert", nullable=False)  # insert or delta
+    file_path = Column(String(500), nullable=False)  # Spooled upload in UPLOAD_DIR
+    file_size = Column(BigInteger, nullable=False)
+    
+    # Progress, committed together with each ingested chunk
+    bytes_processed = Column(BigInteger, default=0, nullable=False)
+    last_row = Column(Integer, default=0, nullable=False)  # Resume point after a worker crash
+    rows_processed = Column(Integer, default=0, nullable=False)
+    rows_inserted = Column(Integer, default=0, nullable=False)
+    rows_updated = Column(Integer, default=0, nullable=False)
+    rows_unchanged = Column(Integer, default=0, nullable=False)
+    rows_rejected = Column(Integer, default=0, nullable=False)
+    errors = Column(JSON, nullable=True)  # First MAX_REPORTED_ERRORS row errors
+    error_message = Column(Text, nullable=True)  # Set when the job fails as a whole
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Last heartbeat from the worker holding the job
+    claim_token = Column(String(32), nullable=True)  # Set per claim; a worker that lost the job can no longer write
+    
+    def __repr__(self):
+        return f"<IngestionJob(id={self.id}, bank_id={self.bank_id}, status={self.status})>"
@@ -0,0 +1,29 @@
+"""
+Re-encryption Checkpoint model
+"""
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ReencryptionCheckpoint(Base):
+    """Progress of re-encrypting one encrypted column under one key version"""
+    __tablename__ = "reencryption_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("target", "key_version", name="uq_reencryption_checkpoints_target_version"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    target = Column(String(100), nullable=False)  # table.column, e.g. consumers.ssn_encrypted
+    key_version = Column(Integer, nullable=False)  # Key version the column is being moved to
+    last_id = Column(Integer, default=0, nullable=False)  # Keyset position; rows up to it are done
+    rows_scanned = Column(Integer, default=0, nullable=False)
+    rows_reencrypted = Column(Integer, default=0, nullable=False)
+    rows_failed = Column(Integer, default=0, nullable=False)  # Not decryptable with any configured key
+    
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<ReencryptionCheckpoint(target={self.target}, key_version={self.key_version}, last_id={self.last_id})>"
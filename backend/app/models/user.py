@@ -29,6 +29,7 @@ class User(Base):
     role = Column(Enum(UserRole), nullable=False, index=True)
     bank_id = Column(Integer, ForeignKey("banks.id"), nullable=True, index=True)
     is_active = Column(Boolean, default=True, nullable=False)
+    token_version = Column(Integer, default=1, nullable=False)  # Bumped to revoke issued access tokens
     is_verified = Column(Boolean, default=False, nullable=False)
     two_factor_enabled = Column(Boolean, default=False, nullable=False)
     two_factor_secret = Column(String(255), nullable=True)
@@ -1,9 +1,10 @@
 """
 Bank schemas
 """
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
 from datetime import datetime
+from app.models.user import UserRole
 
 
 class BankBase(BaseModel):
@@ -28,6 +29,8 @@ class BankUpdate(BaseModel):
     contact_phone: Optional[str] = None
     address: Optional[str] = None
     is_active: Optional[bool] = None
+    rate_limit_per_minute: Optional[int] = Field(None, ge=1)  # null restores the default
+    rate_limit_per_hour: Optional[int] = Field(None, ge=1)
 
 
 class BankResponse(BankBase):
@@ -37,6 +40,8 @@ class BankResponse(BankBase):
     is_approved: bool
     approved_at: Optional[datetime] = None
     approved_by: Optional[int] = None
+    rate_limit_per_minute: Optional[int] = None
+    rate_limit_per_hour: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     
@@ -47,3 +52,14 @@ class BankApproval(BaseModel):
     """Schema for bank approval"""
     is_approved: bool
 
+
+class BankRolePermissions(BaseModel):
+    """A role's permission overrides at one bank"""
+    role: UserRole
+    grant: List[str] = []  # Added to the role's default permissions
+    revoke: List[str] = []  # Removed from them
+
+
+class BankRolePermissionsResponse(BankRolePermissions):
+    """Overrides with the permissions they result in"""
+    permissions: List[str]
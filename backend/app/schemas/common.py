@@ -3,6 +3,7 @@ Common schemas for API responses
 """
 from pydantic import BaseModel
 from typing import Optional, Any, Dict, Generic, TypeVar
+from datetime import datetime
 
 T = TypeVar('T')
 
@@ -16,11 +17,16 @@ class APIResponse(BaseModel, Generic[T]):
 
 
 class PaginationMeta(BaseModel):
-    """Pagination metadata"""
-    page: int
+    """Pagination metadata; page, total and pages are omitted when paging by cursor"""
+    page: Optional[int] = None
     limit: int
-    total: int
-    pages: int
+    total: Optional[int] = None
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+    has_more: bool = False
+    count_strategy: Optional[str] = None  # exact, cached or estimate; None when total is omitted
+    start_date: Optional[datetime] = None  # Time window actually searched, for endpoints that bound one
+    end_date: Optional[datetime] = None
 
 
 class PaginatedResponse(BaseModel, Generic[T]):
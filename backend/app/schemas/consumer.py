@@ -26,6 +26,11 @@ class ConsumerCreate(ConsumerBase):
     ssn: str  # Will be encrypted
 
 
+class ConsumerLookup(BaseModel):
+    """Schema for finding a consumer by SSN"""
+    ssn: str
+
+
 class ConsumerUpdate(BaseModel):
     """Schema for updating a consumer"""
     email: Optional[EmailStr] = None
@@ -2,7 +2,7 @@
 Credit Account schemas
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime, date
 from decimal import Decimal
 from app.models.credit_account import AccountType, AccountStatus, PaymentStatus
@@ -30,6 +30,11 @@ class CreditAccountCreate(CreditAccountBase):
     account_number: str  # Will be encrypted
 
 
+class CreditAccountLookup(BaseModel):
+    """Schema for finding credit accounts by account number"""
+    account_number: str
+
+
 class CreditAccountUpdate(BaseModel):
     """Schema for updating a credit account"""
     account_status: Optional[AccountStatus] = None
@@ -55,3 +60,22 @@ class CreditAccountResponse(CreditAccountBase):
     
     model_config = {"from_attributes": True}
 
+
+
+class BulkIngestionRowError(BaseModel):
+    """Validation errors for one rejected row of a bulk upload"""
+    row: int
+    errors: List[str]
+
+
+class BulkIngestionResult(BaseModel):
+    """Outcome of a bulk credit data upload"""
+    rows: int
+    inserted: int
+    updated: int = 0
+    unchanged: int = 0
+    rejected: int
+    errors: List[BulkIngestionRowError]
+    errors_truncated: bool = False
+    elapsed_seconds: float
+    rows_per_second: float
@@ -0,0 +1,32 @@
+"""
+Ingestion Job schemas
+"""
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from app.models.ingestion_job import IngestionJobStatus
+from app.schemas.credit_account import BulkIngestionRowError
+
+
+class IngestionJobResponse(BaseModel):
+    """Schema for ingestion job status"""
+    id: int
+    bank_id: int
+    status: IngestionJobStatus
+    file_format: str
+    mode: str
+    file_size: int
+    bytes_processed: int
+    rows_processed: int
+    rows_inserted: int
+    rows_updated: int
+    rows_unchanged: int
+    rows_rejected: int
+    errors: List[BulkIngestionRowError] = []
+    error_message: Optional[str] = None
+    progress: float  # Fraction of the file consumed, 0-1
+    rows_per_second: float
+    eta_seconds: Optional[float] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,172 @@
+"""
+Audit log partition maintenance
+On PostgreSQL audit_logs is range-partitioned by UTC month of created_at
+(migration 011), one table per month named audit_logs_yYYYYmMM. This job
+creates partitions AUDIT_PARTITION_MONTHS_AHEAD months in advance, and moves
+partitions older than AUDIT_RETENTION_MONTHS out of the database: each one is
+detached, copied to a gzipped CSV file in AUDIT_ARCHIVE_DIR, and dropped once
+the file is safely on disk.
+
+Run it at least monthly. A row whose month has no partition cannot be
+inserted; it stays in the audit spool until the partition exists.
+
+Usage: python -m app.services.audit_partitions [--status] [--months-ahead N]
+           [--retention-months N] [--archive-dir DIR]
+"""
+from typing import Callable, Dict, List, Optional
+from datetime import date, datetime, timezone
+import argparse
+import gzip
+import os
+import re
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+
+PARTITION_PATTERN = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+
+
+def add_months(month: date, count: int) -> date:
+    """First day of the month count months after month (negative counts go back)"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"audit_logs_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month a partition covers, or None if name is not an audit_logs partition"""
+    match = PARTITION_PATTERN.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def _current_month(today: Optional[date]) -> date:
+    return (today or datetime.now(timezone.utc).date()).replace(day=1)
+
+
+def expired_partitions(names: List[str], retention_months: int, today: Optional[date] = None) -> List[str]:
+    """Partitions whose whole month is older than the retention window, oldest first"""
+    cutoff = add_months(_current_month(today), -retention_months)
+    return sorted(name for name in names if partition_month(name) and partition_month(name) < cutoff)
+
+
+def attached_partitions(db: Session) -> List[str]:
+    return sorted(db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'audit_logs'"
+    )).scalars())
+
+
+def detached_partitions(db: Session) -> List[str]:
+    """Partition tables left detached, e.g. by a retention run that stopped before dropping them"""
+    tables = db.execute(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() AND tablename LIKE 'audit\\_logs\\_y%'"
+    )).scalars()
+    attached = set(attached_partitions(db))
+    return sorted(name for name in tables if partition_month(name) and name not in attached)
+
+
+def ensure_partitions(db: Session, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """Create any missing partitions from this month to months_ahead; returns those created"""
+    existing = set(attached_partitions(db))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(_current_month(today), offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        db.execute(text(
+            f"CREATE TABLE {name} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        ))
+        created.append(name)
+    db.commit()
+    return created
+
+
+def archive_partition(db: Session, name: str, archive_dir: str) -> str:
+    """Detach a partition, write it to {archive_dir}/{name}.csv.gz and drop it; returns the file path"""
+    if partition_month(name) is None:
+        raise ValueError(f"{name} is not an audit_logs partition")
+    if name in attached_partitions(db):
+        db.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {name}"))
+        db.commit()
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    with open(f"{path}.tmp", "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            with db.connection().connection.cursor() as cursor:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(f"{path}.tmp", path)
+    directory = os.open(archive_dir, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+    # Only dropped once the archive is durable; a crash before this leaves it detached for the next run
+    db.execute(text(f"DROP TABLE {name}"))
+    db.commit()
+    return path
+
+
+def maintain_partitions(months_ahead: int = settings.AUDIT_PARTITION_MONTHS_AHEAD,
+                        retention_months: int = settings.AUDIT_RETENTION_MONTHS,
+                        archive_dir: str = settings.AUDIT_ARCHIVE_DIR,
+                        session_factory: Callable[[], Session] = SessionLocal,
+                        today: Optional[date] = None) -> Dict[str, List[str]]:
+    """Create upcoming partitions and archive expired ones"""
+    if retention_months < 1:
+        raise ValueError("retention_months must be at least 1")
+    db = session_factory()
+    try:
+        created = ensure_partitions(db, months_ahead, today)
+        candidates = attached_partitions(db) + detached_partitions(db)
+        archived = [
+            archive_partition(db, name, archive_dir)
+            for name in expired_partitions(candidates, retention_months, today)
+        ]
+    finally:
+        db.close()
+    return {"created": created, "archived": archived}
+
+
+def main():
+    """Command line entry point for audit log partition maintenance"""
+    parser = argparse.ArgumentParser(description="Create and archive monthly audit_logs partitions")
+    parser.add_argument("--status", action="store_true", help="List partitions without changing anything")
+    parser.add_argument("--months-ahead", type=int, default=settings.AUDIT_PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--retention-months", type=int, default=settings.AUDIT_RETENTION_MONTHS)
+    parser.add_argument("--archive-dir", default=settings.AUDIT_ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name != "postgresql":
+            print("audit_logs is only partitioned on PostgreSQL; nothing to do")
+            return
+        if args.status:
+            expired = set(expired_partitions(attached_partitions(db), args.retention_months))
+            for name in attached_partitions(db):
+                print(f"{name}{' (past retention)' if name in expired else ''}")
+            for name in detached_partitions(db):
+                print(f"{name} (detached, not yet archived)")
+            return
+    finally:
+        db.close()
+
+    result = maintain_partitions(args.months_ahead, args.retention_months, args.archive_dir)
+    print(f"Created {len(result['created'])} partitions: {', '.join(result['created']) or '-'}")
+    print(f"Archived {len(result['archived'])} partitions: {', '.join(result['archived']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Audit event spool
+A local write-ahead log for audit events. Each worker process appends to its
+own series of segment files ({series}-{seq}.seg in AUDIT_SPOOL_DIR) and rolls
+over to a new segment at AUDIT_SEGMENT_BYTES. Records are length-prefixed and
+checksummed, so a record torn by a crash is detected and skipped on read.
+Appends are plain writes; fsync is batched and done by the writer thread.
+
+A series is owned through an exclusive lock on {series}.lock, which the
+writing process holds for its lifetime. When the process exits the lock is
+released and another process can take the series over and load what is left.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import fcntl
+import glob
+import json
+import os
+import struct
+import threading
+import uuid
+import zlib
+from app.models.audit_log import AuditAction
+
+HEADER = struct.Struct(">II")  # Payload length, CRC32 of the payload
+SEGMENT_SUFFIX = ".seg"
+LOCK_SUFFIX = ".lock"
+
+
+def encode_record(event: Dict[str, Any]) -> bytes:
+    """Serialize an audit event as one length-prefixed, checksummed record"""
+    payload = json.dumps({
+        **event,
+        "action": event["action"].value,
+        "created_at": event["created_at"].isoformat(),
+    }, default=str, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_payload(payload: bytes) -> Dict[str, Any]:
+    event = json.loads(payload)
+    event["action"] = AuditAction(event["action"])
+    event["created_at"] = datetime.fromisoformat(event["created_at"])
+    return event
+
+
+def read_records(path: str, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int, bool, bool]:
+    """
+    Read up to limit records starting at byte offset.
+    Returns (events, end offset, exhausted, torn): exhausted means no further
+    complete record follows end; torn means bytes after end are an incomplete
+    or corrupt record rather than the end of the file.
+    """
+    events = []
+    with open(path, "rb") as segment:
+        segment.seek(offset)
+        while len(events) < limit:
+            header = segment.read(HEADER.size)
+            if not header:
+                return events, offset, True, False
+            if len(header) < HEADER.size:
+                return events, offset, True, True
+            length, checksum = HEADER.unpack(header)
+            payload = segment.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                return events, offset, True, True
+            events.append(decode_payload(payload))
+            offset += HEADER.size + length
+    return events, offset, False, False
+
+
+def _fsync_dir(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AuditSpool:
+    """Segmented append-only log of audit events for one process"""
+
+    def __init__(self, directory: str, segment_bytes: int):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.series: Optional[str] = None
+        self.seq = 0  # Segment being appended to; lower numbers of this series are sealed
+        self._pid: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+        self._size = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.appended = 0
+
+    def segment_path(self, series: str, seq: int) -> str:
+        return os.path.join(self.directory, f"{series}-{seq:010d}{SEGMENT_SUFFIX}")
+
+    def segments(self, series: str) -> List[int]:
+        """Segment numbers of a series on disk, oldest first"""
+        prefix = os.path.join(self.directory, f"{series}-")
+        return sorted(
+            int(path[len(prefix):-len(SEGMENT_SUFFIX)])
+            for path in glob.glob(f"{prefix}*{SEGMENT_SUFFIX}")
+        )
+
+    def series_names(self) -> List[str]:
+        """Every series with segments or a lock file in the spool directory"""
+        names = set()
+        for path in glob.glob(os.path.join(self.directory, f"*{SEGMENT_SUFFIX}")):
+            names.add(os.path.basename(path).rsplit("-", 1)[0])
+        for path in glob.glob(os.path.join(self.directory, f"*{LOCK_SUFFIX}")):
+            names.add(os.path.basename(path)[:-len(LOCK_SUFFIX)])
+        return sorted(names)
+
+    def lock_series(self, series: str) -> Optional[int]:
+        """Take over a series; returns the lock fd, or None while its owner is still running"""
+        fd = os.open(os.path.join(self.directory, f"{series}{LOCK_SUFFIX}"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def release_series(self, series: str, fd: int, remove: bool = False) -> None:
+        """Unlock a series taken over with lock_series, removing its lock file once it is empty"""
+        if remove:
+            try:
+                os.remove(os.path.join(self.directory, f"{series}{LOCK_SUFFIX}"))
+            except OSError:
+                pass
+        os.close(fd)
+
+    def _open_series(self) -> None:
+        # A new series per process, also after a fork, so two processes never share a segment
+        os.makedirs(self.directory, exist_ok=True)
+        self.series = uuid.uuid4().hex[:16]
+        self._lock_fd = self.lock_series(self.series)
+        self._pid = os.getpid()
+        self.seq = 0
+        self._open_segment()
+
+    def _open_segment(self) -> None:
+        self._fd = os.open(
+            self.segment_path(self.series, self.seq), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600
+        )
+        self._size = 0
+        _fsync_dir(self.directory)
+
+    def append(self, event: Dict[str, Any]) -> None:
+        """Append one event; it is durable once the next sync() returns"""
+        record = encode_record(event)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open_series()
+            os.write(self._fd, record)
+            self._size += len(record)
+            self._dirty = True
+            self.appended += 1
+            if self._size >= self.segment_bytes:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._dirty = False
+                self.seq += 1
+                self._open_segment()
+
+    def sync(self) -> None:
+        """fsync everything appended since the last sync, without blocking appends"""
+        with self._lock:
+            if not self._dirty or self._pid != os.getpid():
+                return
+            fd = os.dup(self._fd)
+            self._dirty = False
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def owns(self, series: str) -> bool:
+        return self._pid == os.getpid() and series == self.series
+
+    def is_sealed(self, series: str, seq: int) -> bool:
+        """Sealed segments receive no more appends: every segment of another process's series, or an older one of ours"""
+        return not self.owns(series) or seq < self.seq
+
+    def close(self) -> None:
+        """fsync and close the current segment; the series is left on disk for the next load"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            os.fsync(self._fd)
+            os.close(self._fd)
+            os.close(self._lock_fd)
+            self._pid = None
+            self._dirty = False
+
+    def disk_bytes(self) -> int:
+        """Total size of all segments in the spool directory"""
+        return sum(
+            os.path.getsize(path)
+            for path in glob.glob(os.path.join(self.directory, f"*{SEGMENT_SUFFIX}"))
+        )
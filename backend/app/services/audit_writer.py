@@ -0,0 +1,275 @@
+"""
+Audit log writer
+Requests append audit events to the local spool (app.services.audit_spool),
+so an event survives the database being slow or down. A background thread
+fsyncs the spool every AUDIT_FLUSH_INTERVAL_MS and bulk-loads new records into
+audit_logs in batches of AUDIT_BATCH_SIZE: COPY on PostgreSQL, a multi-row
+INSERT elsewhere. Each batch commits together with the series checkpoint in
+audit_spool_checkpoints, so a record is loaded exactly once even if the
+process dies between batches. Series left behind by exited processes are
+taken over and loaded by the remaining ones.
+
+Usage: python -m app.services.audit_writer --status
+       python -m app.services.audit_writer --load
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import argparse
+import enum
+import io
+import json
+import logging
+import os
+import threading
+import time
+from sqlalchemy import delete, insert, select, update
+from app.config import settings
+from app.models.audit_log import AuditLog
+from app.models.audit_spool_checkpoint import AuditSpoolCheckpoint
+from app.services.audit_spool import AuditSpool, read_records
+
+logger = logging.getLogger(__name__)
+
+RETRY_SECONDS = 5.0  # Pause after the database rejects a batch
+COPY_COLUMNS = [
+    "user_id", "action", "resource_type", "resource_id", "ip_address", "user_agent", "request_method",
+    "request_path", "request_body", "response_status", "error_message", "additional_metadata", "created_at",
+]
+checkpoints = AuditSpoolCheckpoint.__table__
+
+
+def _csv_field(value: Any) -> str:
+    # Unquoted empty is NULL in COPY csv format; everything else is quoted
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    elif isinstance(value, enum.Enum):
+        value = value.value
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_buffer(events: List[Dict[str, Any]]) -> io.StringIO:
+    """Audit events as COPY csv input for COPY_COLUMNS"""
+    buffer = io.StringIO()
+    for event in events:
+        buffer.write(",".join(_csv_field(event.get(column)) for column in COPY_COLUMNS) + "\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _bulk_insert(conn, events: List[Dict[str, Any]]) -> None:
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+        with conn.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY audit_logs ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", copy_buffer(events)
+            )
+    else:
+        conn.execute(insert(AuditLog.__table__), events)
+
+
+class AuditWriter:
+    """Spools audit events and loads them into audit_logs from a background thread"""
+
+    def __init__(self, spool: AuditSpool, batch_size: int, flush_interval_ms: int, bind=None):
+        self.spool = spool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.bind = bind  # Engine; defaults to app.database.engine
+        self._checkpoints: Dict[str, Tuple[int, int]] = {}  # Committed (segment, offset) per series
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._retry_at = 0.0
+        self.loaded = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.torn_segments = 0
+        self.append_errors = 0
+
+    def enqueue(self, event: Dict[str, Any]) -> None:
+        """Append an event to the spool; it reaches audit_logs on a later load"""
+        self._ensure_started()
+        try:
+            self.spool.append(event)
+        except OSError as e:
+            self.append_errors += 1
+            logger.error(f"Audit event could not be spooled: {str(e)}")
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.flush_interval):
+            self.spool.sync()
+            if time.monotonic() >= self._retry_at:
+                self._load_all()
+
+    def _load_all(self) -> bool:
+        """Load this process's series and any series whose process has exited"""
+        if self.bind is None:
+            from app.database import engine
+            self.bind = engine
+        with self._load_lock:
+            try:
+                for series in self.spool.series_names():
+                    if self.spool.owns(series):
+                        self._load_series(series)
+                        continue
+                    fd = self.spool.lock_series(series)
+                    if fd is None:
+                        continue  # Its process is still running and loads it
+                    finished = False
+                    try:
+                        self._load_series(series)
+                        finished = not self.spool.segments(series)
+                        if finished:
+                            self._forget(series)
+                    finally:
+                        self.spool.release_series(series, fd, remove=finished)
+            except Exception as e:
+                logger.warning(f"Audit load failed, events stay spooled: {str(e)}")
+                self.failed_batches += 1
+                self._retry_at = time.monotonic() + RETRY_SECONDS
+                return False
+        return True
+
+    def _position(self, series: str) -> Tuple[int, int]:
+        if series not in self._checkpoints:
+            with self.bind.connect() as conn:
+                row = conn.execute(
+                    select(checkpoints.c.segment, checkpoints.c.segment_offset).where(checkpoints.c.series == series)
+                ).first()
+            if row is not None:
+                self._checkpoints[series] = (row.segment, row.segment_offset)
+            else:
+                segments = self.spool.segments(series)
+                self._checkpoints[series] = (segments[0] if segments else 0, 0)
+        return self._checkpoints[series]
+
+    def _load_series(self, series: str) -> None:
+        seq, offset = self._position(series)
+        for loaded in [number for number in self.spool.segments(series) if number < seq]:
+            os.remove(self.spool.segment_path(series, loaded))  # Loaded before a crash removed it
+
+        while True:
+            path = self.spool.segment_path(series, seq)
+            if not os.path.exists(path):
+                later = [number for number in self.spool.segments(series) if number > seq]
+                if not later:
+                    return
+                seq, offset = later[0], 0
+                continue
+
+            # Checked before reading: a sealed segment cannot grow after we reach its end
+            sealed = self.spool.is_sealed(series, seq)
+            events, end, exhausted, torn = read_records(path, offset, self.batch_size)
+            if exhausted and sealed:
+                if torn:
+                    self.torn_segments += 1
+                    logger.warning(f"Skipping torn record at byte {end} of audit spool segment {path}")
+                position = (seq + 1, 0)
+            else:
+                position = (seq, end)
+            if position == (seq, offset):
+                return
+
+            self._commit(series, events, position)
+            if position[0] != seq:
+                os.remove(path)
+            seq, offset = position
+
+    def _commit(self, series: str, events: List[Dict[str, Any]], position: Tuple[int, int]) -> None:
+        """Load a batch and advance the series checkpoint in one transaction"""
+        values = {"segment": position[0], "segment_offset": position[1]}
+        with self.bind.begin() as conn:
+            if events:
+                _bulk_insert(conn, events)
+            if not conn.execute(update(checkpoints).where(checkpoints.c.series == series).values(**values)).rowcount:
+                conn.execute(insert(checkpoints).values(series=series, **values))
+        self._checkpoints[series] = position
+        if events:
+            self.loaded += len(events)
+            self.batches += 1
+
+    def _forget(self, series: str) -> None:
+        with self.bind.begin() as conn:
+            conn.execute(delete(checkpoints).where(checkpoints.c.series == series))
+        self._checkpoints.pop(series, None)
+
+    def flush(self) -> bool:
+        """fsync the spool and load everything appended so far; False if the database rejected it"""
+        self.spool.sync()
+        return self._load_all()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the writer thread and load what is left; anything not loaded stays spooled"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+        self.spool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Spool and load counters for this worker"""
+        pending = 0
+        if self.spool.series is not None:
+            seq, offset = self._checkpoints.get(self.spool.series, (0, 0))
+            pending = sum(
+                os.path.getsize(self.spool.segment_path(self.spool.series, number))
+                for number in self.spool.segments(self.spool.series) if number >= seq
+            ) - offset
+        return {
+            "appended": self.spool.appended,
+            "loaded": self.loaded,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "torn_segments": self.torn_segments,
+            "append_errors": self.append_errors,
+            "pending_bytes": pending,
+            "spool_bytes": self.spool.disk_bytes(),
+        }
+
+
+audit_writer = AuditWriter(
+    AuditSpool(settings.AUDIT_SPOOL_DIR, settings.AUDIT_SEGMENT_BYTES),
+    settings.AUDIT_BATCH_SIZE,
+    settings.AUDIT_FLUSH_INTERVAL_MS,
+)
+
+
+def main():
+    """Command line entry point for inspecting and loading the audit spool"""
+    parser = argparse.ArgumentParser(description="Inspect or load the local audit event spool")
+    parser.add_argument("--status", action="store_true", help="Show spooled segments per series")
+    parser.add_argument("--load", action="store_true",
+                        help="Load series left by stopped workers into audit_logs")
+    args = parser.parse_args()
+
+    spool = audit_writer.spool
+    if args.status:
+        for series in spool.series_names():
+            fd = spool.lock_series(series)
+            if fd is not None:
+                spool.release_series(series, fd)
+            size = sum(os.path.getsize(spool.segment_path(series, number)) for number in spool.segments(series))
+            state = "stopped" if fd is not None else "running"
+            print(f"{series}: {len(spool.segments(series))} segments, {size} bytes ({state})")
+    elif args.load:
+        ok = audit_writer.flush()
+        print(f"Loaded {audit_writer.loaded} audit events" + ("" if ok else "; the database rejected a batch"))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Backfills for derived columns
+Fills keyed-hash columns on rows created before those columns existed:
+account_fingerprint and content_hash, so delta feeds match older accounts
+instead of inserting duplicates, and the SSN and account number blind indexes
+used for lookups.
+
+Usage: python -m app.services.backfill --account-fingerprints [--chunk-size N]
+       python -m app.services.backfill --blind-indexes [--chunk-size N]
+"""
+from typing import Callable, Dict
+import argparse
+from cryptography.fernet import InvalidToken
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.consumer import Consumer
+from app.models.credit_account import CreditAccount
+from app.services.ingestion import tradeline_content_hash
+from app.utils.security import (
+    account_fingerprint,
+    account_number_blind_index,
+    decrypt_sensitive_data,
+    ssn_blind_index,
+)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _backfill(model, target, compute: Callable, unique: bool, chunk_size: int,
+              session_factory: Callable[[], Session]) -> Dict[str, int]:
+    """
+    Fill rows where target is NULL, in keyset-paginated chunks.
+    compute(row) returns the column values to set. For unique columns only the
+    oldest row with a given value is filled; later copies are counted as
+    duplicates and left NULL for review.
+    """
+    counts = {"updated": 0, "duplicates": 0, "undecryptable": 0}
+    last_id = 0
+    db = session_factory()
+    try:
+        while True:
+            rows = db.execute(
+                select(model).where(model.id > last_id, target.is_(None)).order_by(model.id).limit(chunk_size)
+            ).scalars().all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            values = {}
+            for row in rows:
+                try:
+                    values[row.id] = compute(row)
+                except InvalidToken:
+                    counts["undecryptable"] += 1
+
+            taken = set()
+            if unique:
+                taken = set(db.execute(
+                    select(target).where(target.in_([value[target.key] for value in values.values()]))
+                ).scalars())
+            updates = []
+            for row_id, value in values.items():
+                if unique:
+                    if value[target.key] in taken:
+                        counts["duplicates"] += 1
+                        continue
+                    taken.add(value[target.key])
+                updates.append({"id": row_id, **value})
+
+            if updates:
+                db.execute(update(model), updates)
+            db.commit()
+            db.expunge_all()
+            counts["updated"] += len(updates)
+    finally:
+        db.close()
+    return counts
+
+
+def backfill_account_fingerprints(chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                  session_factory: Callable[[], Session] = SessionLocal) -> Dict[str, int]:
+    """Fill account_fingerprint and content_hash; a bank's repeated account numbers count as duplicates"""
+    def compute(account: CreditAccount) -> Dict[str, str]:
+        number = decrypt_sensitive_data(account.account_number_encrypted)
+        return {
+            "account_fingerprint": account_fingerprint(account.bank_id, number),
+            "content_hash": tradeline_content_hash(account),
+        }
+
+    return _backfill(CreditAccount, CreditAccount.account_fingerprint, compute, True, chunk_size, session_factory)
+
+
+def backfill_ssn_index(chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       session_factory: Callable[[], Session] = SessionLocal) -> Dict[str, int]:
+    """Fill consumers.ssn_index; consumers sharing an SSN count as duplicates"""
+    def compute(consumer: Consumer) -> Dict[str, str]:
+        return {"ssn_index": ssn_blind_index(decrypt_sensitive_data(consumer.ssn_encrypted))}
+
+    return _backfill(Consumer, Consumer.ssn_index, compute, True, chunk_size, session_factory)
+
+
+def backfill_account_number_index(chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                  session_factory: Callable[[], Session] = SessionLocal) -> Dict[str, int]:
+    """Fill credit_accounts.account_number_index"""
+    def compute(account: CreditAccount) -> Dict[str, str]:
+        return {"account_number_index": account_number_blind_index(
+            decrypt_sensitive_data(account.account_number_encrypted)
+        )}
+
+    return _backfill(
+        CreditAccount, CreditAccount.account_number_index, compute, False, chunk_size, session_factory
+    )
+
+
+def _report(label: str, counts: Dict[str, int]) -> None:
+    print(
+        f"{label}: {counts['updated']} rows updated "
+        f"({counts['duplicates']} duplicates, {counts['undecryptable']} undecryptable skipped)"
+    )
+
+
+def main():
+    """Command line entry point for column backfills"""
+    parser = argparse.ArgumentParser(description="Backfill derived consumer and credit account columns")
+    parser.add_argument("--account-fingerprints", action="store_true",
+                        help="Fill account_fingerprint and content_hash on existing accounts")
+    parser.add_argument("--blind-indexes", action="store_true",
+                        help="Fill the SSN and account number blind indexes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if not (args.account_fingerprints or args.blind_indexes):
+        parser.print_help()
+        return
+    if args.account_fingerprints:
+        _report("Account fingerprints", backfill_account_fingerprints(chunk_size=args.chunk_size))
+    if args.blind_indexes:
+        _report("SSN index", backfill_ssn_index(chunk_size=args.chunk_size))
+        _report("Account number index", backfill_account_number_index(chunk_size=args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
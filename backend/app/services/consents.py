@@ -0,0 +1,215 @@
+"""
+Consent checks and expiry
+check_consent answers whether a bank holds a consumer's consent from an
+in-process cache, so report generation and inquiries normally skip the
+consents query. Entries are stamped with a per-consumer version that granting,
+revoking and expiring consent bump, live at most CONSENT_CACHE_TTL_SECONDS, and
+a cached grant is never trusted past its own expires_at.
+
+A revocation must stop every process at once, so as for the report cache the
+versions are shared through Redis and without it the cache is off unless
+CONSENT_CACHE_SINGLE_PROCESS says one process serves and sweeps.
+
+Consent changes must go through grant_consent/revoke_consent, or call
+invalidate_consents after committing. The sweeper marks lapsed grants EXPIRED
+in batches; checks do not depend on it having run.
+
+Usage: python -m app.services.consents [--once] [--interval SECONDS] [--batch-size N]
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+from datetime import datetime, timezone
+import argparse
+import logging
+import math
+import threading
+import time
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.consent import Consent, ConsentStatus, ConsentType
+from app.utils.cache import TTLCache
+from app.utils.redis_client import get_async_redis_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "consent_cache:version:{consumer_id}"
+
+
+class ConsentCache:
+    """Consent expiry per (consumer, bank, type, version); 0.0 caches the absence of consent"""
+
+    def __init__(self, maxsize: int, ttl: int, single_process: bool = False):
+        self.ttl = ttl
+        self.single_process = single_process
+        self._local = TTLCache(maxsize, ttl)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def enabled(self) -> bool:
+        """Only with versions shared through Redis, or when one process does all the invalidating"""
+        return self.ttl > 0 and (self.single_process or get_redis_client() is not None)
+
+    async def current_version(self, consumer_id: int) -> Optional[int]:
+        """
+        Version stamp; read it before querying the consents it will be stored with.
+        None when the shared version cannot be read, and the cache must be bypassed.
+        """
+        client = get_async_redis_client()
+        if client is not None:
+            try:
+                return int(await client.get(VERSION_KEY.format(consumer_id=consumer_id)) or 0)
+            except Exception as e:
+                logger.warning(f"Consent cache version lookup failed: {str(e)}")
+                return None
+        return self._versions.get(consumer_id, 0)
+
+    def get(self, key: Tuple) -> Optional[float]:
+        return self._local.get(key)
+
+    def set(self, key: Tuple, expires: float) -> None:
+        self._local.set(key, expires)
+
+    def invalidate(self, consumer_id: int) -> None:
+        """Bump the consumer's version; call after the change is committed"""
+        with self._lock:
+            self._versions[consumer_id] = self._versions.get(consumer_id, 0) + 1
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                key = VERSION_KEY.format(consumer_id=consumer_id)
+                client.incr(key)
+                # Outlives every entry cached under the old version
+                client.expire(key, max(self.ttl, 1) * 2)
+            except Exception as e:
+                logger.warning(f"Consent cache invalidation failed: {str(e)}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+            self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._local.stats(), "enabled": self.enabled()}
+
+
+consent_cache = ConsentCache(
+    settings.CONSENT_CACHE_SIZE, settings.CONSENT_CACHE_TTL_SECONDS, settings.CONSENT_CACHE_SINGLE_PROCESS
+)
+
+
+def invalidate_consents(*consumer_ids: int) -> None:
+    """Invalidate cached consent checks after a consumer's consents change"""
+    for consumer_id in set(consumer_ids):
+        consent_cache.invalidate(consumer_id)
+
+
+def _expiry_timestamp(expires_at: Optional[datetime]) -> float:
+    if expires_at is None:
+        return math.inf
+    # SQLite hands back naive datetimes; they are stored in UTC
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at.timestamp()
+
+
+async def check_consent(db: AsyncSession, consumer_id: int, bank_id: Optional[int],
+                        consent_type: ConsentType = ConsentType.CREDIT_REPORT) -> bool:
+    """Whether bank_id holds an unexpired grant of consent_type from the consumer"""
+    version = await consent_cache.current_version(consumer_id) if consent_cache.enabled() else None
+    key = (consumer_id, bank_id, consent_type, version)
+    expires = consent_cache.get(key) if version is not None else None
+    if expires is None:
+        expiries = (await db.execute(select(Consent.expires_at).where(
+            Consent.consumer_id == consumer_id,
+            Consent.bank_id == bank_id,
+            Consent.consent_type == consent_type,
+            Consent.status == ConsentStatus.GRANTED,
+        ))).scalars().all()
+        expires = max((_expiry_timestamp(expires_at) for expires_at in expiries), default=0.0)
+        if version is not None:
+            consent_cache.set(key, expires)
+    return expires > time.time()
+
+
+async def grant_consent(db: AsyncSession, consumer_id: int, bank_id: Optional[int],
+                        consent_type: ConsentType = ConsentType.CREDIT_REPORT,
+                        expires_at: Optional[datetime] = None, **details) -> Consent:
+    """Record a grant; details are other Consent columns such as purpose or ip_address"""
+    consent = Consent(consumer_id=consumer_id, bank_id=bank_id, consent_type=consent_type,
+                      status=ConsentStatus.GRANTED, expires_at=expires_at, **details)
+    db.add(consent)
+    await db.commit()
+    invalidate_consents(consumer_id)
+    return consent
+
+
+async def revoke_consent(db: AsyncSession, consent: Consent) -> Consent:
+    consent.status = ConsentStatus.REVOKED
+    consent.revoked_at = datetime.now(timezone.utc)
+    await db.commit()
+    invalidate_consents(consent.consumer_id)
+    return consent
+
+
+def expire_consents(db: Session, batch_size: int = settings.CONSENT_SWEEP_BATCH_SIZE,
+                    now: Optional[datetime] = None) -> int:
+    """Mark every grant past its expires_at EXPIRED, batch_size rows per transaction; returns the count"""
+    now = now or datetime.now(timezone.utc)
+    expired = 0
+    while True:
+        rows = db.execute(
+            select(Consent.id, Consent.consumer_id)
+            .where(Consent.status == ConsentStatus.GRANTED, Consent.expires_at <= now)
+            .order_by(Consent.expires_at)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return expired
+        # The status condition skips rows revoked since they were selected
+        db.execute(
+            update(Consent)
+            .where(Consent.id.in_([row.id for row in rows]), Consent.status == ConsentStatus.GRANTED)
+            .values(status=ConsentStatus.EXPIRED),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        invalidate_consents(*(row.consumer_id for row in rows))
+        expired += len(rows)
+
+
+def run_sweeper(interval: float = 60.0, once: bool = False,
+                batch_size: int = settings.CONSENT_SWEEP_BATCH_SIZE,
+                session_factory: Callable[[], Session] = SessionLocal) -> int:
+    """Expire lapsed consents every interval seconds, or once; returns consents expired"""
+    total = 0
+    while True:
+        db = session_factory()
+        try:
+            expired = expire_consents(db, batch_size)
+        finally:
+            db.close()
+        total += expired
+        if expired:
+            print(f"[consents] expired {expired} consents", flush=True)
+        if once:
+            return total
+        time.sleep(interval)
+
+
+def main():
+    """Command line entry point for the consent expiry sweeper"""
+    parser = argparse.ArgumentParser(description="Mark consents past their expires_at as EXPIRED")
+    parser.add_argument("--once", action="store_true", help="Run one sweep and exit")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between sweeps")
+    parser.add_argument("--batch-size", type=int, default=settings.CONSENT_SWEEP_BATCH_SIZE)
+    args = parser.parse_args()
+
+    expired = run_sweeper(interval=args.interval, once=args.once, batch_size=args.batch_size)
+    print(f"Expired {expired} consents")
+
+
+if __name__ == "__main__":
+    main()
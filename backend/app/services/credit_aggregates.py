@@ -0,0 +1,350 @@
+"""
+Maintained per-consumer scoring aggregates
+Keeps consumer_credit_aggregates in step with credit_accounts so a score can be
+computed from one row instead of every tradeline.
+
+Usage: python -m app.services.credit_aggregates --rebuild
+"""
+from typing import Dict, Iterable, List, Optional
+from datetime import date, timedelta
+from decimal import Decimal
+import argparse
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal, dialect_insert
+from app.models.consumer import Consumer
+from app.models.consumer_credit_aggregate import ConsumerCreditAggregate
+from app.models.credit_account import CreditAccount, AccountType, AccountStatus, PaymentStatus
+from app.utils.batch_scoring import (
+    ACCOUNT_TYPE_CODES,
+    CLOSED_ACCOUNT_RETENTION_DAYS,
+    NEW_CREDIT_WINDOW_DAYS,
+    PAYMENT_STATUS_POINTS,
+    ConsumerAggregates,
+    score_aggregates,
+)
+
+PAYMENT_COLUMNS = {
+    PaymentStatus.CURRENT: "payment_current",
+    PaymentStatus.LATE_30: "payment_late_30",
+    PaymentStatus.LATE_60: "payment_late_60",
+    PaymentStatus.LATE_90: "payment_late_90",
+    PaymentStatus.LATE_120_PLUS: "payment_late_120_plus",
+    PaymentStatus.NO_PAYMENT: "payment_no_payment",
+}
+AGGREGATE_COLUMNS = (
+    "total_accounts", *PAYMENT_COLUMNS.values(), "total_balance", "total_limit",
+    "oldest_open_date", "account_type_counts", "recent_open_dates", "valid_until",
+)
+RECENT_OPEN_DATES_KEPT = 4  # The new credit factor only distinguishes 0, 1, 2, 3 and 4+ recent accounts
+SCORING_FIELDS = (
+    "account_status", "payment_status", "current_balance", "credit_limit",
+    "open_date", "close_date", "account_type",
+)
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def account_scoring_state(account) -> Dict:
+    """Snapshot of the fields an account contributes to its consumer's aggregate"""
+    return {field: getattr(account, field) for field in SCORING_FIELDS}
+
+
+def _is_scored(state: Dict, as_of: date) -> bool:
+    """Same filter as calculate_credit_score: closed accounts count for 7 years"""
+    return state["account_status"] != AccountStatus.CLOSED or (
+        state["close_date"] is not None
+        and (as_of - state["close_date"]).days < CLOSED_ACCOUNT_RETENTION_DAYS
+    )
+
+
+def _expiry(state: Dict) -> Optional[date]:
+    """First day a closed account no longer counts towards the score"""
+    if state["account_status"] == AccountStatus.CLOSED and state["close_date"] is not None:
+        return state["close_date"] + timedelta(days=CLOSED_ACCOUNT_RETENTION_DAYS)
+    return None
+
+
+def _empty_values() -> Dict:
+    values = {column: 0 for column in PAYMENT_COLUMNS.values()}
+    values.update({
+        "total_accounts": 0,
+        "total_balance": Decimal(0),
+        "total_limit": Decimal(0),
+        "oldest_open_date": None,
+        "account_type_counts": {},
+        "recent_open_dates": [],
+        "valid_until": None,
+    })
+    return values
+
+
+def _add_counters(values: Dict, state: Dict, sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) an account's payment and balance contribution"""
+    values[PAYMENT_COLUMNS[PaymentStatus(state["payment_status"])]] += sign
+    values["total_balance"] += sign * Decimal(state["current_balance"] or 0)
+    values["total_limit"] += sign * Decimal(state["credit_limit"] or 0)
+
+
+def _include(values: Dict, state: Dict) -> None:
+    """Add a scored account's full contribution"""
+    _add_counters(values, state, 1)
+
+    type_counts = dict(values["account_type_counts"])
+    account_type = AccountType(state["account_type"]).value
+    type_counts[account_type] = type_counts.get(account_type, 0) + 1
+    values["account_type_counts"] = type_counts
+
+    open_date = state["open_date"]
+    if values["oldest_open_date"] is None or open_date < values["oldest_open_date"]:
+        values["oldest_open_date"] = open_date
+    values["recent_open_dates"] = sorted(
+        values["recent_open_dates"] + [open_date.isoformat()], reverse=True
+    )[:RECENT_OPEN_DATES_KEPT]
+
+    expiry = _expiry(state)
+    if expiry is not None and (values["valid_until"] is None or expiry < values["valid_until"]):
+        values["valid_until"] = expiry
+
+
+def build_aggregate_values(accounts: Iterable, as_of: Optional[date] = None) -> Dict:
+    """Compute aggregate column values from a consumer's accounts"""
+    as_of = as_of or date.today()
+    values = _empty_values()
+    for account in accounts:
+        state = account_scoring_state(account)
+        values["total_accounts"] += 1
+        if _is_scored(state, as_of):
+            _include(values, state)
+    return values
+
+
+def _is_stale(aggregate: ConsumerCreditAggregate, as_of: date) -> bool:
+    return aggregate.valid_until is not None and as_of >= aggregate.valid_until
+
+
+def _lock_consumers(db: Session, consumer_ids: List[int]) -> None:
+    """
+    Serialize aggregate writers per consumer, including the first create, which
+    has no aggregate row to lock yet. FOR NO KEY UPDATE still lets accounts be
+    inserted (their foreign key only takes KEY SHARE on the consumer).
+    Writers take this before any aggregate lock.
+    """
+    db.execute(
+        select(Consumer.id).where(Consumer.id.in_(consumer_ids))
+        .order_by(Consumer.id).with_for_update(key_share=True)
+    )
+
+
+def _locked_aggregate(db: Session, consumer_id: int) -> Optional[ConsumerCreditAggregate]:
+    _lock_consumers(db, [consumer_id])
+    return db.query(ConsumerCreditAggregate).filter(
+        ConsumerCreditAggregate.consumer_id == consumer_id
+    ).with_for_update().populate_existing().first()
+
+
+def _store(aggregate: ConsumerCreditAggregate, values: Dict) -> None:
+    for column in AGGREGATE_COLUMNS:
+        setattr(aggregate, column, values[column])
+
+
+def _values_of(aggregate: ConsumerCreditAggregate) -> Dict:
+    return {column: getattr(aggregate, column) for column in AGGREGATE_COLUMNS}
+
+
+def _upsert_aggregates(db: Session, rows: List[Dict]) -> None:
+    stmt = dialect_insert(db, ConsumerCreditAggregate)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ConsumerCreditAggregate.consumer_id],
+            set_={
+                **{column: stmt.excluded[column] for column in AGGREGATE_COLUMNS},
+                "updated_at": func.now(),
+            },
+        ),
+        rows,
+    )
+
+
+def refresh_consumer_aggregates(db: Session, consumer_ids: Iterable[int], as_of: Optional[date] = None) -> None:
+    """Rebuild aggregates for the given consumers from their accounts (does not commit)"""
+    as_of = as_of or date.today()
+    consumer_ids = sorted(set(consumer_ids))
+    if not consumer_ids:
+        return
+    db.flush()
+    # Accounts are read after the lock, so a concurrent writer's committed rows are counted
+    _lock_consumers(db, consumer_ids)
+
+    accounts_by_consumer = {consumer_id: [] for consumer_id in consumer_ids}
+    accounts = db.execute(
+        select(CreditAccount.consumer_id, *[getattr(CreditAccount, field) for field in SCORING_FIELDS])
+        .where(CreditAccount.consumer_id.in_(consumer_ids))
+        .order_by(CreditAccount.consumer_id, CreditAccount.id)
+    )
+    for account in accounts:
+        accounts_by_consumer[account.consumer_id].append(account)
+
+    _upsert_aggregates(db, [
+        {"consumer_id": consumer_id, **build_aggregate_values(accounts, as_of)}
+        for consumer_id, accounts in accounts_by_consumer.items()
+    ])
+
+
+def apply_new_account_rows(db: Session, rows: List[Dict], as_of: Optional[date] = None) -> None:
+    """
+    Bulk counterpart of apply_new_account for freshly inserted account rows
+    (dicts holding consumer_id and SCORING_FIELDS). Work is proportional to the
+    new rows, not to the consumers' existing accounts. Does not commit.
+    """
+    as_of = as_of or date.today()
+    consumer_ids = sorted({row["consumer_id"] for row in rows})
+    if not consumer_ids:
+        return
+    _lock_consumers(db, consumer_ids)
+    aggregates = {
+        aggregate.consumer_id: aggregate
+        for aggregate in db.query(ConsumerCreditAggregate).filter(
+            ConsumerCreditAggregate.consumer_id.in_(consumer_ids)
+        ).order_by(ConsumerCreditAggregate.consumer_id).with_for_update().populate_existing()
+    }
+    rebuild = [
+        consumer_id for consumer_id in consumer_ids
+        if consumer_id not in aggregates or _is_stale(aggregates[consumer_id], as_of)
+    ]
+    updated = {
+        consumer_id: _values_of(aggregate)
+        for consumer_id, aggregate in aggregates.items() if not _is_stale(aggregate, as_of)
+    }
+
+    for row in rows:
+        values = updated.get(row["consumer_id"])
+        if values is None:
+            continue
+        state = {field: row.get(field) for field in SCORING_FIELDS}
+        values["total_accounts"] += 1
+        if _is_scored(state, as_of):
+            _include(values, state)
+
+    if updated:
+        _upsert_aggregates(db, [{"consumer_id": consumer_id, **values} for consumer_id, values in updated.items()])
+    refresh_consumer_aggregates(db, rebuild, as_of)
+
+
+def apply_new_account(db: Session, account: CreditAccount, as_of: Optional[date] = None) -> None:
+    """Add a newly inserted account to its consumer's aggregate (does not commit)"""
+    as_of = as_of or date.today()
+    aggregate = _locked_aggregate(db, account.consumer_id)
+    if aggregate is None or _is_stale(aggregate, as_of):
+        refresh_consumer_aggregates(db, [account.consumer_id], as_of)
+        return
+
+    values = _values_of(aggregate)
+    state = account_scoring_state(account)
+    values["total_accounts"] += 1
+    if _is_scored(state, as_of):
+        _include(values, state)
+    _store(aggregate, values)
+
+
+def apply_account_update(db: Session, account: CreditAccount, before: Dict, as_of: Optional[date] = None) -> None:
+    """
+    Apply an account update to its consumer's aggregate (does not commit).
+    before is account_scoring_state() captured before the change.
+    """
+    as_of = as_of or date.today()
+    after = account_scoring_state(account)
+    aggregate = _locked_aggregate(db, account.consumer_id)
+    if aggregate is None or _is_stale(aggregate, as_of):
+        refresh_consumer_aggregates(db, [account.consumer_id], as_of)
+        return
+
+    was_scored, is_scored = _is_scored(before, as_of), _is_scored(after, as_of)
+    if not was_scored and not is_scored:
+        return
+    if (was_scored and is_scored and _expiry(before) == _expiry(after)
+            and before["open_date"] == after["open_date"]
+            and AccountType(before["account_type"]) == AccountType(after["account_type"])):
+        values = _values_of(aggregate)
+        _add_counters(values, before, -1)
+        _add_counters(values, after, 1)
+        _store(aggregate, values)
+        return
+
+    # Account entered or left the score, or a min/max input changed
+    refresh_consumer_aggregates(db, [account.consumer_id], as_of)
+
+
+def get_scoring_aggregate(db: Session, consumer_id: int, as_of: Optional[date] = None) -> ConsumerCreditAggregate:
+    """Load a consumer's aggregate, rebuilding it if missing or past valid_until (does not commit)"""
+    as_of = as_of or date.today()
+    query = db.query(ConsumerCreditAggregate).filter(
+        ConsumerCreditAggregate.consumer_id == consumer_id
+    ).populate_existing()
+    aggregate = query.first()
+    if aggregate is None or _is_stale(aggregate, as_of):
+        refresh_consumer_aggregates(db, [consumer_id], as_of)
+        aggregate = query.first()
+    return aggregate
+
+
+def score_aggregate(aggregate: ConsumerCreditAggregate, as_of: Optional[date] = None) -> Dict:
+    """Score a consumer from their aggregate row, in calculate_credit_score format"""
+    as_of = as_of or date.today()
+    counts = {status: getattr(aggregate, column) for status, column in PAYMENT_COLUMNS.items()}
+    type_mask = 0
+    for account_type, count in (aggregate.account_type_counts or {}).items():
+        if count > 0:
+            type_mask |= 1 << ACCOUNT_TYPE_CODES[AccountType(account_type)]
+    recent_cutoff = (as_of - timedelta(days=NEW_CREDIT_WINDOW_DAYS)).isoformat()
+
+    aggregates = ConsumerAggregates(
+        consumer_id=[aggregate.consumer_id],
+        account_count=[aggregate.total_accounts],
+        active_count=[sum(counts.values())],
+        payment_points=[sum(count * PAYMENT_STATUS_POINTS[status] for status, count in counts.items())],
+        total_balance=[float(aggregate.total_balance)],
+        total_limit=[float(aggregate.total_limit)],
+        oldest_open_date=[aggregate.oldest_open_date.toordinal() if aggregate.oldest_open_date else 0],
+        account_type_mask=[type_mask],
+        recent_count=[sum(1 for opened in aggregate.recent_open_dates or [] if opened >= recent_cutoff)],
+    )
+    return score_aggregates(aggregates, as_of).result_at(0)
+
+
+def rebuild_all_aggregates(chunk_size: int = DEFAULT_CHUNK_SIZE, session_factory=SessionLocal) -> int:
+    """Rebuild every consumer's aggregate in keyset-paginated chunks; returns consumers processed"""
+    processed = 0
+    last_consumer_id = 0
+    db = session_factory()
+    try:
+        while True:
+            consumer_ids = db.execute(
+                select(Consumer.id).where(Consumer.id > last_consumer_id).order_by(Consumer.id).limit(chunk_size)
+            ).scalars().all()
+            if not consumer_ids:
+                break
+            refresh_consumer_aggregates(db, consumer_ids)
+            db.commit()
+            processed += len(consumer_ids)
+            last_consumer_id = consumer_ids[-1]
+    finally:
+        db.close()
+    return processed
+
+
+def main():
+    """Command line entry point for backfilling consumer_credit_aggregates"""
+    parser = argparse.ArgumentParser(description="Maintain consumer credit aggregates")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild every consumer's aggregate")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.rebuild:
+        processed = rebuild_all_aggregates(chunk_size=args.chunk_size)
+        print(f"Rebuilt aggregates for {processed} consumers")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Bulk credit data ingestion
+Parses NDJSON or CSV tradeline files, validates each row with
+CreditAccountCreate and inserts valid rows in chunked transactions.
+
+Delta mode treats a file as a bank's full or partial refresh: rows are matched
+to existing accounts by (bank_id, account_fingerprint), unchanged rows are
+skipped by content hash and the rest are upserted.
+"""
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from collections.abc import Mapping
+from decimal import Decimal
+import csv
+import enum
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pydantic import ValidationError
+from sqlalchemy import select, insert, func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import dialect_insert
+from app.models.consumer import Consumer
+from app.models.credit_account import CreditAccount
+from app.schemas.credit_account import CreditAccountCreate
+from app.services.credit_aggregates import apply_new_account_rows, refresh_consumer_aggregates
+from app.services.report_cache import invalidate_consumer_reports
+from app.services.scoring_queue import mark_consumers_dirty
+from app.utils.security import encrypt_many, account_fingerprint, account_number_blind_index
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+SUPPORTED_FORMATS = ("ndjson", "csv")
+INSERT_MODE = "insert"
+DELTA_MODE = "delta"
+SUPPORTED_MODES = (INSERT_MODE, DELTA_MODE)
+CONTENT_HASH_FIELDS = (
+    "consumer_id", "account_type", "account_status", "payment_status", "credit_limit",
+    "current_balance", "minimum_payment", "payment_due_date", "open_date", "close_date",
+    "last_payment_date", "last_payment_amount", "notes",
+)
+UPSERT_COLUMNS = CONTENT_HASH_FIELDS + ("content_hash",)  # Columns a delta feed may change
+
+
+class UploadTooLarge(Exception):
+    """Raised when a streamed upload exceeds MAX_UPLOAD_SIZE"""
+
+
+class IngestionResult:
+    """Counters and per-row errors for an ingestion run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.rejected = 0
+        self.errors: List[Dict] = []
+        self.elapsed = 0.0
+        self.bytes_read = 0
+        self.last_row = 0  # Row number of the last record consumed
+
+    def reject(self, row_number: int, errors: List[str]) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "errors_truncated": self.rejected > len(self.errors),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def detect_format(content_type: Optional[str], requested: Optional[str] = None) -> Optional[str]:
+    """Pick ndjson or csv from an explicit format or the request Content-Type"""
+    if requested:
+        requested = requested.lower()
+        return requested if requested in SUPPORTED_FORMATS else None
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json"):
+        return "ndjson"
+    return None
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], max_size: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Write a streamed upload to a file in UPLOAD_DIR without buffering it in memory.
+    Returns (path, size); the caller removes the file.
+    """
+    max_size = settings.MAX_UPLOAD_SIZE if max_size is None else max_size
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="ingest-", suffix=".upload", dir=settings.UPLOAD_DIR)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+                spool.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, size
+
+
+def _parse_ndjson(lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as e:
+            yield row_number, e
+
+
+def _parse_csv(lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+    # Row numbers count the header as row 1, matching spreadsheet line numbers
+    for row_number, record in enumerate(csv.DictReader(lines), start=2):
+        if None in record:
+            yield row_number, ValueError("Row has more fields than the header")
+            continue
+        # Empty CSV cells are missing values, not empty strings
+        yield row_number, {key: value for key, value in record.items() if value not in ("", None)}
+
+
+def parse_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Yield (row_number, record) pairs; unparseable rows yield an exception instead of a dict"""
+    if fmt == "csv":
+        return _parse_csv(lines)
+    return _parse_ndjson(lines)
+
+
+def read_lines(stream: BinaryIO, result: IngestionResult) -> Iterator[str]:
+    """Decode a binary file line by line, counting bytes consumed into result.bytes_read"""
+    for line in stream:
+        if result.bytes_read == 0 and line.startswith(b"\xef\xbb\xbf"):
+            result.bytes_read += 3
+            line = line[3:]
+        result.bytes_read += len(line)
+        yield line.decode("utf-8", errors="replace")
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors()
+    ]
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return f"{value:.2f}"  # Numeric(15, 2) columns read back with two places
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def tradeline_content_hash(source: Any) -> str:
+    """Hash of an account's reported fields, from a dict or a CreditAccount"""
+    if isinstance(source, Mapping):
+        values = [source.get(field) for field in CONTENT_HASH_FIELDS]
+    else:
+        values = [getattr(source, field) for field in CONTENT_HASH_FIELDS]
+    payload = json.dumps([_canonical(value) for value in values], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _account_row(account: CreditAccountCreate, bank_id: int) -> Dict:
+    """Column values for a validated row, in the same shape submit_credit_data stores (not yet encrypted)"""
+    values = account.model_dump(exclude={"account_number"})
+    values["bank_id"] = bank_id
+    values["account_fingerprint"] = account_fingerprint(bank_id, account.account_number)
+    values["account_number_index"] = account_number_blind_index(account.account_number)
+    values["content_hash"] = tradeline_content_hash(values)
+    return values
+
+
+ChunkCallback = Callable[[Session, IngestionResult], None]
+
+
+def _upsert_accounts(db: Session, rows: List[Dict]) -> None:
+    stmt = dialect_insert(db, CreditAccount.__table__)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[CreditAccount.bank_id, CreditAccount.account_fingerprint],
+            set_={
+                **{column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+                "updated_at": func.now(),
+            },
+        ),
+        rows,
+    )
+
+
+def _insert_chunk(db: Session, chunk: List[Tuple[int, CreditAccountCreate]], bank_id: int,
+                  result: IngestionResult, on_chunk: Optional[ChunkCallback] = None,
+                  mode: str = INSERT_MODE) -> None:
+    """
+    Write one chunk of validated rows in a single transaction.
+    on_chunk runs inside that transaction, so progress it records commits atomically with the rows.
+    """
+    consumer_ids = {account.consumer_id for _, account in chunk}
+    known = set(db.execute(select(Consumer.id).where(Consumer.id.in_(consumer_ids))).scalars())
+
+    rows: Dict[str, Tuple[int, CreditAccountCreate, Dict]] = {}
+    for row_number, account in chunk:
+        if account.consumer_id not in known:
+            result.reject(row_number, [f"consumer_id: Consumer {account.consumer_id} not found"])
+            continue
+        values = _account_row(account, bank_id)
+        duplicate = rows.get(values["account_fingerprint"])
+        if duplicate is not None:
+            result.reject(row_number, [f"account_number: Duplicate of row {duplicate[0]} in this upload"])
+            continue
+        rows[values["account_fingerprint"]] = (row_number, account, values)
+
+    existing = {}
+    if rows:
+        existing = {
+            row.account_fingerprint: row
+            for row in db.execute(
+                select(CreditAccount.account_fingerprint, CreditAccount.content_hash, CreditAccount.consumer_id)
+                .where(CreditAccount.bank_id == bank_id, CreditAccount.account_fingerprint.in_(list(rows)))
+            )
+        }
+
+    new_rows, changed_rows, previous_consumers = [], [], set()
+    for fingerprint, (row_number, account, values) in rows.items():
+        current = existing.get(fingerprint)
+        if current is None:
+            new_rows.append((account, values))
+        elif mode != DELTA_MODE:
+            result.reject(row_number, ["account_number: Account already exists for this bank; submit it as a delta feed to update it"])
+        elif current.content_hash == values["content_hash"]:
+            result.unchanged += 1
+        else:
+            changed_rows.append((account, values))
+            previous_consumers.add(current.consumer_id)
+
+    to_write = new_rows + changed_rows
+    encrypted = encrypt_many([account.account_number for account, _ in to_write])
+    written = [
+        {**values, "account_number_encrypted": ciphertext}
+        for (_, values), ciphertext in zip(to_write, encrypted)
+    ]
+    touched = {row["consumer_id"] for row in written} | previous_consumers
+    if written:
+        if mode == DELTA_MODE:
+            _upsert_accounts(db, written)
+        else:
+            db.execute(insert(CreditAccount.__table__), written)
+        # Updated accounts change existing contributions, so those consumers are rebuilt
+        rebuilt = {values["consumer_id"] for _, values in changed_rows} | previous_consumers
+        apply_new_account_rows(db, [values for _, values in new_rows if values["consumer_id"] not in rebuilt])
+        refresh_consumer_aggregates(db, rebuilt)
+        mark_consumers_dirty(db, touched)
+    result.inserted += len(new_rows)
+    result.updated += len(changed_rows)
+    if on_chunk is not None:
+        on_chunk(db, result)
+    db.commit()
+    invalidate_consumer_reports(*touched)
+
+
+def ingest_rows(db: Session, records: Iterable[Tuple[int, object]], bank_id: int,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, result: Optional[IngestionResult] = None,
+                on_chunk: Optional[ChunkCallback] = None, mode: str = INSERT_MODE) -> IngestionResult:
+    """
+    Validate and write (row_number, record) pairs, committing every chunk_size valid rows.
+    Invalid rows are reported and skipped; they never abort the load.
+    In insert mode accounts the bank already reported are rejected; in delta mode they
+    are updated when their content changed. Pass a result carrying earlier counts to
+    continue a resumed load.
+    """
+    result = result or IngestionResult()
+    started = time.perf_counter()
+    chunk: List[Tuple[int, CreditAccountCreate]] = []
+
+    for row_number, record in records:
+        result.rows += 1
+        result.last_row = row_number
+        if isinstance(record, Exception):
+            result.reject(row_number, [f"Unparseable row: {record}"])
+            continue
+        if not isinstance(record, dict):
+            result.reject(row_number, ["Row must be an object"])
+            continue
+        try:
+            chunk.append((row_number, CreditAccountCreate.model_validate(record)))
+        except ValidationError as e:
+            result.reject(row_number, _validation_messages(e))
+            continue
+        if len(chunk) >= chunk_size:
+            _insert_chunk(db, chunk, bank_id, result, on_chunk, mode)
+            chunk = []
+
+    if chunk:
+        _insert_chunk(db, chunk, bank_id, result, on_chunk, mode)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def ingest_file(db: Session, path: str, fmt: str, bank_id: int,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, result: Optional[IngestionResult] = None,
+                on_chunk: Optional[ChunkCallback] = None, resume_after_row: int = 0,
+                mode: str = INSERT_MODE) -> IngestionResult:
+    """Ingest a spooled NDJSON or CSV file, skipping rows up to resume_after_row"""
+    result = result or IngestionResult()
+    result.bytes_read = 0
+    with open(path, "rb") as stream:
+        records = parse_rows(read_lines(stream, result), fmt)
+        if resume_after_row:
+            records = ((row_number, record) for row_number, record in records if row_number > resume_after_row)
+        return ingest_rows(db, records, bank_id, chunk_size, result, on_chunk, mode)
@@ -0,0 +1,284 @@
+"""
+Background ingestion jobs
+Bulk uploads are spooled to UPLOAD_DIR and recorded in ingestion_jobs; worker
+processes claim queued jobs from the table and load them with app.services.ingestion.
+Progress is committed with every chunk, so a job whose worker dies is picked
+up again by another worker and resumed after its last committed row. Workers
+refresh their job's heartbeat from a background thread while it runs, and
+every progress write checks the job's claim token, so a worker whose job was
+reclaimed stops without writing to it.
+
+Usage: python -m app.services.ingestion_jobs [--once] [--poll-interval SECONDS]
+"""
+from typing import Callable, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import argparse
+import logging
+import os
+import threading
+import time
+import uuid
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session, sessionmaker
+from app.config import settings
+from app.database import SessionLocal
+from app.models.ingestion_job import IngestionJob, IngestionJobStatus
+from app.services.ingestion import DEFAULT_CHUNK_SIZE, INSERT_MODE, IngestionResult, ingest_file
+
+logger = logging.getLogger(__name__)
+
+
+class JobLost(Exception):
+    """Raised when another worker has reclaimed the job this worker was running"""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite returns naive datetimes even for timezone-aware columns
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def create_job(db: Session, bank_id: int, submitted_by: Optional[int], path: str,
+               file_format: str, file_size: int, mode: str = INSERT_MODE) -> IngestionJob:
+    """Queue a spooled upload for background ingestion"""
+    job = IngestionJob(
+        bank_id=bank_id,
+        submitted_by=submitted_by,
+        status=IngestionJobStatus.QUEUED,
+        file_format=file_format,
+        mode=mode,
+        file_path=path,
+        file_size=file_size,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_next_job(db: Session) -> Optional[IngestionJob]:
+    """
+    Claim the oldest queued job, or a running job whose worker stopped sending
+    heartbeats. SKIP LOCKED lets concurrent workers claim different jobs.
+    """
+    stale_before = _utcnow() - timedelta(seconds=settings.INGESTION_JOB_STALE_SECONDS)
+    job = db.query(IngestionJob).filter(
+        or_(
+            IngestionJob.status == IngestionJobStatus.QUEUED,
+            (IngestionJob.status == IngestionJobStatus.RUNNING) & (IngestionJob.heartbeat_at < stale_before),
+        )
+    ).order_by(IngestionJob.id).limit(1).with_for_update(skip_locked=True).first()
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = IngestionJobStatus.RUNNING
+    job.started_at = job.started_at or _utcnow()
+    job.heartbeat_at = _utcnow()
+    job.claim_token = uuid.uuid4().hex
+    db.commit()
+    return job
+
+
+def _touch_heartbeat(db: Session, job_id: int, claim_token: str) -> None:
+    """Refresh the heartbeat if claim_token still holds the job (does not commit); raises JobLost otherwise"""
+    updated = db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, IngestionJob.claim_token == claim_token)
+        .values(heartbeat_at=_utcnow()),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    if not updated:
+        raise JobLost(f"Ingestion job {job_id} was reclaimed by another worker")
+
+
+class JobHeartbeat:
+    """
+    Refreshes a claimed job's heartbeat every interval seconds from a background
+    thread, so long runs of rejected rows or a slow chunk do not make the job
+    look abandoned. Sets lost once the job has been reclaimed.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], job_id: int, claim_token: str, interval: float):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self.claim_token = claim_token
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"ingest-heartbeat-{job_id}", daemon=True)
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.interval):
+            db = self.session_factory()
+            try:
+                _touch_heartbeat(db, self.job_id, self.claim_token)
+                db.commit()
+            except JobLost:
+                self.lost = True
+                return
+            except Exception as e:
+                logger.warning(f"Ingestion job {self.job_id} heartbeat failed: {str(e)}")
+            finally:
+                db.close()
+
+    def __enter__(self) -> "JobHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _record_progress(db: Session, job: IngestionJob, claim_token: str, result: IngestionResult) -> None:
+    _touch_heartbeat(db, job.id, claim_token)
+    job.bytes_processed = result.bytes_read
+    job.last_row = result.last_row
+    job.rows_processed = result.rows
+    job.rows_inserted = result.inserted
+    job.rows_updated = result.updated
+    job.rows_unchanged = result.unchanged
+    job.rows_rejected = result.rejected
+    job.errors = list(result.errors)
+
+
+def run_job(db: Session, job: IngestionJob, chunk_size: int = DEFAULT_CHUNK_SIZE) -> IngestionJob:
+    """
+    Load a claimed job's file, resuming after the last committed row.
+    Stops without further writes if another worker reclaims the job.
+    """
+    # Captured once: job is reloaded after each commit and would pick up a new owner's token
+    claim_token = job.claim_token
+    result = IngestionResult()
+    result.rows = job.rows_processed
+    result.inserted = job.rows_inserted
+    result.updated = job.rows_updated
+    result.unchanged = job.rows_unchanged
+    result.rejected = job.rows_rejected
+    result.errors = list(job.errors or [])
+    result.last_row = job.last_row
+
+    heartbeat = JobHeartbeat(sessionmaker(bind=db.get_bind()), job.id, claim_token,
+                             settings.INGESTION_JOB_HEARTBEAT_SECONDS)
+    try:
+        with heartbeat:
+            ingest_file(
+                db, job.file_path, job.file_format, job.bank_id, chunk_size,
+                result=result,
+                on_chunk=lambda chunk_db, progress: _record_progress(chunk_db, job, claim_token, progress),
+                resume_after_row=job.last_row,
+                mode=job.mode,
+            )
+        _record_progress(db, job, claim_token, result)
+    except JobLost as e:
+        db.rollback()
+        logger.warning(str(e))
+        return job
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"Ingestion job {job.id} failed")
+        try:
+            _touch_heartbeat(db, job.id, claim_token)
+        except JobLost:
+            db.rollback()
+            return job
+        job.status = IngestionJobStatus.FAILED
+        job.error_message = str(e)
+        job.finished_at = _utcnow()
+        db.commit()
+        return job
+
+    job.status = IngestionJobStatus.COMPLETED
+    job.finished_at = _utcnow()
+    db.commit()
+    try:
+        os.remove(job.file_path)
+    except OSError:
+        pass
+    return job
+
+
+def job_status(job: IngestionJob) -> Dict:
+    """Job counters plus derived progress, throughput and ETA"""
+    started_at = _as_utc(job.started_at)
+    finished_at = _as_utc(job.finished_at)
+    elapsed = ((finished_at or _utcnow()) - started_at).total_seconds() if started_at else 0.0
+    progress = min(job.bytes_processed / job.file_size, 1.0) if job.file_size else 1.0
+    if job.status == IngestionJobStatus.COMPLETED:
+        progress = 1.0
+
+    eta_seconds = None
+    if job.status == IngestionJobStatus.RUNNING and 0 < progress < 1 and elapsed > 0:
+        eta_seconds = round(elapsed * (1 - progress) / progress, 1)
+
+    return {
+        "id": job.id,
+        "bank_id": job.bank_id,
+        "status": job.status,
+        "file_format": job.file_format,
+        "mode": job.mode,
+        "file_size": job.file_size,
+        "bytes_processed": job.bytes_processed,
+        "rows_processed": job.rows_processed,
+        "rows_inserted": job.rows_inserted,
+        "rows_updated": job.rows_updated,
+        "rows_unchanged": job.rows_unchanged,
+        "rows_rejected": job.rows_rejected,
+        "errors": job.errors or [],
+        "error_message": job.error_message,
+        "progress": round(progress, 4),
+        "rows_per_second": round(job.rows_processed / elapsed, 1) if elapsed > 0 else 0.0,
+        "eta_seconds": eta_seconds,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def run_worker(poll_interval: float = 2.0, once: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               session_factory: Callable[[], Session] = SessionLocal) -> int:
+    """Process jobs until the queue is empty (once) or forever; returns jobs processed"""
+    processed = 0
+    while True:
+        db = session_factory()
+        try:
+            job = claim_next_job(db)
+            if job is not None:
+                print(f"[ingest] job {job.id}: {job.file_format} upload, {job.file_size} bytes", flush=True)
+                run_job(db, job, chunk_size)
+                processed += 1
+                print(
+                    f"[ingest] job {job.id} {job.status.value}: {job.rows_inserted} inserted, "
+                    f"{job.rows_updated} updated, {job.rows_unchanged} unchanged, {job.rows_rejected} rejected",
+                    flush=True,
+                )
+        finally:
+            db.close()
+
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+
+
+def main():
+    """Command line entry point for ingestion workers"""
+    parser = argparse.ArgumentParser(description="Process queued bulk credit data uploads")
+    parser.add_argument("--once", action="store_true", help="Exit when no queued jobs remain")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds to wait between polls when the queue is empty")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    processed = run_worker(poll_interval=args.poll_interval, once=args.once, chunk_size=args.chunk_size)
+    print(f"Processed {processed} ingestion jobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Background re-encryption after an encryption key rotation
+Walks every encrypted column in id order and rewrites values that are not yet
+under ENCRYPTION_KEY_VERSION. Batches are committed one at a time and
+paced to a target rows/second so the job can run against a live database;
+the keyset position is checkpointed with each batch, so an interrupted run
+resumes where it stopped.
+
+Usage: python -m app.services.reencryption [--rate ROWS_PER_SECOND] [--batch-size N] [--target NAME]
+       python -m app.services.reencryption --status
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+import argparse
+import logging
+import time
+from cryptography.fernet import InvalidToken
+from sqlalchemy import Column, and_, bindparam, select, update
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.consumer import Consumer
+from app.models.credit_account import CreditAccount
+from app.models.reencryption_checkpoint import ReencryptionCheckpoint
+from app.utils.security import ENCRYPTION_PARALLEL_THRESHOLD, get_keyring, rotate_many, rotate_sensitive_data
+
+logger = logging.getLogger(__name__)
+
+# Large enough for rotate_many to spread each batch over the crypto thread pool
+DEFAULT_BATCH_SIZE = 2 * ENCRYPTION_PARALLEL_THRESHOLD
+DEFAULT_RATE = 1000  # Rows per second
+
+# Every column holding encrypt_sensitive_data output
+TARGETS: Dict[str, Column] = {
+    "consumers.ssn_encrypted": Consumer.__table__.c.ssn_encrypted,
+    "credit_accounts.account_number_encrypted": CreditAccount.__table__.c.account_number_encrypted,
+}
+
+
+class Throttle:
+    """Sleeps as needed to keep average throughput at or below rate items per second"""
+
+    def __init__(self, rate: Optional[float], clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.clock = clock
+        self.sleep = sleep
+        self.started = clock()
+        self.done = 0
+
+    def wait(self, count: int) -> None:
+        self.done += count
+        if not self.rate:
+            return
+        delay = self.started + self.done / self.rate - self.clock()
+        if delay > 0:
+            self.sleep(delay)
+
+
+def _get_checkpoint(db: Session, target: str, key_version: int) -> ReencryptionCheckpoint:
+    checkpoint = db.query(ReencryptionCheckpoint).filter(
+        ReencryptionCheckpoint.target == target,
+        ReencryptionCheckpoint.key_version == key_version,
+    ).first()
+    if checkpoint is None:
+        checkpoint = ReencryptionCheckpoint(
+            target=target, key_version=key_version, last_id=0,
+            rows_scanned=0, rows_reencrypted=0, rows_failed=0,
+        )
+        db.add(checkpoint)
+        db.commit()
+    return checkpoint
+
+
+def _rotate_batch(values: List[str]) -> List[Optional[str]]:
+    """Re-encrypt values, leaving None for any that no configured key can decrypt"""
+    try:
+        return rotate_many(values)
+    except InvalidToken:
+        rotated = []
+        for value in values:
+            try:
+                rotated.append(rotate_sensitive_data(value))
+            except InvalidToken:
+                rotated.append(None)
+        return rotated
+
+
+def reencrypt_target(db: Session, target: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                     throttle: Optional[Throttle] = None) -> ReencryptionCheckpoint:
+    """Re-encrypt one column, resuming from its checkpoint for the current key version"""
+    column = TARGETS[target]
+    table = column.table
+    keyring = get_keyring()
+    checkpoint = _get_checkpoint(db, target, keyring.current_version)
+    if checkpoint.finished_at is not None:
+        return checkpoint
+
+    # Compare-and-swap: a row rewritten by the application since it was read keeps the newer value
+    swap = update(table).where(
+        and_(table.c.id == bindparam("_id"), column == bindparam("_old"))
+    ).values({column.key: bindparam("_new")})
+
+    while True:
+        rows: List[Tuple[int, str]] = db.execute(
+            select(table.c.id, column).where(table.c.id > checkpoint.last_id).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        stale = [(row_id, value) for row_id, value in rows if not keyring.is_current(value)]
+        rotated = _rotate_batch([value for _, value in stale])
+        params = [
+            {"_id": row_id, "_old": old, "_new": new}
+            for (row_id, old), new in zip(stale, rotated) if new is not None
+        ]
+        swapped = 0
+        if params:
+            db.execute(swap, params)
+            # executemany rowcounts are not reliable on every driver, so count the swaps that landed
+            written = {param["_id"]: param["_new"] for param in params}
+            swapped = sum(
+                1 for row_id, value in db.execute(select(table.c.id, column).where(table.c.id.in_(list(written))))
+                if written[row_id] == value
+            )
+        checkpoint.last_id = rows[-1][0]
+        checkpoint.rows_scanned += len(rows)
+        checkpoint.rows_reencrypted += swapped
+        checkpoint.rows_failed += len(stale) - len(params)
+        db.commit()
+
+        if throttle is not None:
+            throttle.wait(len(rows))
+
+    # Rows created from here on are written under the current key by the application itself
+    checkpoint.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(checkpoint)
+    if checkpoint.rows_failed:
+        logger.warning(f"Re-encryption of {target}: {checkpoint.rows_failed} values could not be decrypted")
+    return checkpoint
+
+
+def reencrypt_all(targets: Optional[List[str]] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                  rate: Optional[float] = DEFAULT_RATE,
+                  session_factory: Callable[[], Session] = SessionLocal) -> List[ReencryptionCheckpoint]:
+    """Re-encrypt every target column; rate is shared across targets (None for unthrottled)"""
+    throttle = Throttle(rate)
+    checkpoints = []
+    db = session_factory()
+    try:
+        for target in targets or list(TARGETS):
+            checkpoints.append(reencrypt_target(db, target, batch_size, throttle))
+    finally:
+        db.close()
+    return checkpoints
+
+
+def _report(checkpoint: ReencryptionCheckpoint) -> None:
+    state = "done" if checkpoint.finished_at else f"in progress (last id {checkpoint.last_id})"
+    print(
+        f"{checkpoint.target} -> v{checkpoint.key_version}: {state}, {checkpoint.rows_scanned} scanned, "
+        f"{checkpoint.rows_reencrypted} re-encrypted, {checkpoint.rows_failed} undecryptable"
+    )
+
+
+def main():
+    """Command line entry point for re-encryption"""
+    parser = argparse.ArgumentParser(description="Re-encrypt sensitive data under the current encryption key")
+    parser.add_argument("--target", action="append", choices=list(TARGETS),
+                        help="Column to re-encrypt (repeatable; default all)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="Maximum rows per second; 0 disables throttling")
+    parser.add_argument("--status", action="store_true", help="Show checkpoints and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        db = SessionLocal()
+        try:
+            for checkpoint in db.query(ReencryptionCheckpoint).order_by(ReencryptionCheckpoint.id).all():
+                _report(checkpoint)
+        finally:
+            db.close()
+        return
+
+    for checkpoint in reencrypt_all(args.target, args.batch_size, args.rate or None):
+        _report(checkpoint)
+
+
+if __name__ == "__main__":
+    main()
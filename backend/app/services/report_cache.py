@@ -0,0 +1,141 @@
+"""
+Credit report result cache
+The computed contents of a report (score, factors, report data) are cached per
+consumer under a data-version stamp. Any change to a consumer's accounts,
+freeze state or consents bumps the version, so stale entries are never read
+again and simply age out of the LRU. Each request still stores its own
+CreditReport row.
+
+Tiers: an in-process TTL/LRU cache, backed by Redis when USE_REDIS is set so
+versions and entries are shared between workers. Versions must be shared for
+an invalidation in one process (an API worker, ingestion, rescoring) to reach
+the others, so without Redis the cache is off unless REPORT_CACHE_SINGLE_PROCESS
+says everything runs in one process.
+"""
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+import json
+import logging
+import threading
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "report_cache:version:{consumer_id}"
+ENTRY_KEY = "report_cache:report:{consumer_id}:{version}"
+
+
+class ReportCache:
+    """Two-tier cache of computed report contents keyed by (consumer_id, version)"""
+
+    def __init__(self, maxsize: int, ttl: int, single_process: bool = False):
+        self.ttl = ttl
+        self.single_process = single_process
+        self._local = TTLCache(maxsize, ttl)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.redis_hits = 0
+
+    def current_version(self, consumer_id: int) -> int:
+        """Data-version stamp; read it before loading the data a report is built from"""
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return int(client.get(VERSION_KEY.format(consumer_id=consumer_id)) or 0)
+            except Exception as e:
+                logger.warning(f"Report cache version lookup failed: {str(e)}")
+        return self._versions.get(consumer_id, 0)
+
+    def enabled(self) -> bool:
+        """Only with versions shared through Redis, or when one process does all the invalidating"""
+        return self.single_process or get_redis_client() is not None
+
+    def get(self, consumer_id: int, version: int) -> Optional[Dict[str, Any]]:
+        """Return the cached report contents for this data version, if any"""
+        if not self.enabled():
+            return None
+        report = self._local.get((consumer_id, version))
+        if report is not None:
+            return report
+
+        client = get_redis_client()
+        if client is None:
+            return None
+        try:
+            payload = client.get(ENTRY_KEY.format(consumer_id=consumer_id, version=version))
+        except Exception as e:
+            logger.warning(f"Report cache read failed: {str(e)}")
+            return None
+        if payload is None:
+            return None
+        report = json.loads(payload)
+        self.redis_hits += 1
+        self._local.set((consumer_id, version), report)
+        return report
+
+    def set(self, consumer_id: int, version: int, report: Dict[str, Any],
+            expires_at: Optional[datetime] = None) -> None:
+        """Cache a JSON-serializable report, never beyond the report's own expiry"""
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, int((expires_at - datetime.utcnow()).total_seconds()))
+        # Scores depend on the scoring date, so nothing outlives the current day
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        ttl = min(ttl, int((midnight - now).total_seconds()))
+        if ttl <= 0 or not self.enabled():
+            return
+
+        self._local.set((consumer_id, version), report, ttl)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.set(ENTRY_KEY.format(consumer_id=consumer_id, version=version), json.dumps(report), ex=ttl)
+            except Exception as e:
+                logger.warning(f"Report cache write failed: {str(e)}")
+
+    def invalidate(self, consumer_id: int) -> None:
+        """Bump the consumer's data version; call after the change is committed"""
+        with self._lock:
+            old_version = self._versions.get(consumer_id, 0)
+            self._versions[consumer_id] = old_version + 1
+        self._local.delete((consumer_id, old_version))
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.incr(VERSION_KEY.format(consumer_id=consumer_id))
+            except Exception as e:
+                logger.warning(f"Report cache invalidation failed: {str(e)}")
+
+    def clear(self) -> None:
+        """Drop every local entry and version (Redis entries age out on their TTL)"""
+        with self._lock:
+            self._local.clear()
+            self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for both tiers"""
+        local = self._local.stats()
+        return {
+            "local_hits": local["hits"],
+            "redis_hits": self.redis_hits,
+            "misses": local["misses"] - self.redis_hits,
+            "size": local["size"],
+            "maxsize": local["maxsize"],
+            "redis_enabled": get_redis_client() is not None,
+            "enabled": self.enabled(),
+        }
+
+
+report_cache = ReportCache(
+    settings.REPORT_CACHE_SIZE, settings.REPORT_CACHE_TTL_SECONDS, settings.REPORT_CACHE_SINGLE_PROCESS
+)
+
+
+def invalidate_consumer_reports(*consumer_ids: int) -> None:
+    """Invalidate cached reports after a consumer's report inputs change"""
+    for consumer_id in set(consumer_ids):
+        report_cache.invalidate(consumer_id)
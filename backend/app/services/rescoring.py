@@ -0,0 +1,354 @@
+"""
+Batch rescoring of the full consumer book
+Streams credit accounts ordered by consumer, scores them in vectorized chunks
+and bulk-inserts the results into credit_score_snapshots.
+
+Incremental mode rescores only consumers queued in scoring_dirty_consumers
+and keeps consumer_scores current.
+
+Usage: python -m app.services.rescoring [--chunk-size N] [--workers N]
+       python -m app.services.rescoring --incremental [--interval SECONDS] [--mark-all]
+"""
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import time
+import uuid
+from sqlalchemy import select, insert, delete, func, tuple_
+from sqlalchemy.orm import Session
+from app.database import SessionLocal, engine, dialect_insert
+from app.models.consumer import Consumer
+from app.models.consumer_score import ConsumerScore, DirtyConsumer
+from app.models.credit_account import CreditAccount
+from app.models.credit_score_snapshot import CreditScoreSnapshot
+from app.services.scoring_queue import mark_all_consumers_dirty
+from app.utils.batch_scoring import CreditAccountBatch, score_batch
+
+DEFAULT_CHUNK_SIZE = 5000
+SHARDS_PER_WORKER = 4  # Extra shards keep workers busy when id ranges are uneven
+
+
+class RescoreStats:
+    """Counters for a rescoring run"""
+
+    def __init__(self, consumers: int = 0, accounts: int = 0, elapsed: float = 0.0):
+        self.consumers = consumers
+        self.accounts = accounts
+        self.elapsed = elapsed
+
+    def merge(self, other: "RescoreStats") -> None:
+        """Add another run's counters (elapsed time is tracked by the caller)"""
+        self.consumers += other.consumers
+        self.accounts += other.accounts
+
+    @property
+    def rows_per_second(self) -> float:
+        """Account rows scored per second"""
+        return self.accounts / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.consumers} consumers, {self.accounts} accounts in {self.elapsed:.1f}s "
+            f"({self.rows_per_second:,.0f} rows/sec)"
+        )
+
+
+ACCOUNT_SCORING_COLUMNS = (
+    CreditAccount.consumer_id,
+    CreditAccount.payment_status,
+    CreditAccount.current_balance,
+    CreditAccount.credit_limit,
+    CreditAccount.open_date,
+    CreditAccount.close_date,
+    CreditAccount.account_type,
+    CreditAccount.account_status,
+)
+
+
+def _account_stream_query(min_consumer_id: Optional[int] = None, max_consumer_id: Optional[int] = None):
+    """Every consumer with its accounts (if any), ordered by consumer"""
+    query = select(
+        Consumer.id.label("scored_consumer_id"),
+        CreditAccount.id.label("account_id"),
+        *ACCOUNT_SCORING_COLUMNS,
+    ).outerjoin(
+        CreditAccount, CreditAccount.consumer_id == Consumer.id
+    ).order_by(Consumer.id, CreditAccount.id)
+
+    # Half-open consumer id range [min_consumer_id, max_consumer_id)
+    if min_consumer_id is not None:
+        query = query.where(Consumer.id >= min_consumer_id)
+    if max_consumer_id is not None:
+        query = query.where(Consumer.id < max_consumer_id)
+    return query
+
+
+def group_account_rows(rows: Iterable, chunk_size: int) -> Iterator[Tuple[List[int], List]]:
+    """
+    Group rows ordered by consumer into (consumer_ids, account_rows) chunks.
+    A chunk is closed once it holds at least chunk_size rows and never splits a consumer.
+    """
+    consumer_ids: List[int] = []
+    accounts: List = []
+    row_count = 0
+
+    for row in rows:
+        consumer_id = row.scored_consumer_id
+        if not consumer_ids or consumer_ids[-1] != consumer_id:
+            if row_count >= chunk_size:
+                yield consumer_ids, accounts
+                consumer_ids, accounts, row_count = [], [], 0
+            consumer_ids.append(consumer_id)
+        if row.account_id is not None:
+            accounts.append(row)
+        row_count += 1
+
+    if consumer_ids:
+        yield consumer_ids, accounts
+
+
+def score_chunk(consumer_ids: List[int], accounts: List, as_of: date, run_id: str) -> List[dict]:
+    """Score one chunk and build credit_score_snapshots rows"""
+    result = score_batch(CreditAccountBatch.from_accounts(accounts), as_of, consumer_ids)
+    return [
+        {
+            "run_id": run_id,
+            "consumer_id": consumer_id,
+            "credit_score": score["score"],
+            "score_factors": score["factors"],
+            "as_of_date": as_of,
+        }
+        for consumer_id, score in result.items()
+    ]
+
+
+def rescore_all(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    as_of: Optional[date] = None,
+    run_id: Optional[str] = None,
+    min_consumer_id: Optional[int] = None,
+    max_consumer_id: Optional[int] = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+    progress: bool = True,
+) -> RescoreStats:
+    """
+    Rescore every consumer (optionally limited to a consumer id range).
+    Accounts are read through a server-side cursor so memory stays flat;
+    results are written through a separate session committed per chunk.
+    """
+    as_of = as_of or date.today()
+    run_id = run_id or uuid.uuid4().hex
+    stats = RescoreStats()
+    started = time.perf_counter()
+
+    read_db = session_factory()
+    write_db = session_factory()
+    try:
+        rows = read_db.execute(
+            _account_stream_query(min_consumer_id, max_consumer_id).execution_options(yield_per=chunk_size)
+        )
+        for consumer_ids, accounts in group_account_rows(rows, chunk_size):
+            snapshots = score_chunk(consumer_ids, accounts, as_of, run_id)
+            write_db.execute(insert(CreditScoreSnapshot), snapshots)
+            write_db.commit()
+
+            stats.consumers += len(consumer_ids)
+            stats.accounts += len(accounts)
+            stats.elapsed = time.perf_counter() - started
+            if progress:
+                print(f"[rescore {run_id[:8]}] {stats}", flush=True)
+    finally:
+        read_db.close()
+        write_db.close()
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def shard_consumer_ids(min_id: int, max_id: int, shards: int) -> List[Tuple[int, int]]:
+    """Split the inclusive consumer id range into contiguous half-open shards"""
+    span = max_id - min_id + 1
+    shards = max(1, min(shards, span))
+    bounds = [min_id + (span * index) // shards for index in range(shards + 1)]
+    return [(bounds[index], bounds[index + 1]) for index in range(shards)]
+
+
+def _init_worker():
+    """Drop pooled connections inherited from the parent process"""
+    engine.dispose(close=False)
+
+
+def _rescore_shard(min_consumer_id: int, max_consumer_id: int, chunk_size: int,
+                   as_of: date, run_id: str) -> RescoreStats:
+    """Process pool task: rescore one shard with this worker's own sessions"""
+    return rescore_all(
+        chunk_size=chunk_size,
+        as_of=as_of,
+        run_id=run_id,
+        min_consumer_id=min_consumer_id,
+        max_consumer_id=max_consumer_id,
+        progress=False,
+    )
+
+
+def rescore_parallel(
+    workers: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    as_of: Optional[date] = None,
+    run_id: Optional[str] = None,
+    progress: bool = True,
+) -> RescoreStats:
+    """
+    Rescore every consumer across a process pool.
+    The consumer id space is split into shards; all shards share one run_id and
+    as_of date, so the snapshots are identical to a single-process run.
+    """
+    as_of = as_of or date.today()
+    run_id = run_id or uuid.uuid4().hex
+    stats = RescoreStats()
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        min_id, max_id = db.execute(select(func.min(Consumer.id), func.max(Consumer.id))).one()
+    finally:
+        db.close()
+    if min_id is None:
+        return stats
+
+    shards = shard_consumer_ids(min_id, max_id, workers * SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [
+            pool.submit(_rescore_shard, low, high, chunk_size, as_of, run_id)
+            for low, high in shards
+        ]
+        for completed, future in enumerate(as_completed(futures), start=1):
+            stats.merge(future.result())
+            stats.elapsed = time.perf_counter() - started
+            if progress:
+                print(f"[rescore {run_id[:8]}] shard {completed}/{len(shards)} done, {stats}", flush=True)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def rescore_dirty(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    as_of: Optional[date] = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+    progress: bool = True,
+) -> RescoreStats:
+    """
+    Rescore only consumers queued in scoring_dirty_consumers and upsert their
+    consumer_scores rows. A queue entry is removed only if it was not re-marked
+    while its consumer was being scored.
+    """
+    as_of = as_of or date.today()
+    stats = RescoreStats()
+    started = time.perf_counter()
+    last_consumer_id = 0
+
+    db = session_factory()
+    try:
+        while True:
+            claimed = db.execute(
+                select(DirtyConsumer.consumer_id, DirtyConsumer.version)
+                .where(DirtyConsumer.consumer_id > last_consumer_id)
+                .order_by(DirtyConsumer.consumer_id)
+                .limit(chunk_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not claimed:
+                break
+
+            consumer_ids = [row.consumer_id for row in claimed]
+            accounts = db.execute(
+                select(*ACCOUNT_SCORING_COLUMNS)
+                .where(CreditAccount.consumer_id.in_(consumer_ids))
+                .order_by(CreditAccount.consumer_id, CreditAccount.id)
+            ).all()
+            result = score_batch(CreditAccountBatch.from_accounts(accounts), as_of, consumer_ids)
+
+            stmt = dialect_insert(db, ConsumerScore)
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ConsumerScore.consumer_id],
+                    set_={
+                        "credit_score": stmt.excluded.credit_score,
+                        "score_factors": stmt.excluded.score_factors,
+                        "as_of_date": stmt.excluded.as_of_date,
+                        "scored_at": func.now(),
+                    },
+                ),
+                [
+                    {
+                        "consumer_id": consumer_id,
+                        "credit_score": score["score"],
+                        "score_factors": score["factors"],
+                        "as_of_date": as_of,
+                    }
+                    for consumer_id, score in result.items()
+                ],
+            )
+            db.execute(
+                delete(DirtyConsumer).where(
+                    tuple_(DirtyConsumer.consumer_id, DirtyConsumer.version).in_(
+                        [(row.consumer_id, row.version) for row in claimed]
+                    )
+                )
+            )
+            db.commit()
+
+            last_consumer_id = consumer_ids[-1]
+            stats.consumers += len(consumer_ids)
+            stats.accounts += len(accounts)
+            stats.elapsed = time.perf_counter() - started
+            if progress:
+                print(f"[rescore incremental] {stats}", flush=True)
+    finally:
+        db.close()
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def main():
+    """Command line entry point for the nightly rescoring job"""
+    parser = argparse.ArgumentParser(description="Rescore every consumer in the bureau")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Account rows scored and inserted per chunk")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes; more than 1 enables sharded parallel rescoring")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Rescore only consumers whose accounts changed")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="With --incremental, keep running and poll every N seconds")
+    parser.add_argument("--mark-all", action="store_true",
+                        help="With --incremental, queue every consumer first (bootstraps consumer_scores)")
+    args = parser.parse_args()
+
+    if args.incremental:
+        if args.mark_all:
+            db = SessionLocal()
+            try:
+                mark_all_consumers_dirty(db)
+            finally:
+                db.close()
+        while True:
+            stats = rescore_dirty(chunk_size=args.chunk_size)
+            print(f"Incremental rescoring complete: {stats}")
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+        return
+
+    if args.workers > 1:
+        stats = rescore_parallel(workers=args.workers, chunk_size=args.chunk_size)
+    else:
+        stats = rescore_all(chunk_size=args.chunk_size)
+    print(f"Rescoring complete: {stats}")
+
+
+if __name__ == "__main__":
+    main()
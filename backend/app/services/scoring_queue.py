@@ -0,0 +1,36 @@
+"""
+Change tracking for incremental rescoring
+Write paths mark consumers dirty in the same transaction as their account changes;
+app.services.rescoring.rescore_dirty consumes the queue.
+"""
+from typing import Iterable
+from sqlalchemy import select, insert, func
+from sqlalchemy.orm import Session
+from app.database import dialect_insert
+from app.models.consumer import Consumer
+from app.models.consumer_score import DirtyConsumer
+
+
+def mark_consumers_dirty(db: Session, consumer_ids: Iterable[int]) -> None:
+    """Queue consumers for rescoring (does not commit)"""
+    rows = [{"consumer_id": consumer_id, "version": 1} for consumer_id in sorted(set(consumer_ids))]
+    if not rows:
+        return
+    stmt = dialect_insert(db, DirtyConsumer)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DirtyConsumer.consumer_id],
+        set_={"version": DirtyConsumer.version + 1, "marked_at": func.now()},
+    )
+    db.execute(stmt, rows)
+
+
+def mark_all_consumers_dirty(db: Session) -> None:
+    """Queue every consumer that is not already queued (used to bootstrap consumer_scores)"""
+    queued = select(DirtyConsumer.consumer_id)
+    db.execute(
+        insert(DirtyConsumer).from_select(
+            ["consumer_id"],
+            select(Consumer.id).where(Consumer.id.not_in(queued)),
+        )
+    )
+    db.commit()
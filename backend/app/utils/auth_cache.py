@@ -0,0 +1,219 @@
+"""
+Per-worker caches for request authentication
+Verified access token claims are cached by token digest until the token
+expires, and user principals by user id, so an authenticated request normally
+needs neither a JWT decode nor a users query. Principals live at most
+AUTH_CACHE_TTL_SECONDS; user changes made through the API invalidate them at once.
+With USE_REDIS that reaches every worker: cached principals carry a per-user
+version kept in Redis, checked on each use through the redis.asyncio client. Without Redis, other workers can
+serve a changed user's old principal until its TTL runs out.
+
+With AUTH_LIGHTWEIGHT_PRINCIPAL the principal is taken from the token claims
+instead, and revocation is checked against a token version denylist that is
+shared through Redis when USE_REDIS is set.
+"""
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+from fastapi import Request
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.user import User, UserRole
+from app.utils.cache import TTLCache
+from app.utils.redis_client import get_async_redis_client, get_redis_client
+from app.utils.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+DENYLIST_KEY = "auth:min_token_version:{user_id}"
+PRINCIPAL_VERSION_KEY = "auth:principal_version:{user_id}"
+
+# Columns that are never needed to authorize a request
+_PRINCIPAL_EXCLUDED = {"password_hash", "two_factor_secret"}
+_PRINCIPAL_COLUMNS = [c.key for c in User.__table__.columns if c.key not in _PRINCIPAL_EXCLUDED]
+
+token_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+principal_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """verify_token(token, "access"), reusing earlier verifications of the same token"""
+    if settings.AUTH_CACHE_TTL_SECONDS <= 0:
+        return verify_token(token, "access")
+    digest = _token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = verify_token(token, "access")
+        if payload is None:
+            return None
+        lifetime = min(settings.AUTH_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+        if lifetime > 0:
+            token_cache.set(digest, payload, lifetime)
+    return payload
+
+
+def get_request_token_payload(request: Request) -> Optional[Dict[str, Any]]:
+    """Access token claims for this request, decoded at most once and kept on request.state"""
+    if hasattr(request.state, "token_payload"):
+        return request.state.token_payload
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    payload = verify_access_token(token) if scheme.lower() == "bearer" and token else None
+    request.state.token_payload = payload
+    return payload
+
+
+async def _principal_version(user_id: int) -> Optional[int]:
+    """Shared version of the user's principal; 0 without Redis, None when Redis cannot be read"""
+    client = get_async_redis_client()
+    if client is None:
+        return 0
+    try:
+        return int(await client.get(PRINCIPAL_VERSION_KEY.format(user_id=user_id)) or 0)
+    except Exception as e:
+        logger.warning(f"Principal version lookup failed: {str(e)}")
+        return None
+
+
+async def get_user_principal(db: Session, user_id: int) -> Optional[User]:
+    """
+    Detached User built from the cached principal, loading it on a miss.
+    The instance is not attached to db; endpoints that modify the user must query it.
+    """
+    # Read before loading the user, so a change committed meanwhile leaves the entry stale, not trusted
+    version = await _principal_version(user_id) if settings.AUTH_CACHE_TTL_SECONDS > 0 else None
+    cached = principal_cache.get(user_id) if version is not None else None
+    if cached is not None and cached[0] == version:
+        values = cached[1]
+    else:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        values = {key: getattr(user, key) for key in _PRINCIPAL_COLUMNS}
+        if version is not None:
+            principal_cache.set(user_id, (version, values))
+    return User(**values)
+
+
+def invalidate_user(*user_ids: int) -> None:
+    """Drop cached principals after a user is changed or deleted, in every worker when Redis is on"""
+    client = get_redis_client()
+    for user_id in user_ids:
+        principal_cache.delete(user_id)
+        if client is not None:
+            try:
+                key = PRINCIPAL_VERSION_KEY.format(user_id=user_id)
+                client.incr(key)
+                # Outlives every entry cached under the old version
+                client.expire(key, max(settings.AUTH_CACHE_TTL_SECONDS, 1) * 2)
+            except Exception as e:
+                logger.warning(f"Principal invalidation failed: {str(e)}")
+
+
+def access_token_claims(user: User) -> Dict[str, Any]:
+    """Access token claims; role, bank_id and ver carry the lightweight principal"""
+    return {
+        "sub": user.id,
+        "email": user.email,
+        "role": user.role.value,
+        "bank_id": user.bank_id,
+        "ver": user.token_version,
+    }
+
+
+class Principal:
+    """Authenticated user as described by access token claims, without a database row"""
+
+    is_active = True
+
+    def __init__(self, id: int, email: Optional[str], role: UserRole, bank_id: Optional[int], token_version: int):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.bank_id = bank_id
+        self.token_version = token_version
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> Optional["Principal"]:
+        """Principal for tokens issued with access_token_claims, None for older tokens"""
+        try:
+            return cls(
+                id=int(payload["sub"]),
+                email=payload.get("email"),
+                role=UserRole(payload["role"]),
+                bank_id=payload.get("bank_id"),
+                token_version=int(payload["ver"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def __repr__(self):
+        return f"<Principal(id={self.id}, role={self.role}, bank_id={self.bank_id})>"
+
+
+class TokenDenylist:
+    """
+    Minimum accepted token version per user. Entries only need to outlive the
+    access tokens they revoke, so they expire after ACCESS_TOKEN_EXPIRE_MINUTES.
+    """
+
+    def __init__(self):
+        self._local: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id: int, min_version: int) -> None:
+        """Reject this user's tokens with a version below min_version"""
+        ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        now = time.monotonic()
+        with self._lock:
+            self._local = {uid: entry for uid, entry in self._local.items() if entry[1] > now}
+            self._local[user_id] = (min_version, now + ttl)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.set(DENYLIST_KEY.format(user_id=user_id), min_version, ex=ttl)
+            except Exception as e:
+                logger.warning(f"Token denylist write failed: {str(e)}")
+
+    async def is_revoked(self, user_id: int, version: int) -> bool:
+        client = get_async_redis_client()
+        if client is not None:
+            try:
+                return version < int(await client.get(DENYLIST_KEY.format(user_id=user_id)) or 0)
+            except Exception as e:
+                logger.warning(f"Token denylist lookup failed: {str(e)}")
+        entry = self._local.get(user_id)
+        return entry is not None and entry[1] > time.monotonic() and version < entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+token_denylist = TokenDenylist()
+
+
+async def get_token_principal(payload: Dict[str, Any]) -> Optional[Principal]:
+    """
+    Lightweight principal for a verified token. None when the token predates
+    these claims or the user has changed since it was issued; the caller then
+    checks the user's current state in the database.
+    """
+    principal = Principal.from_claims(payload)
+    if principal is None:
+        return None
+    if await token_denylist.is_revoked(principal.id, principal.token_version):
+        return None
+    return principal
+
+
+def revoke_user_tokens(user: User) -> None:
+    """Bump the user's token version so access tokens issued before now stop working"""
+    user.token_version = (user.token_version or 1) + 1
+    token_denylist.revoke(user.id, user.token_version)
@@ -0,0 +1,338 @@
+"""
+Vectorized batch credit scoring
+Columnar counterpart of app.utils.credit_scoring for rescoring many consumers at once
+"""
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from datetime import date, timedelta
+import numpy as np
+from app.models.credit_account import AccountType, AccountStatus, PaymentStatus
+
+# Integer codes used by the columnar snapshot (enum declaration order)
+PAYMENT_STATUS_CODES = {status: code for code, status in enumerate(PaymentStatus)}
+ACCOUNT_STATUS_CODES = {status: code for code, status in enumerate(AccountStatus)}
+ACCOUNT_TYPE_CODES = {account_type: code for code, account_type in enumerate(AccountType)}
+UNKNOWN_PAYMENT_STATUS = len(PAYMENT_STATUS_CODES)
+
+# Payment history points per payment status (see calculate_payment_history_score)
+PAYMENT_STATUS_POINTS = {
+    PaymentStatus.CURRENT: 100.0,
+    PaymentStatus.LATE_30: 70.0,
+    PaymentStatus.LATE_60: 50.0,
+    PaymentStatus.LATE_90: 30.0,
+    PaymentStatus.LATE_120_PLUS: 10.0,
+    PaymentStatus.NO_PAYMENT: 0.0,
+}
+DEFAULT_PAYMENT_POINTS = 50.0
+PAYMENT_POINTS = np.array(
+    [PAYMENT_STATUS_POINTS.get(status, DEFAULT_PAYMENT_POINTS) for status in PaymentStatus]
+    + [DEFAULT_PAYMENT_POINTS]
+)
+
+CLOSED_ACCOUNT_RETENTION_DAYS = 2555  # 7 years
+NEW_CREDIT_WINDOW_DAYS = 180
+NO_DATE = 0  # Ordinal used for missing close dates
+
+NO_HISTORY = 0
+NO_ACTIVE_HISTORY = 1
+SCORED = 2
+
+
+class CreditAccountBatch:
+    """Columnar, NumPy-backed snapshot of credit accounts for many consumers"""
+
+    def __init__(
+        self,
+        consumer_id,
+        payment_status,
+        balance,
+        credit_limit,
+        open_date,
+        close_date,
+        account_type,
+        account_status,
+    ):
+        self.consumer_id = np.asarray(consumer_id, dtype=np.int64)
+        self.payment_status = np.asarray(payment_status, dtype=np.int64)
+        self.balance = np.asarray(balance, dtype=np.float64)
+        self.credit_limit = np.asarray(credit_limit, dtype=np.float64)
+        self.open_date = np.asarray(open_date, dtype=np.int64)
+        self.close_date = np.asarray(close_date, dtype=np.int64)
+        self.account_type = np.asarray(account_type, dtype=np.int64)
+        self.account_status = np.asarray(account_status, dtype=np.int64)
+
+        size = len(self.consumer_id)
+        for name in ("payment_status", "balance", "credit_limit", "open_date",
+                     "close_date", "account_type", "account_status"):
+            if len(getattr(self, name)) != size:
+                raise ValueError(f"Column '{name}' does not match consumer_id length")
+
+    def __len__(self) -> int:
+        return len(self.consumer_id)
+
+    @classmethod
+    def from_accounts(cls, accounts: Iterable) -> "CreditAccountBatch":
+        """
+        Build a batch from CreditAccount objects or rows exposing the same attributes
+        (consumer_id, payment_status, current_balance, credit_limit, open_date,
+        close_date, account_type, account_status)
+        """
+        columns = ([], [], [], [], [], [], [], [])
+        for acc in accounts:
+            columns[0].append(acc.consumer_id)
+            columns[1].append(PAYMENT_STATUS_CODES.get(acc.payment_status, UNKNOWN_PAYMENT_STATUS))
+            columns[2].append(float(acc.current_balance or 0))
+            columns[3].append(float(acc.credit_limit or 0))
+            columns[4].append(acc.open_date.toordinal())
+            columns[5].append(acc.close_date.toordinal() if acc.close_date else NO_DATE)
+            columns[6].append(ACCOUNT_TYPE_CODES[AccountType(acc.account_type)])
+            columns[7].append(ACCOUNT_STATUS_CODES[AccountStatus(acc.account_status)])
+        return cls(*columns)
+
+
+class ConsumerAggregates:
+    """Per-consumer scoring inputs reduced from a CreditAccountBatch"""
+
+    def __init__(
+        self,
+        consumer_id,
+        account_count,
+        active_count,
+        payment_points,
+        total_balance,
+        total_limit,
+        oldest_open_date,
+        account_type_mask,
+        recent_count,
+    ):
+        self.consumer_id = np.asarray(consumer_id, dtype=np.int64)
+        self.account_count = np.asarray(account_count, dtype=np.int64)
+        self.active_count = np.asarray(active_count, dtype=np.int64)
+        self.payment_points = np.asarray(payment_points, dtype=np.float64)
+        self.total_balance = np.asarray(total_balance, dtype=np.float64)
+        self.total_limit = np.asarray(total_limit, dtype=np.float64)
+        self.oldest_open_date = np.asarray(oldest_open_date, dtype=np.int64)
+        self.account_type_mask = np.asarray(account_type_mask, dtype=np.int64)
+        self.recent_count = np.asarray(recent_count, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.consumer_id)
+
+
+class BatchScoreResult:
+    """Scores and factor percentages for every consumer in a batch"""
+
+    def __init__(self, consumer_id, status, score, payment_history, utilization,
+                 history_length, credit_mix, new_credit):
+        self.consumer_id = consumer_id
+        self.status = status
+        self.score = score
+        self.payment_history = payment_history
+        self.utilization = utilization
+        self.history_length = history_length
+        self.credit_mix = credit_mix
+        self.new_credit = new_credit
+
+    def __len__(self) -> int:
+        return len(self.consumer_id)
+
+    def result_at(self, index: int) -> Dict:
+        """Return the result for one consumer in calculate_credit_score format"""
+        status = self.status[index]
+        if status == NO_HISTORY:
+            return {
+                "score": 0,
+                "factors": {
+                    "payment_history": "No credit history",
+                    "credit_utilization": "No credit history",
+                    "length_of_history": "No credit history",
+                    "credit_mix": "No credit history",
+                    "new_credit": "No credit history"
+                }
+            }
+        if status == NO_ACTIVE_HISTORY:
+            return {
+                "score": 0,
+                "factors": {"message": "No active credit history"}
+            }
+        return {
+            "score": int(self.score[index]),
+            "factors": {
+                "payment_history": f"{float(self.payment_history[index]):.1f}%",
+                "credit_utilization": f"{float(self.utilization[index]):.1f}%",
+                "length_of_history": f"{float(self.history_length[index]):.1f}%",
+                "credit_mix": f"{float(self.credit_mix[index]):.1f}%",
+                "new_credit": f"{float(self.new_credit[index]):.1f}%"
+            }
+        }
+
+    def items(self) -> Iterator[Tuple[int, Dict]]:
+        """Yield (consumer_id, result) pairs"""
+        for index in range(len(self)):
+            yield int(self.consumer_id[index]), self.result_at(index)
+
+
+def _group_index(batch: CreditAccountBatch, consumer_ids=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Map every account to the position of its consumer in the output arrays"""
+    if consumer_ids is None:
+        return np.unique(batch.consumer_id, return_inverse=True)
+
+    ids = np.asarray(consumer_ids, dtype=np.int64)
+    if len(batch) == 0:
+        return ids, np.zeros(0, dtype=np.int64)
+    if len(ids) == 0:
+        raise ValueError("Batch contains accounts for consumers not listed in consumer_ids")
+    sorter = np.argsort(ids, kind="stable")
+    positions = np.searchsorted(ids, batch.consumer_id, sorter=sorter)
+    inverse = sorter[np.minimum(positions, len(ids) - 1)]
+    if not np.array_equal(ids[inverse], batch.consumer_id):
+        raise ValueError("Batch contains accounts for consumers not listed in consumer_ids")
+    return ids, inverse
+
+
+def aggregate_accounts(
+    batch: CreditAccountBatch,
+    as_of: Optional[date] = None,
+    consumer_ids=None,
+) -> ConsumerAggregates:
+    """
+    Reduce a batch of accounts to per-consumer scoring inputs in one pass.
+    Closed accounts older than 7 years are excluded exactly as in calculate_credit_score.
+    """
+    as_of = as_of or date.today()
+    today = as_of.toordinal()
+    ids, inverse = _group_index(batch, consumer_ids)
+    size = len(ids)
+
+    active = (batch.account_status != ACCOUNT_STATUS_CODES[AccountStatus.CLOSED]) | (
+        (batch.close_date != NO_DATE) & (today - batch.close_date < CLOSED_ACCOUNT_RETENTION_DAYS)
+    )
+    recent_cutoff = (as_of - timedelta(days=NEW_CREDIT_WINDOW_DAYS)).toordinal()
+
+    # bincount accumulates in input order, so float sums match the scalar scorer
+    account_count = np.bincount(inverse, minlength=size)
+    active_count = np.bincount(inverse, weights=active, minlength=size)
+    payment_points = np.bincount(
+        inverse, weights=np.where(active, PAYMENT_POINTS[batch.payment_status], 0.0), minlength=size
+    )
+    total_balance = np.bincount(
+        inverse, weights=np.where(active, batch.balance, 0.0), minlength=size
+    )
+    total_limit = np.bincount(
+        inverse, weights=np.where(active, batch.credit_limit, 0.0), minlength=size
+    )
+    recent_count = np.bincount(
+        inverse, weights=active & (batch.open_date >= recent_cutoff), minlength=size
+    )
+
+    oldest_open_date = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(oldest_open_date, inverse[active], batch.open_date[active])
+
+    account_type_mask = np.zeros(size, dtype=np.int64)
+    np.bitwise_or.at(account_type_mask, inverse[active], np.left_shift(1, batch.account_type[active]))
+
+    return ConsumerAggregates(
+        consumer_id=ids,
+        account_count=account_count,
+        active_count=active_count,
+        payment_points=payment_points,
+        total_balance=total_balance,
+        total_limit=total_limit,
+        oldest_open_date=oldest_open_date,
+        account_type_mask=account_type_mask,
+        recent_count=recent_count,
+    )
+
+
+def _popcount(mask: np.ndarray) -> np.ndarray:
+    """Count set bits of small integer masks"""
+    counts = np.zeros(len(mask), dtype=np.int64)
+    for bit in range(len(ACCOUNT_TYPE_CODES)):
+        counts += (mask >> bit) & 1
+    return counts
+
+
+def score_aggregates(aggregates: ConsumerAggregates, as_of: Optional[date] = None) -> BatchScoreResult:
+    """Compute all five factor scores and the final 300-850 score for every consumer"""
+    as_of = as_of or date.today()
+    scored = aggregates.active_count > 0
+    active_count = np.where(scored, aggregates.active_count, 1)
+
+    # Payment History (35% of score)
+    payment_history = aggregates.payment_points / active_count
+
+    # Credit Utilization (30% of score)
+    has_limit = aggregates.total_limit != 0
+    ratio = np.divide(
+        aggregates.total_balance, aggregates.total_limit,
+        out=np.zeros(len(aggregates)), where=has_limit
+    )
+    utilization = np.where(has_limit, np.select(
+        [ratio <= 0.10, ratio <= 0.30, ratio <= 0.50, ratio <= 0.70, ratio <= 0.90],
+        [100.0, 90.0, 70.0, 50.0, 30.0],
+        default=10.0,
+    ), 50.0)
+
+    # Length of Credit History (15% of score)
+    oldest = np.where(scored, aggregates.oldest_open_date, as_of.toordinal())
+    years = (as_of.toordinal() - oldest) / 365.25
+    history_length = np.select(
+        [years >= 10, years >= 7, years >= 5, years >= 3, years >= 1],
+        [100.0, 85.0, 70.0, 55.0, 40.0],
+        default=20.0,
+    )
+
+    # Credit Mix (10% of score)
+    type_count = _popcount(aggregates.account_type_mask)
+    credit_mix = np.select(
+        [type_count >= 4, type_count == 3, type_count == 2],
+        [100.0, 80.0, 60.0],
+        default=40.0,
+    )
+
+    # New Credit (10% of score)
+    recent = aggregates.recent_count
+    new_credit = np.select(
+        [recent == 0, recent == 1, recent == 2, recent <= 3],
+        [100.0, 80.0, 60.0, 40.0],
+        default=20.0,
+    )
+
+    weighted_score = (
+        payment_history * 0.35 +
+        utilization * 0.30 +
+        history_length * 0.15 +
+        credit_mix * 0.10 +
+        new_credit * 0.10
+    )
+    final_score = np.trunc(300 + (weighted_score * 550)).astype(np.int64)
+    final_score = np.clip(final_score, 300, 850)
+
+    status = np.where(
+        aggregates.account_count == 0, NO_HISTORY,
+        np.where(scored, SCORED, NO_ACTIVE_HISTORY)
+    )
+
+    return BatchScoreResult(
+        consumer_id=aggregates.consumer_id,
+        status=status,
+        score=np.where(status == SCORED, final_score, 0),
+        payment_history=payment_history,
+        utilization=utilization,
+        history_length=history_length,
+        credit_mix=credit_mix,
+        new_credit=new_credit,
+    )
+
+
+def score_batch(
+    batch: CreditAccountBatch,
+    as_of: Optional[date] = None,
+    consumer_ids=None,
+) -> BatchScoreResult:
+    """
+    Score every consumer in a columnar account batch.
+    Pass consumer_ids to also report consumers that have no accounts in the batch.
+    Per-consumer results match calculate_credit_score for the same day.
+    """
+    as_of = as_of or date.today()
+    return score_aggregates(aggregate_accounts(batch, as_of, consumer_ids), as_of)
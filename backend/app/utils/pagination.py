@@ -0,0 +1,159 @@
+"""
+Keyset (cursor) pagination
+List endpoints order by a Keyset: one or more columns ending in a unique one.
+Each page returns an opaque next_cursor holding the sort key of its last row,
+and the next request continues with WHERE (key) < cursor instead of OFFSET, so
+every page costs the same index range scan however deep it is. skip/limit
+paging keeps working and uses the same order.
+
+Offset pages also report a total, from count_rows: an exact COUNT when the
+PostgreSQL planner expects fewer than COUNT_EXACT_THRESHOLD matching rows,
+otherwise the planner's estimate. Exact counts are cached per filter for
+COUNT_CACHE_TTL_SECONDS. meta.count_strategy says which one was used.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
+import binascii
+import json
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, and_, func, literal, select, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.orm import Query, Session
+from app.config import settings
+from app.utils.cache import TTLCache
+
+EXACT = "exact"
+CACHED = "cached"
+ESTIMATE = "estimate"
+
+count_cache = TTLCache(settings.COUNT_CACHE_SIZE, settings.COUNT_CACHE_TTL_SECONDS)
+
+
+class Keyset:
+    """Sort order for cursor pagination; the last column must be unique"""
+
+    def __init__(self, *columns, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+
+    def order_by(self) -> List:
+        return [column.desc() if self.descending else column.asc() for column in self.columns]
+
+    def encode(self, row: Any) -> str:
+        """Cursor pointing just past row"""
+        values = []
+        for column in self.columns:
+            value = getattr(row, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError("wrong number of values")
+            return [
+                datetime.fromisoformat(value) if isinstance(column.type, DateTime) else int(value)
+                for column, value in zip(self.columns, values)
+            ]
+        except (ValueError, TypeError, binascii.Error):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+
+    def after(self, cursor: str):
+        """Condition selecting the rows that follow cursor"""
+        values = self.decode(cursor)
+        key = tuple_(*self.columns)
+        bound = tuple_(*[literal(value, column.type) for column, value in zip(self.columns, values)])
+        # The redundant bound on the leading column lets PostgreSQL prune partitions
+        if self.descending:
+            return and_(self.columns[0] <= values[0], key < bound)
+        return and_(self.columns[0] >= values[0], key > bound)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, with its parameters bound as usual"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+def _hashable(value: Any) -> Any:
+    return tuple(_hashable(item) for item in value) if isinstance(value, (list, tuple)) else value
+
+
+def _cache_key(db: Session, statement) -> Tuple:
+    """Identifies a filter by its compiled SQL and parameter values; values are never inlined"""
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    return str(compiled), tuple(sorted((name, _hashable(value)) for name, value in compiled.params.items()))
+
+
+def estimate_rows(db: Session, statement) -> Optional[int]:
+    """PostgreSQL planner estimate of the rows statement returns; None on other databases"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    plan = db.connection().execute(Explain(statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(db: Session, query) -> Tuple[int, str]:
+    """
+    Total rows of a filtered list query (Query or Select) and the strategy used.
+    For an AsyncSession call it through db.run_sync(count_rows, query).
+    """
+    statement = (query.statement if isinstance(query, Query) else query).order_by(None)
+    try:
+        key = _cache_key(db, statement)
+        cached = count_cache.get(key)
+    except TypeError:
+        key = cached = None  # A parameter value that cannot be hashed; count without caching
+    if cached is not None:
+        return cached, CACHED
+    estimate = estimate_rows(db, statement)
+    if estimate is not None and estimate >= settings.COUNT_EXACT_THRESHOLD:
+        return estimate, ESTIMATE
+
+    total = db.execute(select(func.count()).select_from(statement.subquery())).scalar()
+    if key is not None:
+        count_cache.set(key, total)
+    return total, EXACT
+
+
+def paginate(query, keyset: Keyset, limit: int, skip: int = 0, cursor: Optional[str] = None):
+    """Order and window a Query or Select; fetches one extra row to tell whether more follow"""
+    query = query.order_by(*keyset.order_by())
+    if cursor:
+        query = query.where(keyset.after(cursor))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def page_meta(rows: List[Any], keyset: Keyset, limit: int, skip: int = 0, cursor: Optional[str] = None,
+              count: Optional[Tuple[int, str]] = None) -> Tuple[List[Any], Dict[str, Any]]:
+    """Trim the extra row fetched by paginate and build PaginationMeta; count comes from count_rows"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    total, count_strategy = count or (None, None)
+    meta = {
+        "page": None if cursor else skip // limit + 1,
+        "limit": limit,
+        "total": total,
+        "pages": None if total is None else (total + limit - 1) // limit,
+        "next_cursor": keyset.encode(rows[-1]) if has_more else None,
+        "has_more": has_more,
+        "count_strategy": count_strategy,
+    }
+    return rows, meta
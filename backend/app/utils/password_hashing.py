@@ -0,0 +1,113 @@
+"""
+Password hashing off the event loop
+bcrypt takes 100-300 ms of CPU per call. Async routes run it on a dedicated,
+bounded thread pool (the bcrypt extension releases the GIL while hashing), so
+a burst of logins queues up here instead of stalling every other request on
+the worker. When the queue is full, callers get 503 with Retry-After.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import threading
+import time
+from fastapi import HTTPException, status
+from app.config import settings
+from app.utils.security import get_password_hash, verify_password
+
+
+class PasswordHashPool:
+    """Bounded executor for bcrypt calls, with queue-depth metrics"""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _dequeue(self, ticket: Dict[str, bool]) -> bool:
+        """Release the call's queue slot once, whether it starts or is abandoned; call under _lock"""
+        if not ticket["queued"]:
+            return False
+        ticket["queued"] = False
+        self.queued -= 1
+        return True
+
+    def _run(self, func: Callable[..., Any], submitted: float, ticket: Dict[str, bool], *args) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            if not self._dequeue(ticket):
+                return None  # The caller was cancelled while waiting; skip the hash
+            self.running += 1
+            self.wait_seconds += started - submitted
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.run_seconds += time.perf_counter() - started
+
+    async def submit(self, func: Callable[..., Any], *args) -> Any:
+        """Run func(*args) on the pool; raises 503 when max_queue calls are already waiting"""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent sign-in requests, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        ticket = {"queued": True}
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), self._run, func, time.perf_counter(), ticket, *args
+            )
+        finally:
+            # A call cancelled before it started never reaches _run
+            with self._lock:
+                self._dequeue(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth and cumulative counters for this worker"""
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_wait_ms": round(self.wait_seconds / done * 1000, 2),
+                "avg_run_ms": round(self.run_seconds / done * 1000, 2),
+            }
+
+
+password_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+
+async def hash_password_async(password: str) -> str:
+    """get_password_hash on the password pool"""
+    return await password_pool.submit(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password pool"""
+    return await password_pool.submit(verify_password, plain_password, hashed_password)
@@ -1,7 +1,20 @@
 """
 Permission and authorization utilities
+Each Permission gets one bit, and ROLE_PERMISSIONS is compiled at import into
+ROLE_MASKS, an integer per role, so a check is a dict lookup and an AND.
+
+Banks can adjust what a role may do for their own users through
+bank_role_permissions rows, which grant or revoke single permissions. The table
+is loaded whole into bank_role_permissions (the cached BankRolePermissionTable
+below) and reloaded every PERMISSION_CACHE_TTL_SECONDS, or at once on the
+worker that changed it.
 """
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import time
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.bank_role_permission import BankRolePermission
 from app.models.user import User, UserRole
 from app.models.bank import Bank
 
@@ -100,10 +113,115 @@ ROLE_PERMISSIONS = {
 }
 
 
+# One bit per permission, in declaration order
+PERMISSION_BITS: Dict[str, int] = {
+    value: 1 << index
+    for index, value in enumerate(
+        value for name, value in vars(Permission).items() if not name.startswith("_") and isinstance(value, str)
+    )
+}
+
+
+def permission_mask(permissions: Iterable[str]) -> int:
+    """Bitmask of permissions; names that are not Permission constants are ignored"""
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS.get(permission, 0)
+    return mask
+
+
+def mask_permissions(mask: int) -> List[str]:
+    """Permission names set in mask, in declaration order"""
+    return [permission for permission, bit in PERMISSION_BITS.items() if mask & bit]
+
+
+ROLE_MASKS: Dict[UserRole, int] = {role: permission_mask(permissions) for role, permissions in ROLE_PERMISSIONS.items()}
+
+# Roles a bank may adjust for its own users, and permissions it may never grant
+# or revoke: their endpoints act on every bank's data, not just the overriding bank's
+BANK_ROLES = (UserRole.BANK_MANAGER, UserRole.BANK_USER, UserRole.DATA_PROVIDER)
+GLOBAL_PERMISSIONS = frozenset({
+    Permission.CREATE_BANK,
+    Permission.UPDATE_BANK,
+    Permission.APPROVE_BANK,
+    Permission.VIEW_AUDIT_LOGS,
+    Permission.EXPORT_AUDIT_LOGS,
+    Permission.DELETE_USER,
+    Permission.REVIEW_DISPUTE,
+    Permission.RESOLVE_DISPUTE,
+})
+
+
+class BankRolePermissionTable:
+    """Effective role masks for banks with overrides, reloaded from bank_role_permissions every ttl seconds"""
+
+    def __init__(self, ttl: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self._masks: Dict[Tuple[int, UserRole], int] = {}
+        self._expires_at = 0.0
+        self.loads = 0
+
+    def stale(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    def refresh(self) -> None:
+        db = self.session_factory()
+        try:
+            rows = db.query(
+                BankRolePermission.bank_id, BankRolePermission.role,
+                BankRolePermission.permission, BankRolePermission.granted,
+            ).all()
+        finally:
+            db.close()
+        masks = {}
+        for bank_id, role, permission, granted in rows:
+            if role not in BANK_ROLES or permission in GLOBAL_PERMISSIONS:
+                continue  # Never accepted by the API; ignore rows written some other way
+            bit = PERMISSION_BITS.get(permission, 0)
+            mask = masks.get((bank_id, role), ROLE_MASKS.get(role, 0))
+            masks[(bank_id, role)] = mask | bit if granted else mask & ~bit
+        # Swapped in whole, so readers never see a partly built table
+        self._masks = masks
+        self._expires_at = time.monotonic() + self.ttl
+        self.loads += 1
+
+    def mask(self, role: UserRole, bank_id: Optional[int]) -> int:
+        if self._masks and bank_id is not None:
+            mask = self._masks.get((bank_id, role))
+            if mask is not None:
+                return mask
+        return ROLE_MASKS.get(role, 0)
+
+    def user_mask(self, user: User) -> int:
+        """mask(user.role, user.bank_id), reading bank_id only when some bank has overrides"""
+        role = user.role
+        if self._masks:
+            mask = self._masks.get((user.bank_id, role))
+            if mask is not None:
+                return mask
+        return ROLE_MASKS.get(role, 0)
+
+    def invalidate(self) -> None:
+        """Reload on the next permission check"""
+        self._expires_at = 0.0
+
+    def clear(self) -> None:
+        self._masks = {}
+        self._expires_at = 0.0
+
+
+bank_role_permissions = BankRolePermissionTable(settings.PERMISSION_CACHE_TTL_SECONDS)
+
+
+def get_permission_mask(user: User) -> int:
+    """Bitmask of everything user may do, including their bank's overrides"""
+    return bank_role_permissions.user_mask(user)
+
+
 def has_permission(user: User, permission: str) -> bool:
     """Check if user has a specific permission"""
-    user_permissions = ROLE_PERMISSIONS.get(user.role, [])
-    return permission in user_permissions
+    return bool(get_permission_mask(user) & PERMISSION_BITS.get(permission, 0))
 
 
 def require_permission(permission: str):
@@ -139,5 +257,5 @@ def can_access_consumer_data(user: User, consumer_id: int, consumer_user_id: Opt
 
 def get_user_permissions(user: User) -> List[str]:
     """Get all permissions for a user"""
-    return ROLE_PERMISSIONS.get(user.role, [])
+    return mask_permissions(get_permission_mask(user))
 
@@ -0,0 +1,93 @@
+"""
+Rate limit policies
+Requests are limited per tenant rather than per address: a bank's users share
+the bank's quota (banks.rate_limit_per_minute / rate_limit_per_hour, falling
+back to BANK_RATE_LIMIT_PER_MINUTE / PER_HOUR), other signed-in users are
+limited individually, and anonymous requests by client address. One bank
+exhausting its quota leaves every other bank's untouched.
+
+Routes cost different amounts of quota. RATE_LIMIT_ROUTE_COSTS weights the
+expensive ones, e.g. "POST /api/v1/credit-reports=10"; every other route costs 1.
+
+Bank quotas are cached per worker for RATE_LIMIT_POLICY_CACHE_TTL_SECONDS and
+dropped at once when a bank is updated through the API.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Scope
+from app.config import settings
+from app.database import SessionLocal
+from app.models.bank import Bank
+from app.utils.cache import TTLCache
+from app.utils.rate_limiter import RateLimit
+
+
+def parse_route_costs(value: str) -> Dict[Tuple[str, str], int]:
+    """Parse "METHOD /path=cost,..." into {(METHOD, /path): cost}"""
+    costs = {}
+    for entry in filter(None, (item.strip() for item in value.split(","))):
+        route, _, cost = entry.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        costs[(method.upper(), path.strip().rstrip("/") or "/")] = int(cost)
+    return costs
+
+
+ROUTE_COSTS = parse_route_costs(settings.RATE_LIMIT_ROUTE_COSTS)
+
+
+def route_cost(method: str, path: str) -> int:
+    return ROUTE_COSTS.get((method, path.rstrip("/") or "/"), 1)
+
+
+def default_limits(per_minute: int, per_hour: int) -> List[RateLimit]:
+    return [RateLimit("minute", per_minute, 60), RateLimit("hour", per_hour, 3600)]
+
+
+class BankQuotaCache:
+    """Per-bank limits loaded from the banks table, cached per worker"""
+
+    def __init__(self, ttl: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self._cache = TTLCache(10000, ttl)
+
+    def _load(self, bank_id: int) -> Tuple[Optional[int], Optional[int]]:
+        db = self.session_factory()
+        try:
+            row = db.query(Bank.rate_limit_per_minute, Bank.rate_limit_per_hour).filter(Bank.id == bank_id).first()
+            return tuple(row) if row else (None, None)
+        finally:
+            db.close()
+
+    async def limits(self, bank_id: int) -> List[RateLimit]:
+        quota = self._cache.get(bank_id)
+        if quota is None:
+            quota = await run_in_threadpool(self._load, bank_id)
+            self._cache.set(bank_id, quota)
+        per_minute, per_hour = quota
+        return default_limits(per_minute or settings.BANK_RATE_LIMIT_PER_MINUTE,
+                              per_hour or settings.BANK_RATE_LIMIT_PER_HOUR)
+
+    def invalidate(self, bank_id: int) -> None:
+        self._cache.delete(bank_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+bank_quotas = BankQuotaCache(settings.RATE_LIMIT_POLICY_CACHE_TTL_SECONDS)
+
+
+async def client_policy(scope: Scope, payload: Optional[Dict[str, Any]]) -> Tuple[str, List[RateLimit]]:
+    """Identity whose quota a request draws from, and that quota's limits"""
+    if payload and payload.get("bank_id") is not None:
+        bank_id = int(payload["bank_id"])
+        return f"bank:{bank_id}", await bank_quotas.limits(bank_id)
+    limits = default_limits(settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_PER_HOUR)
+    if payload and payload.get("sub") is not None:
+        return f"user:{payload['sub']}", limits
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}", limits
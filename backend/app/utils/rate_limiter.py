@@ -0,0 +1,210 @@
+"""
+Request rate limiting
+Limits use GCRA (the generic cell rate algorithm): each key stores a single
+"theoretical arrival time" (TAT), which moves forward by period/count per
+request. A request is allowed while the TAT stays within one period of now.
+That is a sliding window with burst up to count, in O(1) time and one number
+of state per key.
+
+Backends: a Redis Lua script, so limits hold across workers and nodes when
+USE_REDIS is set, and an in-process store otherwise. The Redis script runs
+through the redis.asyncio client, so a check never blocks the event loop. The in-process store
+expires keys through a heap and never holds more than RATE_LIMIT_MAX_KEYS.
+"""
+from typing import List, Optional, Sequence, Tuple
+import heapq
+import logging
+import math
+import threading
+import time
+from app.config import settings
+from app.utils.redis_client import get_async_redis_client
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-6  # Absorbs float rounding in accumulated TATs
+
+
+class RateLimit:
+    """count requests per period_seconds, allowing a burst of count; name keys its state"""
+
+    def __init__(self, name: str, count: int, period_seconds: float):
+        self.name = name
+        self.count = count
+        self.period = period_seconds
+        self.interval = period_seconds / count  # Spacing between requests at the sustained rate
+
+
+class RateLimitResult:
+    """Outcome of a check against the most restrictive of the limits checked"""
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, retry_after: float, reset_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after  # Seconds until a denied request would be allowed
+        self.reset_after = reset_after  # Seconds until the full burst is available again
+
+
+def _gcra(tat: float, now: float, limit: RateLimit, cost: int) -> Tuple[bool, float, int, float, float]:
+    """Returns (allowed, new TAT, remaining, retry_after, reset_after) for one limit"""
+    tat = max(tat, now)
+    new_tat = tat + limit.interval * cost
+    allow_at = new_tat - limit.period
+    if now < allow_at - EPSILON:
+        remaining = max(0, int((limit.period - (tat - now)) / limit.interval + EPSILON))
+        return False, tat, remaining, allow_at - now, tat - now
+    remaining = max(0, int((limit.period - (new_tat - now)) / limit.interval + EPSILON))
+    return True, new_tat, remaining, 0.0, new_tat - now
+
+
+def _combine(limits: Sequence[RateLimit], outcomes: List[Tuple[bool, float, int, float, float]]) -> RateLimitResult:
+    allowed = all(outcome[0] for outcome in outcomes)
+    # Report the limit with the fewest requests left
+    index = min(range(len(limits)), key=lambda i: outcomes[i][2])
+    return RateLimitResult(
+        allowed=allowed,
+        limit=limits[index].count,
+        remaining=outcomes[index][2],
+        retry_after=max(outcome[3] for outcome in outcomes),
+        reset_after=outcomes[index][4],
+    )
+
+
+class MemoryBackend:
+    """Per-process GCRA state with heap-based expiry and a bound on keys"""
+
+    def __init__(self, max_keys: int, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tats = {}
+        self._expiry: List[Tuple[float, str]] = []  # (TAT, key); stale entries are skipped on pop
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _expire(self, now: float) -> None:
+        # A key whose TAT has passed is indistinguishable from a new key, so dropping it changes nothing
+        while self._expiry and (self._expiry[0][0] <= now or len(self._tats) > self.max_keys):
+            tat, key = heapq.heappop(self._expiry)
+            if self._tats.get(key) != tat:
+                continue
+            del self._tats[key]
+            if tat > now:
+                self.evicted += 1
+
+    def check(self, identity: str, limits: Sequence[RateLimit], cost: int = 1) -> RateLimitResult:
+        """Check identity against every limit; consumes from all of them only if all allow"""
+        keys = [f"{identity}:{limit.name}" for limit in limits]
+        with self._lock:
+            now = self.clock()
+            outcomes = [_gcra(self._tats.get(key, now), now, limit, cost) for key, limit in zip(keys, limits)]
+            if all(outcome[0] for outcome in outcomes):
+                for key, outcome in zip(keys, outcomes):
+                    self._tats[key] = outcome[1]
+                    heapq.heappush(self._expiry, (outcome[1], key))
+                self._expire(now)
+                if len(self._expiry) > 4 * max(len(self._tats), 1024):
+                    # Every allowed request pushes a heap entry; rebuild once most of them are stale
+                    self._expiry = [(tat, key) for key, tat in self._tats.items()]
+                    heapq.heapify(self._expiry)
+        return _combine(limits, outcomes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+            self._expiry.clear()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+# KEYS: one per limit. ARGV: cost, then interval_ms and period_ms for each key.
+# Checks every key against the Redis server clock and writes them only if all allow.
+GCRA_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local allowed = 1
+local results = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2])
+    local period = tonumber(ARGV[i * 2 + 1])
+    local tat = math.max(tonumber(redis.call('GET', key) or now), now)
+    local new_tat = tat + interval * cost
+    local allow_at = new_tat - period
+    if now < allow_at then
+        allowed = 0
+        results[i] = {tat, math.max(0, math.floor((period - (tat - now)) / interval)), allow_at - now, tat - now}
+    else
+        results[i] = {new_tat, math.floor((period - (new_tat - now)) / interval), 0, new_tat - now}
+    end
+end
+if allowed == 1 then
+    for i, key in ipairs(KEYS) do
+        redis.call('SET', key, results[i][1], 'PX', math.max(1, results[i][4]))
+    end
+end
+local reply = {allowed}
+for i = 1, #KEYS do
+    reply[#reply + 1] = results[i][2]
+    reply[#reply + 1] = results[i][3]
+    reply[#reply + 1] = results[i][4]
+end
+return reply
+"""
+
+
+class RedisBackend:
+    """GCRA state in Redis, shared by every worker; one round trip per check"""
+
+    def __init__(self, client):
+        # client is a redis.asyncio client, so the script call is awaited
+        self._script = client.register_script(GCRA_SCRIPT)
+
+    async def check(self, identity: str, limits: Sequence[RateLimit], cost: int = 1) -> RateLimitResult:
+        args = [cost]
+        for limit in limits:
+            args += [max(1, round(limit.interval * 1000)), round(limit.period * 1000)]
+        # The hash tag keeps an identity's keys in one Redis Cluster slot, as the script needs
+        keys = [f"ratelimit:{{{identity}}}:{limit.name}" for limit in limits]
+        reply = await self._script(keys=keys, args=args)
+        outcomes = [
+            (bool(reply[0]), 0.0, int(reply[1 + i * 3]), int(reply[2 + i * 3]) / 1000, int(reply[3 + i * 3]) / 1000)
+            for i in range(len(limits))
+        ]
+        return _combine(limits, outcomes)
+
+
+class RateLimiter:
+    """Checks limits in Redis when enabled, falling back to the in-process backend"""
+
+    def __init__(self, max_keys: int):
+        self.memory = MemoryBackend(max_keys)
+        self._redis: Optional[RedisBackend] = None
+        self.redis_errors = 0
+
+    def _redis_backend(self) -> Optional[RedisBackend]:
+        client = get_async_redis_client()
+        if client is None:
+            return None
+        if self._redis is None:
+            self._redis = RedisBackend(client)
+        return self._redis
+
+    async def check(self, identity: str, limits: Sequence[RateLimit], cost: int = 1) -> RateLimitResult:
+        """Check identity against every limit, consuming cost from each only if all allow"""
+        backend = self._redis_backend()
+        if backend is not None:
+            try:
+                return await backend.check(identity, limits, cost)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Rate limit check in Redis failed, using per-process limits: {str(e)}")
+        return self.memory.check(identity, limits, cost)
+
+
+rate_limiter = RateLimiter(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
@@ -0,0 +1,45 @@
+"""
+Optional Redis connections shared by caches
+Lookups made on every request from async code (rate limits, principal and
+consent versions) use the redis.asyncio client so they do not block the event
+loop; everything else uses the synchronous client.
+"""
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Redis is optional; features fall back to in-process state without it
+try:
+    import redis
+    import redis.asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+_client = None
+_async_client = None
+
+
+def get_redis_client():
+    """Return a shared Redis client when USE_REDIS is enabled, otherwise None"""
+    global _client
+    if _client is not None or not (settings.USE_REDIS and settings.REDIS_URL):
+        return _client
+    if not REDIS_AVAILABLE:
+        logger.warning("USE_REDIS is enabled but the redis package is not installed.")
+        return None
+    _client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, decode_responses=True)
+    return _client
+
+
+def get_async_redis_client():
+    """Return a shared redis.asyncio client when USE_REDIS is enabled, otherwise None"""
+    global _async_client
+    if _async_client is not None or not (settings.USE_REDIS and settings.REDIS_URL):
+        return _async_client
+    if not REDIS_AVAILABLE:
+        logger.warning("USE_REDIS is enabled but the redis package is not installed.")
+        return None
+    _async_client = redis.asyncio.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, decode_responses=True)
+    return _async_client
@@ -2,13 +2,20 @@
 Security utilities for encryption, hashing, and JWT tokens
 """
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from app.config import settings
 import base64
 import hashlib
+import hmac
+import threading
+
+# Batches smaller than this are encrypted inline; thread hand-off costs more than it saves
+ENCRYPTION_PARALLEL_THRESHOLD = 2048
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -24,6 +31,12 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _stringify_subject(claims: dict) -> None:
+    # RFC 7519 requires "sub" to be a string; jose rejects tokens with an integer subject
+    if claims.get("sub") is not None:
+        claims["sub"] = str(claims["sub"])
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -32,6 +45,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "type": "access"})
+    _stringify_subject(to_encode)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -41,6 +55,7 @@ def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
+    _stringify_subject(to_encode)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -56,9 +71,8 @@ def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
         return None
 
 
-def get_encryption_key() -> bytes:
-    """Get encryption key from settings, ensuring it's 32 bytes"""
-    key = settings.ENCRYPTION_KEY.encode()
+def _derive_fernet_key(secret: str) -> bytes:
+    key = secret.encode()
     # If key is not 32 bytes, hash it to get 32 bytes
     if len(key) != 32:
         key = hashlib.sha256(key).digest()
@@ -66,18 +80,161 @@ def get_encryption_key() -> bytes:
     return base64.urlsafe_b64encode(key)
 
 
+def get_encryption_key() -> bytes:
+    """Get encryption key from settings, ensuring it's 32 bytes"""
+    return _derive_fernet_key(settings.ENCRYPTION_KEY)
+
+
+class Keyring:
+    """
+    Versioned encryption keys. Ciphertext is stored as "v{version}${fernet token}"
+    so each value names the key that decrypts it; unprefixed tokens written
+    before versioning are tried against every configured key.
+    """
+
+    def __init__(self, current_version: int, keys: Dict[int, str], unversioned: Sequence[str] = ()):
+        self.current_version = current_version
+        self.prefix = f"v{current_version}$"
+        self._fernets = {version: Fernet(_derive_fernet_key(secret)) for version, secret in keys.items()}
+        self._current = self._fernets[current_version]
+        legacy = [self._current] + [f for v, f in self._fernets.items() if v != current_version]
+        self._legacy = MultiFernet(legacy + [Fernet(_derive_fernet_key(secret)) for secret in unversioned])
+
+    def encrypt(self, data: bytes) -> str:
+        return self.prefix + self._current.encrypt(data).decode()
+
+    def decrypt(self, token: str) -> bytes:
+        version, sep, body = token.partition("$")
+        if not sep:
+            return self._legacy.decrypt(token.encode())
+        fernet = self._fernets.get(int(version[1:])) if version[:1] == "v" and version[1:].isdigit() else None
+        if fernet is None:
+            raise InvalidToken
+        return fernet.decrypt(body.encode())
+
+    def is_current(self, token: str) -> bool:
+        """True when the token is already encrypted under the current key"""
+        return token.startswith(self.prefix)
+
+    def rotate(self, token: str) -> str:
+        return token if self.is_current(token) else self.encrypt(self.decrypt(token))
+
+
+@lru_cache(maxsize=4)
+def _build_keyring(current_key: str, current_version: int, previous_keys: str) -> Keyring:
+    keys = {current_version: current_key}
+    unversioned = []
+    for entry in previous_keys.split(","):
+        entry = entry.strip()
+        version, sep, secret = entry.partition(":")
+        if sep and version.isdigit() and secret:
+            keys.setdefault(int(version), secret)
+        elif entry:
+            unversioned.append(entry)
+    return Keyring(current_version, keys, unversioned)
+
+
+def get_keyring() -> Keyring:
+    """
+    Cached keyring: encrypts with ENCRYPTION_KEY under ENCRYPTION_KEY_VERSION and
+    decrypts with it or any key in ENCRYPTION_KEY_PREVIOUS, so keys can be
+    rotated without downtime
+    """
+    return _build_keyring(
+        settings.ENCRYPTION_KEY, settings.ENCRYPTION_KEY_VERSION, settings.ENCRYPTION_KEY_PREVIOUS
+    )
+
+
 def encrypt_sensitive_data(data: str) -> str:
     """Encrypt sensitive data (SSN, account numbers, etc.)"""
-    f = Fernet(get_encryption_key())
-    encrypted = f.encrypt(data.encode())
-    return encrypted.decode()
+    return get_keyring().encrypt(data.encode())
 
 
 def decrypt_sensitive_data(encrypted_data: str) -> str:
     """Decrypt sensitive data"""
-    f = Fernet(get_encryption_key())
-    decrypted = f.decrypt(encrypted_data.encode())
-    return decrypted.decode()
+    return get_keyring().decrypt(encrypted_data).decode()
+
+
+def rotate_sensitive_data(encrypted_data: str) -> str:
+    """Re-encrypt data under the current key; values already under it are returned unchanged"""
+    return get_keyring().rotate(encrypted_data)
+
+
+_crypto_pool: Optional[ThreadPoolExecutor] = None
+_crypto_pool_lock = threading.Lock()
+
+
+def _get_crypto_pool() -> ThreadPoolExecutor:
+    global _crypto_pool
+    with _crypto_pool_lock:
+        if _crypto_pool is None:
+            _crypto_pool = ThreadPoolExecutor(
+                max_workers=settings.ENCRYPTION_WORKERS, thread_name_prefix="crypto"
+            )
+    return _crypto_pool
+
+
+def _map_batched(func: Callable[[str], str], values: Sequence[str]) -> List[str]:
+    """Apply func to every value, fanning large batches out to the crypto thread pool"""
+    if settings.ENCRYPTION_WORKERS <= 1 or len(values) < ENCRYPTION_PARALLEL_THRESHOLD:
+        return [func(value) for value in values]
+    size = -(-len(values) // settings.ENCRYPTION_WORKERS)
+    batches = [values[start:start + size] for start in range(0, len(values), size)]
+    results: List[str] = []
+    for batch in _get_crypto_pool().map(lambda part: [func(value) for value in part], batches):
+        results.extend(batch)
+    return results
+
+
+def encrypt_many(values: Sequence[str]) -> List[str]:
+    """Encrypt a batch of values, preserving order"""
+    keyring = get_keyring()
+    return _map_batched(lambda value: keyring.encrypt(value.encode()), values)
+
+
+def decrypt_many(values: Sequence[str]) -> List[str]:
+    """Decrypt a batch of values, preserving order; raises InvalidToken on any bad value"""
+    keyring = get_keyring()
+    return _map_batched(lambda value: keyring.decrypt(value).decode(), values)
+
+
+def rotate_many(values: Sequence[str]) -> List[str]:
+    """Re-encrypt a batch of values under the current key, preserving order"""
+    return _map_batched(get_keyring().rotate, values)
+
+
+def get_blind_index_key() -> bytes:
+    """
+    Get the HMAC key for blind indexes.
+    Independent of ENCRYPTION_KEY, so rotating that leaves the indexes valid.
+    Changing it invalidates every stored index; rerun the backfills afterwards.
+    """
+    return settings.BLIND_INDEX_KEY.encode()
+
+
+def blind_index(value: str, domain: str) -> str:
+    """Deterministic keyed hash of sensitive data for equality lookups without decrypting"""
+    message = f"{domain}:{value}".encode()
+    return hmac.new(get_blind_index_key(), message, hashlib.sha256).hexdigest()
+
+
+def _normalize_account_number(account_number: str) -> str:
+    return "".join(account_number.split()).upper()
+
+
+def ssn_blind_index(ssn: str) -> str:
+    """Blind index of an SSN; separators and whitespace are ignored"""
+    return blind_index("".join(ch for ch in ssn if ch.isalnum()).upper(), "ssn")
+
+
+def account_number_blind_index(account_number: str) -> str:
+    """Blind index of an account number, for lookups across banks"""
+    return blind_index(_normalize_account_number(account_number), "account_number")
+
+
+def account_fingerprint(bank_id: int, account_number: str) -> str:
+    """Stable identity of a bank's tradeline, used to match delta feed rows to existing accounts"""
+    return blind_index(f"{bank_id}:{_normalize_account_number(account_number)}", "account")
 
 
 def mask_sensitive_data(data: str, visible_chars: int = 4) -> str:
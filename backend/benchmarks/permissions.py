@@ -0,0 +1,84 @@
+"""
+Permission check micro-benchmark
+Compares the previous list membership check with the compiled bitmasks, both
+as bare checks and through the require_permission_dependency coroutine that
+guards every endpoint.
+
+Usage: python -m benchmarks.permissions [--checks N] [--repeat N]
+"""
+import argparse
+import asyncio
+import time
+from fastapi import HTTPException, status
+from app.api.dependencies import require_permission_dependency
+from app.models.user import User, UserRole
+from app.utils.permissions import ROLE_PERMISSIONS, Permission, bank_role_permissions, has_permission
+
+# The last permission in the admin list, and one a bank user lacks, are the slowest for a list scan
+CASES = [
+    ("admin, allowed", UserRole.ADMIN, Permission.RESOLVE_DISPUTE),
+    ("bank user, denied", UserRole.BANK_USER, Permission.VIEW_AUDIT_LOGS),
+]
+
+
+def _list_has_permission(user: User, permission: str) -> bool:
+    user_permissions = ROLE_PERMISSIONS.get(user.role, [])
+    return permission in user_permissions
+
+
+def _list_dependency(permission: str):
+    async def permission_checker(current_user: User) -> User:
+        if not _list_has_permission(current_user, permission):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Permission denied: {permission}")
+        return current_user
+    return permission_checker
+
+
+async def _call_dependency(checker, user: User, checks: int) -> None:
+    for _ in range(checks):
+        try:
+            await checker(current_user=user)
+        except HTTPException:
+            pass
+
+
+def _best(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    """Command line entry point for the permission benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark permission checks")
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # No overrides loaded, and none fetched while timing
+    bank_role_permissions.refresh = lambda: None
+    bank_role_permissions.ttl = float("inf")
+    bank_role_permissions._expires_at = float("inf")
+
+    print(f"{args.checks} checks, best of {args.repeat}")
+    for label, role, permission in CASES:
+        user = User(role=role, bank_id=1)
+        old_dependency = _list_dependency(permission)
+        new_dependency = require_permission_dependency(permission)
+        cases = [
+            ("list check", lambda: [_list_has_permission(user, permission) for _ in range(args.checks)]),
+            ("bitmask check", lambda: [has_permission(user, permission) for _ in range(args.checks)]),
+            ("dependency, list", lambda: asyncio.run(_call_dependency(old_dependency, user, args.checks))),
+            ("dependency, bitmask", lambda: asyncio.run(_call_dependency(new_dependency, user, args.checks))),
+        ]
+        print(f"  {label}")
+        for name, func in cases:
+            elapsed = _best(func, args.repeat)
+            print(f"    {name:<22} {elapsed * 1000:9.1f} ms  {elapsed / args.checks * 1e9:7.0f} ns/check")
+
+
+if __name__ == "__main__":
+    main()
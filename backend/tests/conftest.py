@@ -1,24 +1,58 @@
 """
 Pytest configuration and fixtures
 """
+import os
+import tempfile
+
+# Required setting with no default; set before the app reads its settings
+os.environ.setdefault("BLIND_INDEX_KEY", "test-blind-index-key")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from app.database import Base, get_async_db, get_db
 from app.main import app
+from app.services.audit_writer import audit_writer
+from app.services.consents import consent_cache
+from app.services.report_cache import report_cache
 from app.models.user import User, UserRole
+from app.utils.auth_cache import principal_cache, token_cache, token_denylist
+from app.utils.pagination import count_cache
+from app.utils.permissions import bank_role_permissions
+from app.utils.rate_limit_policies import bank_quotas
+from app.utils.rate_limiter import rate_limiter
 from app.utils.security import get_password_hash
 
 # Test database (use in-memory SQLite for tests)
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+audit_writer.bind = engine
+audit_writer.spool.directory = tempfile.mkdtemp(prefix="audit-spool-")
+bank_quotas.session_factory = TestingSessionLocal
+bank_role_permissions.session_factory = TestingSessionLocal
+# Same database for the async routes; NullPool because each TestClient runs its own event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test"""
+    # User ids are reused across tests, so cached principals and totals must not leak between them
+    principal_cache.clear()
+    token_cache.clear()
+    token_denylist.clear()
+    count_cache.clear()
+    consent_cache.clear()
+    report_cache.clear()
+    # Every test client shares one address, so limits would otherwise carry over
+    rate_limiter.memory.clear()
+    bank_quotas.clear()
+    bank_role_permissions.clear()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -37,7 +71,12 @@ def client(db):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
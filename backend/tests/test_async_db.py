@@ -0,0 +1,93 @@
+"""
+Tests for the async database layer
+"""
+from datetime import date
+from app.api.v1 import credit_data
+from app.database import async_database_url
+from app.models.consumer import Consumer
+from app.models.credit_account import AccountStatus, AccountType, CreditAccount, PaymentStatus
+from app.utils.security import account_fingerprint
+from tests.conftest import TestingSessionLocal
+
+
+def test_async_database_url():
+    """Sync DATABASE_URLs map to their async drivers"""
+    url = async_database_url("postgresql://user:pw@db.example.com:5432/credit?sslmode=require")
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {"ssl": "require"}
+    assert async_database_url("postgres://u@h/d").drivername == "postgresql+asyncpg"
+    assert async_database_url("sqlite:///./app.db").drivername == "sqlite+aiosqlite"
+
+
+def test_async_routes_round_trip(client, admin_user):
+    """Consumers, credit data, reports and inquiries work through the async session"""
+    token = client.post(
+        "/api/v1/auth/login", data={"username": "admin@test.com", "password": "testpassword"}
+    ).json()["data"]["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    consumer = client.post("/api/v1/consumers/", headers=headers, json={
+        "first_name": "Ana", "last_name": "Lang", "date_of_birth": "1980-01-01", "ssn": "123-45-6789",
+    })
+    assert consumer.status_code == 201
+    consumer_id = consumer.json()["data"]["id"]
+    assert client.get(f"/api/v1/consumers/{consumer_id}", headers=headers).json()["data"]["first_name"] == "Ana"
+
+    account = client.post("/api/v1/credit-data/", headers=headers, json={
+        "consumer_id": consumer_id, "account_number": "ACC-1", "account_type": "CREDIT_CARD",
+        "account_status": "OPEN", "payment_status": "CURRENT", "credit_limit": "1000",
+        "current_balance": "250", "open_date": "2015-01-01",
+    })
+    assert account.status_code == 201
+    account_id = account.json()["data"]["id"]
+    updated = client.put(f"/api/v1/credit-data/{account_id}", headers=headers, json={"current_balance": "500"})
+    assert updated.json()["data"]["current_balance"] == "500.00"
+
+    listing = client.get("/api/v1/credit-data/", headers=headers, params={"consumer_id": consumer_id})
+    assert listing.json()["meta"]["total"] == 1
+
+    report = client.post("/api/v1/credit-reports/", headers=headers, json={"consumer_id": consumer_id})
+    assert report.status_code == 201
+    report_id = report.json()["data"]["id"]
+    assert len(report.json()["data"]["report_data"]["accounts"]) == 1
+    assert client.get(f"/api/v1/credit-reports/{report_id}", headers=headers).status_code == 200
+
+    frozen = client.put(f"/api/v1/consumers/{consumer_id}/freeze", headers=headers, params={"is_frozen": True})
+    assert frozen.json()["data"]["is_frozen"] is True
+    assert client.post("/api/v1/credit-reports/", headers=headers, json={"consumer_id": consumer_id}).status_code == 403
+
+
+def test_concurrent_duplicate_submit_returns_409(client, db, admin_user, monkeypatch):
+    """A submit that loses the race on the bank/fingerprint constraint gets 409, not 500"""
+    consumer = Consumer(ssn_encrypted="ssn", first_name="A", last_name="B", date_of_birth=date(1990, 1, 1))
+    db.add(consumer)
+    db.commit()
+    token = client.post(
+        "/api/v1/auth/login", data={"username": "admin@test.com", "password": "testpassword"}
+    ).json()["data"]["access_token"]
+
+    record = credit_data._record_new_account
+
+    def record_after_competing_insert(sync_db, account):
+        # Another request commits the same account between the 409 check and this insert
+        other = TestingSessionLocal()
+        try:
+            other.add(CreditAccount(
+                consumer_id=consumer.id, bank_id=account.bank_id, account_number_encrypted="x",
+                account_fingerprint=account_fingerprint(account.bank_id, "ACC-RACE"),
+                account_type=AccountType.CREDIT_CARD, account_status=AccountStatus.OPEN,
+                payment_status=PaymentStatus.CURRENT, current_balance=0, open_date=date(2015, 1, 1),
+            ))
+            other.commit()
+        finally:
+            other.close()
+        record(sync_db, account)
+
+    monkeypatch.setattr(credit_data, "_record_new_account", record_after_competing_insert)
+    response = client.post("/api/v1/credit-data/", headers={"Authorization": f"Bearer {token}"}, json={
+        "consumer_id": consumer.id, "account_number": "ACC-RACE", "account_type": "CREDIT_CARD",
+        "account_status": "OPEN", "payment_status": "CURRENT", "current_balance": "0",
+        "open_date": "2015-01-01",
+    })
+    assert response.status_code == 409
+    assert db.query(CreditAccount).count() == 1
@@ -0,0 +1,57 @@
+"""
+Tests for audit log partitioning and the audit query window
+"""
+from datetime import date, datetime, timedelta, timezone
+from app.config import settings
+from app.models.audit_log import AuditLog, AuditAction
+from app.services.audit_partitions import add_months, expired_partitions, partition_month, partition_name
+
+
+def test_partition_names_and_months():
+    """Partition names round-trip to their month, across year boundaries"""
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+    assert partition_name(date(2027, 2, 1)) == "audit_logs_y2027m02"
+    assert partition_month("audit_logs_y2027m02") == date(2027, 2, 1)
+    assert partition_month("audit_logs_previous") is None
+
+
+def test_only_months_past_retention_expire():
+    """The partition holding the cutoff month is kept"""
+    names = [partition_name(date(2026, month, 1)) for month in range(1, 11)] + ["audit_logs_default"]
+    assert expired_partitions(names, 6, today=date(2026, 10, 18)) == [
+        "audit_logs_y2026m01", "audit_logs_y2026m02", "audit_logs_y2026m03",
+    ]
+
+
+def test_audit_query_defaults_to_recent_window(client, db, admin_user, monkeypatch):
+    """Without start_date only the last AUDIT_QUERY_DEFAULT_DAYS are searched"""
+    now = datetime.now(timezone.utc)
+    for days_ago in (90, 45, 1):
+        db.add(AuditLog(action=AuditAction.READ, resource_type=f"days-{days_ago}",
+                        created_at=now - timedelta(days=days_ago)))
+    db.commit()
+    token = client.post(
+        "/api/v1/auth/login", data={"username": "admin@test.com", "password": "testpassword"}
+    ).json()["data"]["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def resource_types(**params):
+        response = client.get("/api/v1/audit/", headers=headers, params=params)
+        assert response.status_code == 200
+        return {log["resource_type"] for log in response.json()["data"]} - {"login"}
+
+    assert resource_types() == {"days-1"}
+    meta = client.get("/api/v1/audit/", headers=headers).json()["meta"]
+    applied = datetime.fromisoformat(meta["start_date"])
+    assert abs(applied - (now - timedelta(days=settings.AUDIT_QUERY_DEFAULT_DAYS))) < timedelta(minutes=2)
+    assert meta["end_date"] is None
+    start = (now - timedelta(days=60)).isoformat()
+    end = (now - timedelta(days=30)).isoformat()
+    assert resource_types(start_date=start) == {"days-45", "days-1"}
+    assert resource_types(start_date=start, end_date=end) == {"days-45"}
+    assert client.get("/api/v1/audit/", headers=headers, params={"start_date": end, "end_date": start}).status_code == 400
+
+    monkeypatch.setattr(settings, "AUDIT_QUERY_DEFAULT_DAYS", 0)
+    assert resource_types() == {"days-90", "days-45", "days-1"}
+    assert client.get("/api/v1/audit/", headers=headers).json()["meta"]["start_date"] is None
@@ -0,0 +1,111 @@
+"""
+Tests for the audit middleware and batched audit writer
+"""
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from sqlalchemy import create_engine
+from app.models.audit_log import AuditLog, AuditAction
+from app.models.audit_spool_checkpoint import AuditSpoolCheckpoint
+from app.services.audit_spool import AuditSpool, encode_record
+from app.services.audit_writer import COPY_COLUMNS, AuditWriter, audit_writer, copy_buffer
+from tests.conftest import engine
+
+
+def _event(index):
+    return {
+        "user_id": None,
+        "action": AuditAction.READ,
+        "resource_type": "test",
+        "request_method": "GET",
+        "request_path": f"/test/{index}",
+        "additional_metadata": {"index": index},
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def test_requests_are_audited_in_batches(client, db):
+    """Every request is queued and written with masked body and timing metadata"""
+    client.post("/api/v1/auth/register", json={
+        "email": "new@test.com", "password": "hunter2-secret", "full_name": "New", "role": "CONSUMER",
+    })
+    client.get("/api/v1/auth/me")
+    assert audit_writer.flush()
+
+    logs = db.query(AuditLog).order_by(AuditLog.id).all()
+    assert [(log.request_method, log.response_status) for log in logs] == [("POST", 201), ("GET", 401)]
+    assert logs[0].request_body["password"].endswith("cret")
+    assert "hunter2" not in logs[0].request_body["password"]
+    assert logs[0].additional_metadata["process_time"] > 0
+
+
+def _writer(directory, bind=engine, segment_bytes=1 << 20):
+    writer = AuditWriter(AuditSpool(str(directory), segment_bytes), batch_size=3, flush_interval_ms=10, bind=bind)
+    writer._ensure_started = lambda: None  # Loads run only when the test calls flush
+    return writer
+
+
+def _loaded_indexes(db):
+    db.expire_all()
+    return sorted(log.additional_metadata["index"] for log in db.query(AuditLog).all())
+
+
+def test_spooled_events_survive_database_outage(db, tmp_path):
+    """Events stay on disk while the database is down and load once it is back"""
+    writer = _writer(tmp_path / "spool", bind=create_engine(f"sqlite:///{tmp_path}/missing-tables.db"))
+    for index in range(5):
+        writer.enqueue(_event(index))
+    assert writer.flush() is False
+    assert writer.stats()["pending_bytes"] > 0
+
+    writer.bind = engine
+    assert writer.flush() is True
+    assert _loaded_indexes(db) == [0, 1, 2, 3, 4]
+    assert writer.stats()["pending_bytes"] == 0
+    assert db.query(AuditSpoolCheckpoint).one().series == writer.spool.series
+
+
+def test_rolled_segments_load_exactly_once(db, tmp_path):
+    """Sealed segments are removed once loaded; the checkpoint stops a second load"""
+    writer = _writer(tmp_path, segment_bytes=400)
+    for index in range(10):
+        writer.enqueue(_event(index))
+    assert len(writer.spool.segments(writer.spool.series)) > 2
+    assert writer.flush()
+    assert writer.spool.segments(writer.spool.series) == [writer.spool.seq]
+
+    restarted = AuditWriter(writer.spool, batch_size=3, flush_interval_ms=10, bind=engine)
+    assert restarted.flush()
+    assert restarted.loaded == 0
+    assert _loaded_indexes(db) == list(range(10))
+
+
+def test_exited_series_with_torn_tail_is_taken_over(db, tmp_path):
+    """Another process loads a dead worker's series up to its torn last record"""
+    crashed = _writer(tmp_path)
+    for index in range(3):
+        crashed.enqueue(_event(index))
+    series = crashed.spool.series
+    crashed.spool.close()
+    with open(crashed.spool.segment_path(series, 0), "ab") as segment:
+        segment.write(encode_record(_event(3))[:-4])
+
+    survivor = _writer(tmp_path)
+    assert survivor.flush()
+    assert _loaded_indexes(db) == [0, 1, 2]
+    assert survivor.torn_segments == 1
+    assert os.listdir(tmp_path) == []
+    assert db.query(AuditSpoolCheckpoint).count() == 0
+
+
+def test_copy_buffer_distinguishes_null_from_empty():
+    """COPY csv input quotes every value so only NULL is an unquoted empty field"""
+    event = {**_event(1), "user_agent": "", "error_message": None, "request_body": {"note": 'say "hi"'}}
+    line = copy_buffer([event]).getvalue()
+    raw = line.split(",")
+    assert raw[COPY_COLUMNS.index("user_id")] == ""
+    assert raw[COPY_COLUMNS.index("user_agent")] == '""'
+    row = next(csv.reader([line]))
+    assert row[COPY_COLUMNS.index("action")] == "READ"
+    assert json.loads(row[COPY_COLUMNS.index("request_body")]) == {"note": 'say "hi"'}
@@ -0,0 +1,108 @@
+"""
+Tests for cached request authentication
+"""
+import asyncio
+from app.api import dependencies
+from app.config import settings
+from app.utils import auth_cache
+from app.models.user import User
+from app.utils.auth_cache import principal_cache
+
+
+def _login(client, email):
+    response = client.post("/api/v1/auth/login", data={"username": email, "password": "testpassword"})
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+def test_token_decoded_once_and_principal_cached(client, admin_user, monkeypatch):
+    """Repeated requests reuse the verified token and the cached principal"""
+    headers = _login(client, "admin@test.com")
+    decodes = []
+    verify = auth_cache.verify_token
+    monkeypatch.setattr(auth_cache, "verify_token", lambda *args: decodes.append(args) or verify(*args))
+
+    for _ in range(3):
+        response = client.get("/api/v1/auth/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["data"]["email"] == "admin@test.com"
+    assert len(decodes) == 1
+    assert admin_user.id in principal_cache._data
+
+    bad = client.get("/api/v1/auth/me", headers={"Authorization": "Bearer not-a-token"})
+    assert bad.status_code == 401
+
+
+def test_user_changes_invalidate_principal(client, admin_user, bank_user):
+    """Deactivating a user takes effect on their next request"""
+    admin_headers = _login(client, "admin@test.com")
+    bank_headers = _login(client, "bank@test.com")
+    assert client.get("/api/v1/auth/me", headers=bank_headers).status_code == 200
+
+    response = client.put(f"/api/v1/users/{bank_user.id}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/api/v1/auth/me", headers=bank_headers).status_code == 403
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def expire(self, key, seconds):
+        return True
+
+
+class AsyncFakeRedis:
+    """The redis.asyncio view of a FakeRedis"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def get(self, key):
+        return self.redis.get(key)
+
+
+def test_invalidation_reaches_other_workers_through_redis(db, admin_user, monkeypatch):
+    """A principal cached by this worker is reloaded once another worker bumps the shared version"""
+    redis = FakeRedis()
+    monkeypatch.setattr(auth_cache, "get_redis_client", lambda: redis)
+    monkeypatch.setattr(auth_cache, "get_async_redis_client", lambda: AsyncFakeRedis(redis))
+
+    def principal():
+        return asyncio.run(auth_cache.get_user_principal(db, admin_user.id))
+
+    assert principal().is_active
+    db.query(User).filter(User.id == admin_user.id).update({"is_active": False})
+    db.commit()
+    assert principal().is_active  # Still cached here
+    # Another worker handled the change: only the Redis version moves
+    redis.incr(auth_cache.PRINCIPAL_VERSION_KEY.format(user_id=admin_user.id))
+    assert not principal().is_active
+
+
+def test_lightweight_principal_skips_user_lookup(client, admin_user, bank_user, monkeypatch):
+    """Token claims authorize requests; changing a user sends their old tokens back to the database"""
+    monkeypatch.setattr(settings, "AUTH_LIGHTWEIGHT_PRINCIPAL", True)
+    admin_headers = _login(client, "admin@test.com")
+    bank_headers = _login(client, "bank@test.com")
+    lookups = []
+    load = dependencies.get_user_principal
+    monkeypatch.setattr(dependencies, "get_user_principal", lambda *args: lookups.append(args) or load(*args))
+
+    assert client.get("/api/v1/users/", headers=admin_headers).status_code == 200
+    assert client.get("/api/v1/users/", headers=bank_headers).status_code == 403
+    assert lookups == []
+
+    me = client.get("/api/v1/auth/me", headers=bank_headers)
+    assert me.json()["data"]["full_name"] == "Test Bank User"
+    assert len(lookups) == 1
+
+    response = client.put(f"/api/v1/users/{bank_user.id}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/api/v1/credit-data/", headers=bank_headers).status_code == 403
@@ -0,0 +1,57 @@
+"""
+Tests for derived column backfills
+"""
+from datetime import date
+from decimal import Decimal
+from app.models.consumer import Consumer
+from app.models.credit_account import CreditAccount, AccountType, AccountStatus, PaymentStatus
+from app.services.backfill import backfill_account_fingerprints, backfill_ssn_index
+from app.services.ingestion import tradeline_content_hash
+from app.utils.security import account_fingerprint, encrypt_sensitive_data, ssn_blind_index
+from tests.conftest import TestingSessionLocal
+
+
+def test_backfill_fingerprints_existing_accounts(db):
+    """Legacy accounts get fingerprints; duplicate account numbers keep only the oldest"""
+    consumer = Consumer(ssn_encrypted="ssn", first_name="A", last_name="B", date_of_birth=date(1990, 1, 1))
+    db.add(consumer)
+    db.flush()
+    for number in ["111", "222", "111", None]:
+        db.add(CreditAccount(
+            consumer_id=consumer.id,
+            bank_id=1,
+            account_number_encrypted=encrypt_sensitive_data(number) if number else "not-a-token",
+            account_type=AccountType.CREDIT_CARD,
+            account_status=AccountStatus.OPEN,
+            payment_status=PaymentStatus.CURRENT,
+            current_balance=Decimal("10.00"),
+            open_date=date(2020, 1, 1),
+        ))
+    db.commit()
+
+    counts = backfill_account_fingerprints(chunk_size=2, session_factory=TestingSessionLocal)
+
+    assert counts == {"updated": 2, "duplicates": 1, "undecryptable": 1}
+    db.expire_all()
+    accounts = db.query(CreditAccount).order_by(CreditAccount.id).all()
+    assert accounts[0].account_fingerprint == account_fingerprint(1, "111")
+    assert accounts[0].content_hash == tradeline_content_hash(accounts[0])
+    assert accounts[2].account_fingerprint is None
+
+
+def test_backfill_ssn_index_enables_indexed_lookup(db):
+    """Backfilled consumers are found by SSN blind index regardless of formatting"""
+    for index, ssn in enumerate(["123-45-6789", "987654321", "123 45 6789"]):
+        db.add(Consumer(
+            ssn_encrypted=encrypt_sensitive_data(ssn),
+            first_name="A",
+            last_name=f"B{index}",
+            date_of_birth=date(1990, 1, 1),
+        ))
+    db.commit()
+
+    counts = backfill_ssn_index(session_factory=TestingSessionLocal)
+
+    assert counts == {"updated": 2, "duplicates": 1, "undecryptable": 0}
+    found = db.query(Consumer).filter(Consumer.ssn_index == ssn_blind_index("123456789")).one()
+    assert found.last_name == "B0"
@@ -0,0 +1,143 @@
+"""
+Tests for cached consent checks and the expiry sweeper
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from app.models.consent import Consent, ConsentStatus, ConsentType
+from app.services import consents
+from app.services.consents import check_consent, consent_cache, expire_consents, grant_consent, revoke_consent
+from app.utils.auth_cache import access_token_claims
+from app.utils.security import create_access_token
+from tests.conftest import AsyncTestingSessionLocal
+
+
+def _check(consumer_id, bank_id):
+    async def scenario():
+        async with AsyncTestingSessionLocal() as session:
+            return await check_consent(session, consumer_id, bank_id)
+    return asyncio.run(scenario())
+
+
+def test_checks_are_cached_and_invalidated(db, monkeypatch):
+    """Grants and revocations are seen at once; repeated checks come from the cache"""
+    monkeypatch.setattr(consent_cache, "single_process", True)
+    now = datetime.now(timezone.utc)
+    db.add(Consent(consumer_id=1, bank_id=2, consent_type=ConsentType.CREDIT_REPORT,
+                   status=ConsentStatus.GRANTED, expires_at=now - timedelta(minutes=1)))
+    db.commit()
+    assert not _check(1, 1)
+    assert not _check(1, 2)  # Granted but past expires_at, though not yet swept
+
+    async def grant():
+        async with AsyncTestingSessionLocal() as session:
+            return await grant_consent(session, 1, 1, expires_at=now + timedelta(days=30))
+    consent = asyncio.run(grant())
+    assert _check(1, 1)
+    hits = consent_cache.stats()["hits"]
+    assert _check(1, 1)
+    assert consent_cache.stats()["hits"] == hits + 1
+
+    async def revoke():
+        async with AsyncTestingSessionLocal() as session:
+            await revoke_consent(session, await session.get(Consent, consent.id))
+    asyncio.run(revoke())
+    assert not _check(1, 1)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.expiries = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    def expire(self, key, seconds):
+        self.expiries[key] = seconds
+        return True
+
+
+class AsyncFakeRedis:
+    """The redis.asyncio view of a FakeRedis"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def get(self, key):
+        return self.redis.get(key)
+
+
+def test_cache_is_off_without_shared_versions(db):
+    """Without Redis, a revocation made by another process is seen on the next check"""
+    consent = Consent(consumer_id=1, bank_id=1, consent_type=ConsentType.CREDIT_REPORT,
+                      status=ConsentStatus.GRANTED)
+    db.add(consent)
+    db.commit()
+    hits = consent_cache.stats()["hits"]
+    assert _check(1, 1)
+
+    # Revoked elsewhere: this process never bumps its version
+    consent.status = ConsentStatus.REVOKED
+    db.commit()
+    assert not _check(1, 1)
+    assert consent_cache.stats()["hits"] == hits
+
+
+def test_revocation_reaches_other_workers_through_redis(db, monkeypatch):
+    """Cached checks follow the shared version, whose key expires"""
+    redis = FakeRedis()
+    monkeypatch.setattr(consents, "get_redis_client", lambda: redis)
+    monkeypatch.setattr(consents, "get_async_redis_client", lambda: AsyncFakeRedis(redis))
+    consent = Consent(consumer_id=1, bank_id=1, consent_type=ConsentType.CREDIT_REPORT,
+                      status=ConsentStatus.GRANTED)
+    db.add(consent)
+    db.commit()
+    assert _check(1, 1)
+
+    consent.status = ConsentStatus.REVOKED
+    db.commit()
+    assert _check(1, 1)  # Still cached here
+    # Another worker handled the revocation: only the Redis version moves
+    key = consents.VERSION_KEY.format(consumer_id=1)
+    redis.incr(key)
+    assert not _check(1, 1)
+
+    consent_cache.invalidate(1)
+    assert redis.data[key] == 2 and redis.expiries[key] == consent_cache.ttl * 2
+
+
+def test_sweeper_expires_lapsed_grants(db):
+    """Lapsed grants become EXPIRED in batches; current and open-ended grants are left alone"""
+    now = datetime.now(timezone.utc)
+    for consumer_id, expires_at in [(1, now - timedelta(days=2)), (2, now - timedelta(hours=1)),
+                                    (3, now + timedelta(days=1)), (4, None)]:
+        db.add(Consent(consumer_id=consumer_id, bank_id=1, consent_type=ConsentType.CREDIT_REPORT,
+                       status=ConsentStatus.GRANTED, expires_at=expires_at))
+    db.add(Consent(consumer_id=5, bank_id=1, consent_type=ConsentType.CREDIT_REPORT,
+                   status=ConsentStatus.REVOKED, expires_at=now - timedelta(days=1)))
+    db.commit()
+
+    assert expire_consents(db, batch_size=1, now=now) == 2
+    statuses = {consent.consumer_id: consent.status for consent in db.query(Consent)}
+    assert statuses == {1: ConsentStatus.EXPIRED, 2: ConsentStatus.EXPIRED, 3: ConsentStatus.GRANTED,
+                        4: ConsentStatus.GRANTED, 5: ConsentStatus.REVOKED}
+    assert asyncio.run(consent_cache.current_version(1)) == 1
+    assert asyncio.run(consent_cache.current_version(3)) == 0
+    assert expire_consents(db, now=now) == 0
+
+
+def test_inquiries_require_consent(client, db, bank_user):
+    """Inquiries go through check_consent"""
+    headers = {"Authorization": f"Bearer {create_access_token(access_token_claims(bank_user))}"}
+    params = {"consumer_id": 7, "purpose": "LOAN_APPLICATION"}
+    assert client.post("/api/v1/inquiries/", headers=headers, params=params).status_code == 403
+
+    db.add(Consent(consumer_id=7, bank_id=bank_user.bank_id, consent_type=ConsentType.CREDIT_REPORT,
+                   status=ConsentStatus.GRANTED))
+    db.commit()
+    consent_cache.invalidate(7)
+    assert client.post("/api/v1/inquiries/", headers=headers, params=params).status_code == 201
@@ -0,0 +1,134 @@
+"""
+Tests for maintained consumer credit aggregates
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import event
+from app.models.consumer import Consumer
+from app.models.credit_account import CreditAccount, AccountType, AccountStatus, PaymentStatus
+from app.services.credit_aggregates import (
+    account_scoring_state,
+    apply_account_update,
+    apply_new_account,
+    get_scoring_aggregate,
+    score_aggregate,
+)
+from app.utils.credit_scoring import calculate_credit_score
+from tests.conftest import engine
+
+
+def _consumer_accounts(db, consumer_id):
+    return db.query(CreditAccount).filter(
+        CreditAccount.consumer_id == consumer_id
+    ).order_by(CreditAccount.id).all()
+
+
+def test_aggregate_score_tracks_inserts_and_updates(db):
+    """Scoring from the aggregate row matches scoring every account"""
+    rng = random.Random(7)
+    consumers = []
+    for index in range(10):
+        consumer = Consumer(
+            ssn_encrypted=f"ssn-{index}",
+            first_name="Test",
+            last_name=f"Consumer{index}",
+            date_of_birth=date(1985, 5, 5),
+        )
+        db.add(consumer)
+        db.flush()
+        consumers.append(consumer.id)
+    db.commit()
+
+    for _ in range(60):
+        status = rng.choice([AccountStatus.OPEN, AccountStatus.DELINQUENT, AccountStatus.CLOSED])
+        account = CreditAccount(
+            consumer_id=rng.choice(consumers),
+            bank_id=1,
+            account_number_encrypted="encrypted",
+            account_type=rng.choice(list(AccountType)),
+            account_status=status,
+            payment_status=rng.choice(list(PaymentStatus)),
+            credit_limit=Decimal(rng.choice([0, 1000, 2500, 10000])),
+            current_balance=Decimal(rng.randint(0, 9000)),
+            open_date=date.today() - timedelta(days=rng.randint(0, 5000)),
+            close_date=date.today() - timedelta(days=rng.randint(0, 4000)) if status == AccountStatus.CLOSED else None,
+        )
+        db.add(account)
+        apply_new_account(db, account)
+        db.commit()
+
+    for account in rng.sample(db.query(CreditAccount).all(), 25):
+        before = account_scoring_state(account)
+        account.payment_status = rng.choice(list(PaymentStatus))
+        account.current_balance = Decimal(rng.randint(0, 9000))
+        if rng.random() < 0.3:
+            account.account_status = AccountStatus.CLOSED
+            account.close_date = date.today() - timedelta(days=rng.randint(0, 4000))
+        apply_account_update(db, account, before)
+        db.commit()
+
+    for consumer_id in consumers:
+        expected = calculate_credit_score(None, _consumer_accounts(db, consumer_id))
+        assert score_aggregate(get_scoring_aggregate(db, consumer_id)) == expected
+
+
+def test_aggregate_rebuilds_when_closed_account_ages_out(db):
+    """A closed account stops counting once it passes the 7-year window"""
+    consumer = Consumer(ssn_encrypted="ssn", first_name="A", last_name="B", date_of_birth=date(1990, 1, 1))
+    db.add(consumer)
+    db.flush()
+    closed = CreditAccount(
+        consumer_id=consumer.id,
+        bank_id=1,
+        account_number_encrypted="encrypted",
+        account_type=AccountType.MORTGAGE,
+        account_status=AccountStatus.CLOSED,
+        payment_status=PaymentStatus.CURRENT,
+        current_balance=Decimal(0),
+        open_date=date(2005, 1, 1),
+        close_date=date.today() - timedelta(days=2550),
+    )
+    db.add(closed)
+    apply_new_account(db, closed)
+    db.commit()
+
+    aggregate = get_scoring_aggregate(db, consumer.id)
+    assert aggregate.valid_until == date.today() + timedelta(days=5)
+    assert score_aggregate(aggregate)["score"] > 0
+
+    later = date.today() + timedelta(days=5)
+    assert score_aggregate(get_scoring_aggregate(db, consumer.id, later), later)["score"] == 0
+
+
+def test_first_aggregate_create_locks_consumer_first(db):
+    """Concurrent first creates serialize on the consumer row before counting accounts"""
+    consumer = Consumer(ssn_encrypted="ssn-new", first_name="Test", last_name="New",
+                        date_of_birth=date(1985, 5, 5))
+    db.add(consumer)
+    db.commit()
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()).lower())
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        account = CreditAccount(
+            consumer_id=consumer.id, bank_id=1, account_number_encrypted="encrypted",
+            account_type=AccountType.CREDIT_CARD, account_status=AccountStatus.OPEN,
+            payment_status=PaymentStatus.CURRENT, credit_limit=Decimal(1000),
+            current_balance=Decimal(100), open_date=date.today() - timedelta(days=400),
+        )
+        db.add(account)
+        apply_new_account(db, account)
+        db.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    lock = next(i for i, sql in enumerate(statements) if sql.startswith("select consumers.id from consumers"))
+    accounts = max(i for i, sql in enumerate(statements) if "from credit_accounts" in sql)
+    create = next(i for i, sql in enumerate(statements) if sql.startswith("insert into consumer_credit_aggregates"))
+    assert lock < accounts < create
+    assert get_scoring_aggregate(db, consumer.id).total_accounts == 1
@@ -0,0 +1,69 @@
+"""
+Tests for credit scoring
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from app.models.credit_account import CreditAccount, AccountType, AccountStatus, PaymentStatus
+from app.utils.credit_scoring import calculate_credit_score
+from app.utils.batch_scoring import CreditAccountBatch, score_batch
+
+
+def _random_account(rng: random.Random, consumer_id: int) -> CreditAccount:
+    """Build an unsaved credit account with randomized scoring inputs"""
+    open_date = date.today() - timedelta(days=rng.randint(0, 6000))
+    status = rng.choice(list(AccountStatus))
+    close_date = None
+    if status == AccountStatus.CLOSED and rng.random() < 0.8:
+        close_date = date.today() - timedelta(days=rng.randint(0, 4000))
+    return CreditAccount(
+        consumer_id=consumer_id,
+        account_type=rng.choice(list(AccountType)),
+        account_status=status,
+        payment_status=rng.choice(list(PaymentStatus)),
+        credit_limit=Decimal(rng.randint(0, 20000)) if rng.random() < 0.7 else None,
+        current_balance=Decimal(rng.randint(0, 1500000)) / 100,
+        open_date=open_date,
+        close_date=close_date,
+    )
+
+
+def test_batch_scores_match_scalar_scores():
+    """Vectorized batch scoring matches calculate_credit_score for every consumer"""
+    rng = random.Random(42)
+    accounts_by_consumer = {
+        consumer_id: [_random_account(rng, consumer_id) for _ in range(rng.randint(0, 8))]
+        for consumer_id in range(1, 301)
+    }
+    accounts = [acc for accs in accounts_by_consumer.values() for acc in accs]
+    rng.shuffle(accounts)
+
+    result = score_batch(
+        CreditAccountBatch.from_accounts(accounts),
+        consumer_ids=list(accounts_by_consumer),
+    )
+
+    assert len(result) == len(accounts_by_consumer)
+    for consumer_id, batch_result in result.items():
+        # Scalar scorer sees accounts in the same relative order as the batch
+        consumer_accounts = [acc for acc in accounts if acc.consumer_id == consumer_id]
+        assert batch_result == calculate_credit_score(None, consumer_accounts)
+
+
+def test_batch_scoring_edge_cases():
+    """No accounts and only long-closed accounts score zero"""
+    old_closed = CreditAccount(
+        consumer_id=2,
+        account_type=AccountType.CREDIT_CARD,
+        account_status=AccountStatus.CLOSED,
+        payment_status=PaymentStatus.CURRENT,
+        current_balance=Decimal("0"),
+        open_date=date(2000, 1, 1),
+        close_date=date.today() - timedelta(days=3000),
+    )
+
+    result = dict(score_batch(CreditAccountBatch.from_accounts([old_closed]), consumer_ids=[1, 2]).items())
+
+    assert result[1] == calculate_credit_score(None, [])
+    assert result[2] == calculate_credit_score(None, [old_closed])
+    assert result[2]["score"] == 0
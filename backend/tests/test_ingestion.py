@@ -0,0 +1,102 @@
+"""
+Tests for bulk credit data ingestion
+"""
+import io
+import json
+from datetime import date
+from app.models.consumer import Consumer
+from app.models.consumer_credit_aggregate import ConsumerCreditAggregate
+from app.models.consumer_score import DirtyConsumer
+from app.models.credit_account import CreditAccount
+from app.services.ingestion import detect_format, ingest_rows, parse_rows
+from app.utils.security import decrypt_sensitive_data
+
+
+def _account(consumer_id, number, **overrides):
+    row = {
+        "consumer_id": consumer_id,
+        "account_number": number,
+        "account_type": "CREDIT_CARD",
+        "account_status": "OPEN",
+        "payment_status": "CURRENT",
+        "credit_limit": "5000",
+        "current_balance": "1200.50",
+        "open_date": "2018-03-01",
+    }
+    row.update(overrides)
+    return row
+
+
+def _consumer(db):
+    consumer = Consumer(ssn_encrypted="ssn", first_name="A", last_name="B", date_of_birth=date(1990, 1, 1))
+    db.add(consumer)
+    db.commit()
+    return consumer.id
+
+
+def test_ingest_ndjson_reports_rejected_rows(db):
+    """Valid rows are inserted in chunks; bad rows are reported by line number"""
+    consumer_id = _consumer(db)
+    lines = [json.dumps(_account(consumer_id, f"ACCT-{index}")) for index in range(7)]
+    lines.insert(2, "{not json")
+    lines.insert(4, json.dumps(_account(consumer_id, "X", payment_status="LATE_999")))
+    lines.insert(5, json.dumps(_account(consumer_id + 100, "Y")))
+    stream = io.StringIO("\n".join(lines) + "\n\n")
+
+    result = ingest_rows(db, parse_rows(stream, "ndjson"), bank_id=1, chunk_size=3)
+
+    assert (result.rows, result.inserted, result.rejected) == (10, 7, 3)
+    assert [error["row"] for error in result.errors] == [3, 5, 6]
+    assert result.errors[1]["errors"][0].startswith("payment_status:")
+    accounts = db.query(CreditAccount).order_by(CreditAccount.id).all()
+    assert decrypt_sensitive_data(accounts[0].account_number_encrypted) == "ACCT-0"
+    assert db.get(ConsumerCreditAggregate, consumer_id).total_accounts == 7
+    assert db.get(DirtyConsumer, consumer_id) is not None
+
+
+def test_ingest_csv_treats_empty_cells_as_missing():
+    """CSV rows validate like NDJSON and blank optional cells become None"""
+    stream = io.StringIO(
+        "consumer_id,account_number,account_type,account_status,payment_status,credit_limit,current_balance,open_date\n"
+        "1,A-1,AUTO_LOAN,OPEN,CURRENT,,900,2020-01-01\n"
+    )
+
+    rows = list(parse_rows(stream, "csv"))
+
+    assert rows == [(2, {
+        "consumer_id": "1", "account_number": "A-1", "account_type": "AUTO_LOAN", "account_status": "OPEN",
+        "payment_status": "CURRENT", "current_balance": "900", "open_date": "2020-01-01",
+    })]
+    assert detect_format("text/csv; charset=utf-8") == "csv"
+    assert detect_format("application/x-ndjson") == "ndjson"
+    assert detect_format("text/plain") is None
+
+
+def test_delta_feed_upserts_changed_rows_only(db):
+    """A delta reload inserts new accounts, updates changed ones and skips the rest"""
+    consumer_id = _consumer(db)
+    first = [_account(consumer_id, f"ACCT-{index}") for index in range(3)]
+    result = ingest_rows(db, enumerate(first, start=1), bank_id=1)
+    assert result.inserted == 3
+
+    second = [
+        _account(consumer_id, "ACCT-0"),
+        _account(consumer_id, "acct-1", payment_status="LATE_60", current_balance="1500"),
+        _account(consumer_id, "ACCT-3"),
+    ]
+    result = ingest_rows(db, enumerate(second, start=1), bank_id=1, mode="delta")
+
+    assert (result.inserted, result.updated, result.unchanged, result.rejected) == (1, 1, 1, 0)
+    accounts = db.query(CreditAccount).order_by(CreditAccount.id).all()
+    assert len(accounts) == 4
+    assert accounts[1].payment_status.value == "LATE_60"
+    aggregate = db.get(ConsumerCreditAggregate, consumer_id)
+    db.refresh(aggregate)
+    assert (aggregate.total_accounts, aggregate.payment_late_60) == (4, 1)
+
+    result = ingest_rows(db, enumerate(second, start=1), bank_id=1, mode="delta")
+    assert (result.inserted, result.updated, result.unchanged) == (0, 0, 3)
+
+    result = ingest_rows(db, enumerate(first[:1], start=1), bank_id=1)
+    assert result.rejected == 1
+    assert "already exists" in result.errors[0]["errors"][0]
@@ -0,0 +1,109 @@
+"""
+Tests for background ingestion jobs
+"""
+import json
+import time
+from datetime import date, datetime, timedelta
+from app.models.consumer import Consumer
+from app.models.credit_account import CreditAccount
+from app.models.ingestion_job import IngestionJob, IngestionJobStatus
+from app.services.ingestion_jobs import JobHeartbeat, claim_next_job, create_job, job_status, run_job, run_worker
+from tests.conftest import TestingSessionLocal
+
+
+def _upload(tmp_path, db, rows: int):
+    consumer = Consumer(ssn_encrypted="ssn", first_name="A", last_name="B", date_of_birth=date(1990, 1, 1))
+    db.add(consumer)
+    db.commit()
+    lines = [
+        json.dumps({
+            "consumer_id": consumer.id,
+            "account_number": f"ACCT-{index}",
+            "account_type": "AUTO_LOAN",
+            "account_status": "OPEN",
+            "payment_status": "CURRENT" if index != 4 else "LATE",
+            "current_balance": "100",
+            "open_date": "2021-06-01",
+        })
+        for index in range(1, rows + 1)
+    ]
+    path = tmp_path / "upload.ndjson"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path), path.stat().st_size
+
+
+def test_worker_processes_queued_job(db, tmp_path):
+    """A queued job is claimed, loaded in chunks and its file removed"""
+    path, size = _upload(tmp_path, db, 10)
+    job = create_job(db, bank_id=1, submitted_by=None, path=path, file_format="ndjson", file_size=size)
+
+    assert run_worker(once=True, chunk_size=3, session_factory=TestingSessionLocal) == 1
+
+    db.expire_all()
+    job = db.get(IngestionJob, job.id)
+    status = job_status(job)
+    assert status["status"] == IngestionJobStatus.COMPLETED
+    assert (status["rows_processed"], status["rows_inserted"], status["rows_rejected"]) == (10, 9, 1)
+    assert status["errors"][0]["row"] == 4
+    assert status["progress"] == 1.0
+    assert status["bytes_processed"] == size
+    assert db.query(CreditAccount).count() == 9
+    assert not tmp_path.joinpath("upload.ndjson").exists()
+
+
+def test_stale_running_job_resumes_after_last_committed_row(db, tmp_path):
+    """A job abandoned by a crashed worker is reclaimed without re-inserting rows"""
+    path, size = _upload(tmp_path, db, 6)
+    job = create_job(db, bank_id=1, submitted_by=None, path=path, file_format="ndjson", file_size=size)
+    job.status = IngestionJobStatus.RUNNING
+    job.started_at = datetime.utcnow() - timedelta(hours=1)
+    job.heartbeat_at = datetime.utcnow() - timedelta(hours=1)
+    job.last_row = job.rows_processed = job.rows_inserted = 3
+    db.commit()
+
+    run_worker(once=True, session_factory=TestingSessionLocal)
+
+    db.expire_all()
+    job = db.get(IngestionJob, job.id)
+    assert job.status == IngestionJobStatus.COMPLETED
+    assert (job.rows_processed, job.rows_inserted, job.rows_rejected) == (6, 5, 1)
+    assert db.query(CreditAccount).count() == 2
+
+
+def test_reclaimed_job_is_not_written_by_previous_worker(db, tmp_path):
+    """A worker whose job was taken over stops without committing rows or progress"""
+    path, size = _upload(tmp_path, db, 6)
+    job = create_job(db, bank_id=1, submitted_by=None, path=path, file_format="ndjson", file_size=size)
+    job = claim_next_job(db)
+
+    other = TestingSessionLocal()
+    try:
+        other.get(IngestionJob, job.id).claim_token = "another-worker"
+        other.commit()
+    finally:
+        other.close()
+
+    run_job(db, job, chunk_size=2)
+
+    db.expire_all()
+    job = db.get(IngestionJob, job.id)
+    assert (job.status, job.claim_token, job.rows_processed) == (IngestionJobStatus.RUNNING, "another-worker", 0)
+    assert db.query(CreditAccount).count() == 0
+    assert tmp_path.joinpath("upload.ndjson").exists()
+
+
+def test_heartbeat_refreshes_until_job_is_reclaimed(db, tmp_path):
+    """The heartbeat thread keeps a claimed job fresh and notices when it is taken over"""
+    path, size = _upload(tmp_path, db, 1)
+    create_job(db, bank_id=1, submitted_by=None, path=path, file_format="ndjson", file_size=size)
+    job = claim_next_job(db)
+    job_id, claimed_at = job.id, job.heartbeat_at
+
+    with JobHeartbeat(TestingSessionLocal, job_id, job.claim_token, interval=0.05) as heartbeat:
+        time.sleep(0.2)
+        db.expire_all()
+        assert db.get(IngestionJob, job_id).heartbeat_at > claimed_at
+        db.get(IngestionJob, job_id).claim_token = "another-worker"
+        db.commit()
+        time.sleep(0.2)
+    assert heartbeat.lost
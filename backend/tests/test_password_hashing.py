@@ -0,0 +1,75 @@
+"""
+Tests for the password hashing pool
+"""
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from app.utils.password_hashing import PasswordHashPool, password_pool, verify_password_async
+from app.utils.security import get_password_hash
+
+
+def test_event_loop_stays_responsive_during_hashing():
+    """Concurrent bcrypt verifications do not block other coroutines"""
+    hashed = get_password_hash("secret")
+    started = time.perf_counter()
+    get_password_hash("secret")
+    bcrypt_seconds = time.perf_counter() - started
+
+    async def scenario():
+        lags = []
+
+        async def ticker():
+            for _ in range(20):
+                before = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append(time.perf_counter() - before - 0.005)
+
+        results = await asyncio.gather(
+            ticker(), *[verify_password_async("secret", hashed) for _ in range(4)]
+        )
+        return lags, results[1:]
+
+    lags, results = asyncio.run(scenario())
+    assert results == [True] * 4
+    assert max(lags) < bcrypt_seconds
+    assert password_pool.stats()["completed"] >= 4
+
+
+def test_full_queue_rejects_with_503():
+    """Calls beyond max_queue waiting are refused instead of piling up"""
+    pool = PasswordHashPool(workers=1, max_queue=1)
+
+    async def scenario():
+        slow = []
+        for _ in range(2):
+            slow.append(asyncio.ensure_future(pool.submit(time.sleep, 0.2)))
+            await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as exc:
+            await pool.submit(time.sleep, 0)
+        await asyncio.gather(*slow)
+        return exc.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    stats = pool.stats()
+    assert (stats["completed"], stats["rejected"], stats["max_queue_depth"]) == (2, 1, 1)
+
+
+def test_cancelled_queued_call_releases_its_slot():
+    """A caller that goes away while waiting does not keep its queue slot"""
+    pool = PasswordHashPool(workers=1, max_queue=2)
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.submit(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        waiting = asyncio.ensure_future(pool.submit(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await running
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert (stats["queued"], stats["running"], stats["completed"]) == (0, 0, 1)
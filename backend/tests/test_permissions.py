@@ -0,0 +1,77 @@
+"""
+Tests for bitmask permissions and per-bank role overrides
+"""
+from app.models.bank import Bank
+from app.models.bank_role_permission import BankRolePermission
+from app.models.user import User, UserRole
+from app.utils.auth_cache import access_token_claims
+from app.utils.permissions import PERMISSION_BITS, ROLE_PERMISSIONS, Permission, bank_role_permissions, has_permission
+from app.utils.security import create_access_token
+
+
+def _headers(user):
+    return {"Authorization": f"Bearer {create_access_token(access_token_claims(user))}"}
+
+
+def test_role_masks_match_role_permissions():
+    """Every permission has its own bit and masks grant exactly the listed permissions"""
+    assert len(set(PERMISSION_BITS.values())) == len(PERMISSION_BITS)
+    for role in UserRole:
+        user = User(role=role, bank_id=None)
+        for permission in PERMISSION_BITS:
+            assert has_permission(user, permission) == (permission in ROLE_PERMISSIONS.get(role, []))
+    assert not has_permission(User(role=UserRole.ADMIN, bank_id=None), "not:a_permission")
+
+
+def test_bank_role_overrides(client, db, admin_user, bank_user):
+    """Overrides apply to the bank's users only and take effect at once"""
+    db.add(Bank(id=1, name="Bank", license_number="LIC-1", contact_email="bank@test.com"))
+    other = User(email="other@test.com", password_hash="x", full_name="Other", role=UserRole.BANK_USER,
+                 is_active=True, is_verified=True, bank_id=2)
+    db.add(other)
+    db.commit()
+    assert client.get("/api/v1/users/", headers=_headers(bank_user)).status_code == 403
+
+    response = client.put("/api/v1/banks/1/role-permissions", headers=_headers(admin_user), json={
+        "role": "BANK_USER", "grant": [Permission.VIEW_USER], "revoke": [Permission.SUBMIT_CREDIT_DATA],
+    })
+    assert response.status_code == 200
+    permissions = response.json()["data"]["permissions"]
+    assert Permission.VIEW_USER in permissions and Permission.SUBMIT_CREDIT_DATA not in permissions
+
+    assert client.get("/api/v1/users/", headers=_headers(bank_user)).status_code == 200
+    assert client.get("/api/v1/users/", headers=_headers(other)).status_code == 403
+    assert not has_permission(bank_user, Permission.SUBMIT_CREDIT_DATA)
+    assert has_permission(other, Permission.SUBMIT_CREDIT_DATA)
+    loads = bank_role_permissions.loads
+    client.get("/api/v1/users/", headers=_headers(bank_user))
+    assert bank_role_permissions.loads == loads
+
+    overrides = client.get("/api/v1/banks/1/role-permissions", headers=_headers(admin_user)).json()["data"]
+    assert overrides[0]["grant"] == [Permission.VIEW_USER]
+    response = client.put("/api/v1/banks/1/role-permissions", headers=_headers(admin_user), json={
+        "role": "BANK_USER", "grant": ["do:anything"],
+    })
+    assert response.status_code == 400
+
+
+def test_bank_overrides_cannot_grant_global_powers(client, db, admin_user, bank_user):
+    """Overrides are limited to bank roles and to permissions scoped to the bank"""
+    db.add(Bank(id=1, name="Bank", license_number="LIC-1", contact_email="bank@test.com"))
+    db.commit()
+
+    for body in [
+        {"role": "BANK_MANAGER", "grant": [Permission.UPDATE_BANK]},
+        {"role": "BANK_USER", "grant": [Permission.VIEW_AUDIT_LOGS]},
+        {"role": "DATA_PROVIDER", "grant": [Permission.DELETE_USER]},
+        {"role": "AUDITOR", "revoke": [Permission.VIEW_USER]},
+        {"role": "ADMIN", "revoke": [Permission.APPROVE_BANK]},
+    ]:
+        response = client.put("/api/v1/banks/1/role-permissions", headers=_headers(admin_user), json=body)
+        assert response.status_code == 400, body
+
+    # Rows written around the API are ignored too
+    db.add(BankRolePermission(bank_id=1, role=UserRole.BANK_USER, permission=Permission.VIEW_AUDIT_LOGS, granted=True))
+    db.commit()
+    bank_role_permissions.invalidate()
+    assert client.get("/api/v1/audit/", headers=_headers(bank_user)).status_code == 403
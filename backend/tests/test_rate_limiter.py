@@ -0,0 +1,148 @@
+"""
+Tests for GCRA rate limiting and the rate limit middleware
+"""
+import asyncio
+from app.config import settings
+from app.models.bank import Bank
+from app.models.user import User, UserRole
+from app.utils.auth_cache import access_token_claims
+from app.utils.rate_limit_policies import parse_route_costs
+from app.utils import rate_limiter as rate_limiter_module
+from app.utils.rate_limiter import MemoryBackend, RateLimit, RateLimiter
+from app.utils.security import create_access_token
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_sustained_rate():
+    """A full burst is allowed, then one request per interval"""
+    clock = FakeClock()
+    backend = MemoryBackend(100, clock=clock)
+    limits = [RateLimit("minute", 60, 60)]
+
+    results = [backend.check("client", limits) for _ in range(61)]
+    assert all(result.allowed for result in results[:60])
+    assert [result.remaining for result in results[:3]] == [59, 58, 57]
+    assert not results[60].allowed
+    assert results[60].retry_after == 1.0
+
+    clock.now += 1
+    assert backend.check("client", limits).allowed
+    assert not backend.check("client", limits).allowed
+    # Other clients are unaffected
+    assert backend.check("other", limits).remaining == 59
+
+
+def test_fractional_interval_allows_full_burst():
+    """Rounding in accumulated TATs does not cost the last request of a burst"""
+    backend = MemoryBackend(100, clock=FakeClock())
+    limits = [RateLimit("hour", 1000, 3600)]
+    results = [backend.check("client", limits) for _ in range(1001)]
+    assert all(result.allowed for result in results[:1000])
+    assert results[999].remaining == 0
+    assert not results[1000].allowed
+
+
+def test_denial_consumes_nothing():
+    """A request denied by one limit does not use up the others"""
+    clock = FakeClock()
+    backend = MemoryBackend(100, clock=clock)
+    limits = [RateLimit("minute", 2, 60), RateLimit("hour", 10, 3600)]
+    for _ in range(2):
+        assert backend.check("client", limits).allowed
+    for _ in range(5):
+        assert not backend.check("client", limits).allowed
+
+    clock.now += 60
+    result = backend.check("client", [RateLimit("hour", 10, 3600)])
+    assert result.remaining == 7
+
+
+def test_keys_expire_and_are_bounded():
+    """Idle keys are dropped once their TAT passes, and state never exceeds max_keys"""
+    clock = FakeClock()
+    backend = MemoryBackend(3, clock=clock)
+    limits = [RateLimit("minute", 60, 60)]
+    for index in range(5):
+        backend.check(f"client-{index}", limits)
+    assert len(backend) == 3
+    assert backend.evicted == 2
+
+    clock.now += 2
+    backend.check("late", limits)
+    assert len(backend) == 1
+
+
+def test_middleware_headers_and_429(client, db, monkeypatch):
+    """Responses report the remaining budget; over the limit the API answers 429"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 3)
+
+    responses = [client.get("/api/v1/auth/me") for _ in range(4)]
+    assert [response.headers["X-RateLimit-Remaining"] for response in responses[:3]] == ["2", "1", "0"]
+    assert responses[0].headers["X-RateLimit-Limit"] == "3"
+    assert responses[3].status_code == 429
+    assert responses[3].headers["Retry-After"] == "20"
+    assert responses[3].json()["detail"] == "Rate limit exceeded. Please try again later."
+    # Health checks are never limited
+    assert client.get("/health").status_code == 200
+
+
+def test_bank_quotas_are_shared_per_bank_and_weighted_by_route(client, db):
+    """A bank's users draw on the bank's own quota; report generation costs more"""
+    for bank_id, quota in [(1, 30), (2, None)]:
+        db.add(Bank(id=bank_id, name=f"Bank {bank_id}", license_number=f"LIC-{bank_id}",
+                    contact_email=f"bank{bank_id}@test.com", rate_limit_per_minute=quota))
+    users = []
+    for index, bank_id in enumerate([1, 1, 2]):
+        user = User(email=f"user{index}@test.com", password_hash="x", full_name="User",
+                    role=UserRole.BANK_USER, is_active=True, is_verified=True, bank_id=bank_id)
+        db.add(user)
+        users.append(user)
+    db.commit()
+    headers = [{"Authorization": f"Bearer {create_access_token(access_token_claims(user))}"} for user in users]
+
+    assert client.get("/api/v1/auth/me", headers=headers[0]).headers["X-RateLimit-Remaining"] == "29"
+    assert client.get("/api/v1/auth/me", headers=headers[1]).headers["X-RateLimit-Remaining"] == "28"
+    assert client.get("/api/v1/auth/me", headers=headers[2]).headers["X-RateLimit-Remaining"] == "599"
+
+    response = client.post("/api/v1/credit-reports/", headers=headers[0], json={})
+    assert response.headers["X-RateLimit-Remaining"] == "18"
+    assert parse_route_costs(" POST /api/v1/x/ = 5 ,GET /y=2") == {("POST", "/api/v1/x"): 5, ("GET", "/y"): 2}
+
+
+class AsyncFakeRedis:
+    """redis.asyncio stand-in whose GCRA script allows everything, or fails"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def register_script(self, script):
+        async def run(keys, args):
+            self.calls.append(keys)
+            if self.fail:
+                raise ConnectionError("redis is down")
+            return [1] + [59, 0, 1000] * len(keys)
+        return run
+
+
+def test_redis_checks_are_awaited_and_fall_back(monkeypatch):
+    """With Redis the script is awaited on the async client; errors fall back to per-process limits"""
+    redis = AsyncFakeRedis()
+    monkeypatch.setattr(rate_limiter_module, "get_async_redis_client", lambda: redis)
+    limiter = RateLimiter(100)
+    limits = [RateLimit("minute", 60, 60)]
+
+    result = asyncio.run(limiter.check("client", limits))
+    assert result.allowed and result.remaining == 59
+    assert redis.calls == [["ratelimit:{client}:minute"]] and len(limiter.memory) == 0
+
+    redis.fail = True
+    assert asyncio.run(limiter.check("client", limits)).allowed
+    assert limiter.redis_errors == 1 and len(limiter.memory) == 1
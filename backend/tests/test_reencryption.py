@@ -0,0 +1,96 @@
+"""
+Tests for background re-encryption
+"""
+from datetime import date
+from decimal import Decimal
+from cryptography.fernet import Fernet
+from app.config import settings
+from app.models.consumer import Consumer
+from app.models.credit_account import CreditAccount, AccountType, AccountStatus, PaymentStatus
+from app.services import reencryption
+from app.services.reencryption import Throttle, reencrypt_target
+from app.utils.security import decrypt_sensitive_data, encrypt_sensitive_data, get_encryption_key
+from tests.conftest import TestingSessionLocal
+
+
+def test_reencrypt_moves_every_value_to_current_key(db, monkeypatch):
+    """Legacy and old-version values are rewritten; a resumed run skips finished rows"""
+    legacy = Fernet(get_encryption_key()).encrypt(b"000-00-0000").decode()
+    ssns = [legacy] + [encrypt_sensitive_data(f"111-11-{index:04d}") for index in range(4)] + ["garbage"]
+    for index, ssn in enumerate(ssns):
+        db.add(Consumer(ssn_encrypted=ssn, first_name="A", last_name=str(index), date_of_birth=date(1990, 1, 1)))
+    db.flush()
+    db.add(CreditAccount(
+        consumer_id=1, bank_id=1, account_number_encrypted=encrypt_sensitive_data("ACC-1"),
+        account_type=AccountType.CREDIT_CARD, account_status=AccountStatus.OPEN,
+        payment_status=PaymentStatus.CURRENT, current_balance=Decimal(0), open_date=date(2020, 1, 1),
+    ))
+    db.commit()
+
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_PREVIOUS", f"1:{settings.ENCRYPTION_KEY}")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", "the-next-encryption-key")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_VERSION", 2)
+
+    checkpoint = reencrypt_target(db, "consumers.ssn_encrypted", batch_size=2)
+    assert (checkpoint.rows_scanned, checkpoint.rows_reencrypted, checkpoint.rows_failed) == (6, 5, 1)
+    assert checkpoint.finished_at is not None
+
+    consumers = db.query(Consumer).order_by(Consumer.id).all()
+    assert all(c.ssn_encrypted.startswith("v2$") for c in consumers[:5])
+    assert consumers[5].ssn_encrypted == "garbage"
+    assert decrypt_sensitive_data(consumers[0].ssn_encrypted) == "000-00-0000"
+    assert decrypt_sensitive_data(consumers[4].ssn_encrypted) == "111-11-0003"
+
+    # Key 1 is no longer needed once every column has been moved
+    account = reencrypt_target(db, "credit_accounts.account_number_encrypted")
+    assert account.rows_reencrypted == 1
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_PREVIOUS", "")
+    assert decrypt_sensitive_data(db.query(CreditAccount).one().account_number_encrypted) == "ACC-1"
+    assert reencrypt_target(db, "consumers.ssn_encrypted").rows_scanned == 6
+
+
+def test_rows_rewritten_during_a_batch_are_not_counted(db, monkeypatch):
+    """A value the application replaces before the swap keeps the new value and is not counted"""
+    for index in range(3):
+        db.add(Consumer(ssn_encrypted=encrypt_sensitive_data(f"222-22-{index:04d}"), first_name="A",
+                        last_name=str(index), date_of_birth=date(1990, 1, 1)))
+    db.commit()
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_PREVIOUS", f"1:{settings.ENCRYPTION_KEY}")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", "the-next-encryption-key")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_VERSION", 2)
+
+    rotate = reencryption._rotate_batch
+
+    def rotate_while_app_writes(values):
+        other = TestingSessionLocal()
+        try:
+            other.query(Consumer).filter(Consumer.last_name == "1").one().ssn_encrypted = \
+                encrypt_sensitive_data("999-99-9999")
+            other.commit()
+        finally:
+            other.close()
+        return rotate(values)
+
+    monkeypatch.setattr(reencryption, "_rotate_batch", rotate_while_app_writes)
+    checkpoint = reencrypt_target(db, "consumers.ssn_encrypted")
+    assert (checkpoint.rows_scanned, checkpoint.rows_reencrypted, checkpoint.rows_failed) == (3, 2, 0)
+    db.expire_all()
+    rewritten = db.query(Consumer).filter(Consumer.last_name == "1").one()
+    assert decrypt_sensitive_data(rewritten.ssn_encrypted) == "999-99-9999"
+
+
+def test_throttle_paces_to_rate():
+    """The throttle sleeps off any time gained over the target rate"""
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    throttle = Throttle(100, clock=lambda: now[0], sleep=sleep)
+    throttle.wait(50)
+    now[0] += 1.0
+    throttle.wait(50)
+    assert slept == [0.5]
+    assert Throttle(None, clock=lambda: 0.0, sleep=sleep).wait(10) is None
@@ -0,0 +1,86 @@
+"""
+Tests for the credit report cache
+"""
+from datetime import date, datetime, timedelta
+from app.models.consumer import Consumer
+from app.models.credit_report import CreditReport
+from app.models.user import User, UserRole
+from app.services.report_cache import ReportCache, report_cache
+from app.utils.auth_cache import access_token_claims
+from app.utils.security import create_access_token
+from app.utils.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Entries past maxsize are evicted oldest-first and reads refresh recency"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    cache.set("d", 4, ttl=0)
+    assert cache.get("d") is None
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 2
+
+
+def test_report_cache_invalidation_bumps_version():
+    """A report cached before a data change is never served after it"""
+    cache = ReportCache(maxsize=10, ttl=60, single_process=True)
+    report = {"id": 1, "consumer_id": 7, "credit_score": 850}
+
+    version = cache.current_version(7)
+    assert cache.get(7, version) is None
+    cache.set(7, version, report, datetime.utcnow() + timedelta(days=30))
+    assert cache.get(7, cache.current_version(7)) == report
+
+    cache.invalidate(7)
+
+    assert cache.current_version(7) == version + 1
+    assert cache.get(7, cache.current_version(7)) is None
+    # A report built from data read before the change stays unreachable
+    cache.set(7, version, report)
+    assert cache.get(7, cache.current_version(7)) is None
+    assert cache.stats()["local_hits"] == 1
+
+
+def test_report_cache_respects_report_expiry():
+    """Expired reports are not cached"""
+    cache = ReportCache(maxsize=10, ttl=60, single_process=True)
+    cache.set(1, 0, {"id": 1}, datetime.utcnow() - timedelta(seconds=1))
+
+    assert cache.get(1, 0) is None
+
+
+def test_report_cache_is_off_without_shared_versions():
+    """Without Redis, a multi-process deployment would miss other processes' invalidations"""
+    cache = ReportCache(maxsize=10, ttl=60)
+    cache.set(1, 0, {"credit_score": 700})
+
+    assert cache.get(1, 0) is None
+
+
+def test_cache_hit_still_records_a_report_for_the_caller(client, db, admin_user, monkeypatch):
+    """Cached contents are reused, but each request gets its own CreditReport row"""
+    monkeypatch.setattr(report_cache, "single_process", True)
+    other = User(email="other@test.com", password_hash="x", full_name="Other", role=UserRole.ADMIN,
+                 is_active=True, is_verified=True)
+    consumer = Consumer(ssn_encrypted="ssn", first_name="A", last_name="B", date_of_birth=date(1990, 1, 1))
+    db.add_all([other, consumer])
+    db.commit()
+
+    responses = [
+        client.post("/api/v1/credit-reports/", json={"consumer_id": consumer.id},
+                    headers={"Authorization": f"Bearer {create_access_token(access_token_claims(user))}"})
+        for user in (admin_user, other)
+    ]
+    assert [response.status_code for response in responses] == [201, 201]
+    assert [response.json()["meta"]["cache"] for response in responses] == ["miss", "hit"]
+    reports = db.query(CreditReport).order_by(CreditReport.id).all()
+    assert [report.generated_by for report in reports] == [admin_user.id, other.id]
+    assert responses[1].json()["data"]["id"] == reports[1].id
+    assert reports[0].credit_score == reports[1].credit_score
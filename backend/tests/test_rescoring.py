@@ -0,0 +1,109 @@
+"""
+Tests for batch rescoring
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from app.models.consumer import Consumer
+from app.models.credit_account import CreditAccount, AccountType, AccountStatus, PaymentStatus
+from app.models.consumer_score import ConsumerScore, DirtyConsumer
+from app.models.credit_score_snapshot import CreditScoreSnapshot
+from app.services.rescoring import group_account_rows, rescore_all, rescore_dirty, shard_consumer_ids
+from app.services.scoring_queue import mark_consumers_dirty, mark_all_consumers_dirty
+from app.utils.credit_scoring import calculate_credit_score
+from tests.conftest import TestingSessionLocal
+
+
+def _seed_consumers(db, count: int):
+    """Create consumers with a varying number of accounts (consumer 1 has none)"""
+    for index in range(1, count + 1):
+        consumer = Consumer(
+            ssn_encrypted=f"ssn-{index}",
+            first_name="Test",
+            last_name=f"Consumer{index}",
+            date_of_birth=date(1980, 1, 1),
+        )
+        db.add(consumer)
+        db.flush()
+        for offset in range(index - 1):
+            db.add(CreditAccount(
+                consumer_id=consumer.id,
+                bank_id=1,
+                account_number_encrypted=f"acct-{index}-{offset}",
+                account_type=list(AccountType)[offset % len(AccountType)],
+                account_status=AccountStatus.OPEN,
+                payment_status=list(PaymentStatus)[(index + offset) % len(PaymentStatus)],
+                credit_limit=Decimal(5000),
+                current_balance=Decimal(250 * (offset + 1)),
+                open_date=date.today() - timedelta(days=400 * offset + 30),
+            ))
+    db.commit()
+
+
+def test_group_account_rows_never_splits_consumers():
+    """Chunks close at consumer boundaries once they reach chunk_size rows"""
+    rows = [
+        SimpleNamespace(scored_consumer_id=consumer_id, account_id=account_id)
+        for consumer_id, account_id in [(1, None), (2, 10), (2, 11), (2, 12), (3, 13), (4, 14)]
+    ]
+
+    chunks = list(group_account_rows(rows, chunk_size=2))
+
+    assert [consumer_ids for consumer_ids, _ in chunks] == [[1, 2], [3, 4]]
+    assert [len(accounts) for _, accounts in chunks] == [3, 2]
+
+
+def test_shard_consumer_ids_cover_range_once():
+    """Shards are contiguous, non-overlapping and cover every consumer id"""
+    shards = shard_consumer_ids(5, 104, 8)
+
+    assert len(shards) == 8
+    assert shards[0][0] == 5
+    assert shards[-1][1] == 105
+    assert all(high == next_low for (_, high), (next_low, _) in zip(shards, shards[1:]))
+    assert shard_consumer_ids(7, 9, 16) == [(7, 8), (8, 9), (9, 10)]
+
+
+def test_rescore_all_writes_snapshot_per_consumer(db):
+    """Every consumer gets a snapshot matching the scalar scorer"""
+    _seed_consumers(db, 6)
+
+    stats = rescore_all(chunk_size=100, session_factory=TestingSessionLocal, progress=False)
+
+    assert stats.consumers == 6
+    assert stats.accounts == 15
+    snapshots = db.query(CreditScoreSnapshot).all()
+    assert len(snapshots) == 6
+    for snapshot in snapshots:
+        accounts = db.query(CreditAccount).filter(
+            CreditAccount.consumer_id == snapshot.consumer_id
+        ).order_by(CreditAccount.id).all()
+        expected = calculate_credit_score(None, accounts)
+        assert snapshot.credit_score == expected["score"]
+        assert snapshot.score_factors == expected["factors"]
+
+
+def test_rescore_dirty_only_touches_changed_consumers(db):
+    """Incremental mode scores queued consumers and drains the queue"""
+    _seed_consumers(db, 5)
+    mark_all_consumers_dirty(db)
+
+    stats = rescore_dirty(chunk_size=2, session_factory=TestingSessionLocal, progress=False)
+
+    assert stats.consumers == 5
+    assert db.query(DirtyConsumer).count() == 0
+    assert db.query(ConsumerScore).count() == 5
+
+    account = db.query(CreditAccount).filter(CreditAccount.consumer_id == 4).first()
+    account.payment_status = PaymentStatus.LATE_120_PLUS
+    mark_consumers_dirty(db, [4])
+    mark_consumers_dirty(db, [4])
+    db.commit()
+    assert db.query(DirtyConsumer).one().version == 2
+
+    stats = rescore_dirty(session_factory=TestingSessionLocal, progress=False)
+
+    assert stats.consumers == 1
+    db.expire_all()
+    accounts = db.query(CreditAccount).filter(CreditAccount.consumer_id == 4).order_by(CreditAccount.id).all()
+    assert db.get(ConsumerScore, 4).credit_score == calculate_credit_score(None, accounts)["score"]
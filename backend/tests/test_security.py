@@ -0,0 +1,77 @@
+"""
+Tests for sensitive data encryption
+"""
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+from app.config import settings
+from app.utils import security
+from app.utils.security import (
+    decrypt_many,
+    decrypt_sensitive_data,
+    encrypt_many,
+    encrypt_sensitive_data,
+    get_encryption_key,
+    rotate_sensitive_data,
+    ssn_blind_index,
+)
+
+
+def test_batched_encryption_round_trips_in_order(monkeypatch):
+    """encrypt_many/decrypt_many keep order, inline and through the thread pool"""
+    values = [f"{index:010d}" for index in range(50)]
+    assert decrypt_many(encrypt_many(values)) == values
+
+    monkeypatch.setattr(security, "ENCRYPTION_PARALLEL_THRESHOLD", 10)
+    monkeypatch.setattr(settings, "ENCRYPTION_WORKERS", 3)
+    tokens = encrypt_many(values)
+    assert [decrypt_sensitive_data(token) for token in tokens] == values
+    assert decrypt_many(tokens) == values
+
+
+def test_keyring_rotation(monkeypatch):
+    """Data encrypted under a retired key still decrypts and can be re-encrypted"""
+    legacy = Fernet(get_encryption_key()).encrypt(b"123-45-6789").decode()
+    old_key = settings.ENCRYPTION_KEY
+    assert decrypt_sensitive_data(legacy) == "123-45-6789"
+
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", "a-new-encryption-key")
+    with pytest.raises(InvalidToken):
+        decrypt_sensitive_data(legacy)
+
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_PREVIOUS", old_key)
+    assert decrypt_sensitive_data(legacy) == "123-45-6789"
+    rotated = rotate_sensitive_data(legacy)
+    assert Fernet(get_encryption_key()).decrypt(rotated.partition("$")[2].encode()) == b"123-45-6789"
+    assert decrypt_many([legacy, encrypt_sensitive_data("42")]) == ["123-45-6789", "42"]
+
+
+def test_versioned_ciphertext(monkeypatch):
+    """New values carry their key version; each version decrypts with its own key"""
+    token = encrypt_sensitive_data("ACC-9")
+    assert token.startswith("v1$")
+    with pytest.raises(InvalidToken):
+        decrypt_sensitive_data("x" + token[1:])  # Only the literal "v" names a key version
+    old_key = settings.ENCRYPTION_KEY
+
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", "a-new-encryption-key")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_VERSION", 2)
+    with pytest.raises(InvalidToken):
+        decrypt_sensitive_data(token)
+
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_PREVIOUS", f"1:{old_key}")
+    rotated = rotate_sensitive_data(token)
+    assert rotated.startswith("v2$")
+    assert rotate_sensitive_data(rotated) == rotated
+    assert decrypt_many([token, rotated]) == ["ACC-9", "ACC-9"]
+
+
+def test_blind_index_survives_encryption_key_rotation(monkeypatch):
+    """Blind indexes depend only on BLIND_INDEX_KEY, so /lookup keeps working after a rotation"""
+    before = ssn_blind_index("123-45-6789")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_PREVIOUS", f"1:{settings.ENCRYPTION_KEY}")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", "a-new-encryption-key")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY_VERSION", 2)
+    assert ssn_blind_index("123-45-6789") == before
+
+    monkeypatch.setattr(settings, "BLIND_INDEX_KEY", "another-blind-index-key")
+    assert ssn_blind_index("123-45-6789") != before